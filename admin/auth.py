@@ -1,3 +1,8 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
 import bcrypt
 from fastapi import Cookie, Depends, Form, HTTPException, Request, Response, status
 from fastapi.responses import RedirectResponse
@@ -9,36 +14,105 @@ from core.database import get_db
 
 COOKIE_NAME = "admin_session"
 COOKIE_MAX_AGE = 60 * 60 * 8  # 8 hours
+LOGIN_RATE_WINDOW = 60  # seconds
+BCRYPT_ROUNDS = 12
+
+# bcrypt releases the GIL, so a couple of threads keep it off the event loop
+# without letting a login burst eat every core
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.admin_hash_workers, thread_name_prefix="bcrypt"
+)
+_login_attempts: dict[str, deque[float]] = {}
 
+SESSION_CACHE_SIZE = 256
+PASSWORD_HASH_TTL = 30.0  # seconds; bounds staleness after a change on another worker
 
-def _get_signer() -> TimestampSigner:
-    return TimestampSigner(settings.secret_key)
+_signer = TimestampSigner(settings.secret_key)
+# token -> (username, expires_at as unix time)
+_session_cache: OrderedDict[str, tuple[str, float]] = OrderedDict()
+# (hash, fetched_at monotonic) of the effective admin password hash
+_password_hash_snapshot: tuple[str, float] | None = None
 
 
 def create_session_cookie(username: str) -> str:
-    signer = _get_signer()
-    return signer.sign(username).decode()
+    return _signer.sign(username).decode()
 
 
 def verify_session_cookie(token: str) -> str | None:
-    signer = _get_signer()
+    cached = _session_cache.get(token)
+    if cached is not None:
+        username, expires_at = cached
+        if time.time() < expires_at:
+            _session_cache.move_to_end(token)
+            return username
+        del _session_cache[token]
+
     try:
-        value = signer.unsign(token, max_age=COOKIE_MAX_AGE)
-        return value.decode()
+        value, signed_at = _signer.unsign(token, max_age=COOKIE_MAX_AGE, return_timestamp=True)
     except (BadSignature, SignatureExpired):
         return None
+    username = value.decode()
+    _session_cache[token] = (username, signed_at.timestamp() + COOKIE_MAX_AGE)
+    if len(_session_cache) > SESSION_CACHE_SIZE:
+        _session_cache.popitem(last=False)
+    return username
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, bcrypt.checkpw, plain_password.encode(), hashed_password.encode()
+    )
+
+
+def _hash(plain_password: str) -> str:
+    return bcrypt.hashpw(plain_password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+
 
+async def hash_password(plain_password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, _hash, plain_password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+
+def _client_ip(request: Request) -> str:
+    # nginx sets X-Real-IP; the app port itself is only reachable from the compose network
+    return request.headers.get("x-real-ip") or (request.client.host if request.client else "")
+
+
+def _login_allowed(ip: str) -> bool:
+    """Sliding-window limit of login attempts per IP (per worker)."""
+    now = time.monotonic()
+    attempts = _login_attempts.setdefault(ip, deque())
+    while attempts and attempts[0] <= now - LOGIN_RATE_WINDOW:
+        attempts.popleft()
+    if len(attempts) >= settings.admin_login_rate_limit:
+        return False
+    attempts.append(now)
+    # Drop idle IPs so the dict doesn't grow without bound
+    if len(_login_attempts) > 10_000:
+        cutoff = now - LOGIN_RATE_WINDOW
+        for key in [k for k, v in _login_attempts.items() if not v or v[-1] <= cutoff]:
+            del _login_attempts[key]
+    return True
 
 
 async def get_admin_password_hash(session: AsyncSession) -> str:
+    global _password_hash_snapshot
+    if _password_hash_snapshot is not None:
+        password_hash, fetched_at = _password_hash_snapshot
+        if time.monotonic() - fetched_at < PASSWORD_HASH_TTL:
+            return password_hash
+
     from core.crud.settings import get_setting
     db_hash = await get_setting(session, "admin_password_hash")
-    if db_hash:
-        return db_hash
-    return settings.admin_password_hash or ""
+    password_hash = db_hash or settings.admin_password_hash or ""
+    _password_hash_snapshot = (password_hash, time.monotonic())
+    return password_hash
+
+
+def invalidate_password_hash() -> None:
+    global _password_hash_snapshot
+    _password_hash_snapshot = None
 
 
 def require_auth(request: Request, admin_session: str | None = Cookie(default=None)) -> str:
@@ -62,6 +136,14 @@ async def login_handler(
     password: str = Form(...),
     session: AsyncSession = Depends(get_db),
 ) -> Response:
+    if not _login_allowed(_client_ip(request)):
+        return request.app.state.templates.TemplateResponse(
+            "login.html",
+            {"request": request, "error": "Слишком много попыток входа, попробуйте через минуту"},
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(LOGIN_RATE_WINDOW)},
+        )
+
     if username != settings.admin_username:
         return request.app.state.templates.TemplateResponse(
             "login.html",
@@ -70,7 +152,7 @@ async def login_handler(
         )
 
     hash_to_check = await get_admin_password_hash(session)
-    if not hash_to_check or not verify_password(password, hash_to_check):
+    if not hash_to_check or not await verify_password(password, hash_to_check):
         return request.app.state.templates.TemplateResponse(
             "login.html",
             {"request": request, "error": "Неверный логин или пароль"},
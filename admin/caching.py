@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import secrets
+import time
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.staticfiles import StaticFiles
+from loguru import logger
+from sqlalchemy import text
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from admin.auth import require_auth
+from core.config import settings
+from core.database import AdminSessionLocal
+
+# Tables with a data-version sequence (migration 0014)
+DATA_TABLES = ("users", "users_archive", "channel_events", "broadcasts", "settings", "bots")
+# Changed after every form post, so the page it redirects to is never answered with a stale 304
+REVISION_COOKIE = "admin_rev"
+PAGE_CACHE_CONTROL = "private, no-cache"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _tree_digest(*directories: str) -> str:
+    digest = hashlib.sha256()
+    for directory in directories:
+        for path in sorted(Path(directory).rglob("*")):
+            if path.is_file():
+                digest.update(str(path).encode())
+                digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+# Part of every page ETag: a deploy that changes templates or assets invalidates cached pages
+BUILD_ID = _tree_digest("admin/templates", "static")
+
+
+class DataVersions:
+    """
+    Write counters of the tables behind admin pages, kept in memory per worker.
+
+    Every write statement on one of DATA_TABLES advances its sequence (a
+    statement trigger, migration 0014). ``run()`` reads all sequences from the
+    primary in one query every ``interval`` seconds, so building an ETag never
+    queries anything. Writes from other workers and the bot show up within one
+    interval.
+
+    A sequence advances when the statement runs, before it commits, so a page
+    rendered in between keeps the old data under the new version until the
+    table changes again. Bot transactions take milliseconds; that race is
+    accepted. A replica may trail for much longer (DB_REPLICA_MAX_LAG plus one
+    lag check), so with one configured ``get()`` answers with the versions read
+    ``delay`` seconds ago: a page is never older than its version, and changes
+    reach cached pages that much later. ``get()`` returns None until such a
+    read succeeds (e.g. 0014 not applied yet); pages are served without ETags.
+    """
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        # (read at, versions), oldest first; only the newest read older than delay is kept
+        self._reads: deque[tuple[float, dict[str, int]]] = deque()
+
+    def _prune(self, now: float) -> None:
+        while len(self._reads) > 1 and now - self._reads[1][0] >= self.delay:
+            self._reads.popleft()
+
+    def get(self, tables: tuple[str, ...]) -> tuple[int, ...] | None:
+        now = time.monotonic()
+        self._prune(now)
+        if not self._reads or now - self._reads[0][0] < self.delay:
+            return None
+        versions = self._reads[0][1]
+        return tuple(versions[table] for table in tables)
+
+    async def refresh(self) -> None:
+        # last_value stays 1 after the first nextval(); is_called tells the two apart
+        query = " UNION ALL ".join(
+            f"SELECT '{table}', last_value + is_called::int FROM {table}_data_version_seq"
+            for table in DATA_TABLES
+        )
+        async with AdminSessionLocal() as session:
+            result = await session.execute(text(query))
+            versions = dict(result.all())
+        now = time.monotonic()
+        self._reads.append((now, versions))
+        self._prune(now)
+
+    async def run(self, interval: float = settings.admin_data_version_interval) -> None:
+        failing = False
+        while True:
+            try:
+                await self.refresh()
+                failing = False
+            except Exception as exc:
+                self._reads.clear()
+                if not failing:
+                    logger.warning(f"Data version refresh failed, page ETags disabled: {exc}")
+                failing = True
+            await asyncio.sleep(interval)
+
+
+def _version_delay() -> float:
+    """How far pages read from the replica may trail the primary."""
+    if not settings.database_replica_url:
+        return 0.0
+    return settings.db_replica_max_lag + settings.db_replica_check_interval
+
+
+data_versions = DataVersions(delay=_version_delay())
+
+
+def _if_none_match(request: Request) -> set[str]:
+    return {tag.strip() for tag in request.headers.get("if-none-match", "").split(",")}
+
+
+def page_etag(*tables: str) -> Callable[..., None]:
+    """
+    Dependency for a page built only from ``tables``.
+
+    Answers 304 when the browser's copy is current, without touching the
+    database: declare it before the session parameter. Otherwise the ETag is
+    added to the rendered page by PageCacheMiddleware.
+    """
+    for table in tables:
+        if table not in DATA_TABLES:
+            raise ValueError(f"No data version for table {table!r}")
+
+    def check(request: Request, username: str = Depends(require_auth)) -> None:
+        versions = data_versions.get(tables)
+        if versions is None:
+            return
+        key = "|".join([
+            BUILD_ID,
+            username,
+            request.url.path,
+            request.url.query,
+            request.cookies.get(REVISION_COOKIE, ""),
+            *map(str, versions),
+        ])
+        etag = f'W/"{hashlib.sha256(key.encode()).hexdigest()[:20]}"'
+        headers = {"ETag": etag, "Cache-Control": PAGE_CACHE_CONTROL}
+        if etag in _if_none_match(request):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        request.state.cache_headers = headers
+
+    return check
+
+
+class PageCacheMiddleware:
+    """
+    Adds the headers prepared by ``page_etag`` to a rendered page and renews
+    the revision cookie after every admin form post.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        posted = scope["method"] not in ("GET", "HEAD") and scope["path"].startswith("/admin")
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                cache_headers = scope.get("state", {}).get("cache_headers")
+                if cache_headers and message["status"] == 200:
+                    headers.update(cache_headers)
+                if posted:
+                    revision = secrets.token_hex(4)
+                    headers.append(
+                        "set-cookie",
+                        f"{REVISION_COOKIE}={revision}; Path=/admin; HttpOnly; SameSite=Lax",
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """
+    Static files addressed by content hash: ``url()`` gives ``/static/<path>?v=<hash>``.
+
+    A request carrying the current hash may be cached forever (``immutable``);
+    other requests revalidate with the ETag StaticFiles already sends.
+    """
+
+    def __init__(self, directory: str, prefix: str = "/static") -> None:
+        super().__init__(directory=directory)
+        self.prefix = prefix
+        self._fingerprints: dict[str, str] = {}
+
+    def fingerprint(self, path: str) -> str:
+        fingerprint = self._fingerprints.get(path)
+        if fingerprint is None or settings.debug:
+            full_path, _ = self.lookup_path(path)
+            fingerprint = hashlib.sha256(Path(full_path).read_bytes()).hexdigest()[:12]
+            self._fingerprints[path] = fingerprint
+        return fingerprint
+
+    def url(self, path: str) -> str:
+        return f"{self.prefix}/{path}?v={self.fingerprint(path)}"
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            version = Request(scope).query_params.get("v")
+            current = version is not None and version == self.fingerprint(path)
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if current else "no-cache"
+        return response
@@ -1,21 +1,39 @@
 import asyncio
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+from functools import partial
 from typing import Any
 
 from aiogram import Bot
 from aiogram_fastapi_server import SimpleRequestHandler
 from fastapi import FastAPI, Request, status
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 from loguru import logger
+from prometheus_client import CONTENT_TYPE_LATEST
 
 from admin.auth import login_handler, logout_handler, require_auth
+from admin.caching import FingerprintedStaticFiles, PageCacheMiddleware, data_versions
 from admin.routers import broadcast, dashboard, exports, settings, subscriptions, users
 from bot.main import create_bot, create_dispatcher
+from bot.middlewares.activity import activity_tracker
+from bot.session import close_bot_session
+from bot.tasks.blocked_users import blocked_user_writer
 from core.config import settings as app_settings
+from core.crud.bots import get_bot_id
 from core.crud.settings import get_setting, seed_defaults
-from core.database import AsyncSessionLocal
+from core.database import AdminSessionLocal, dispose_engines
+from core.leader import LeaderElector
+from core.metrics import mark_worker_dead, render_metrics
+from core.startup import startup_timer
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # optional: pip install -e ".[fast]"
+    BrotliMiddleware = None
+
+startup_timer.mark("imports")
 
 
 class AppStateRequestHandler(SimpleRequestHandler):
@@ -34,8 +52,12 @@ class AppStateRequestHandler(SimpleRequestHandler):
         pass
 
 
+BOT_TOKEN_SYNC_INTERVAL = 10.0  # seconds; how fast other workers follow a token change
+COMPRESS_MIN_SIZE = 1024  # bytes; smaller responses (webhook acks, 304s) go out as is
+
+
 async def _start_bot(app: FastAPI, bot: Bot) -> None:
-    """Set webhook or start polling for the given bot."""
+    """Set webhook or start polling for the given bot. Leader only."""
     dp = app.state.dp
     if app_settings.bot_mode == "webhook":
         await bot.set_webhook(
@@ -47,71 +69,157 @@ async def _start_bot(app: FastAPI, bot: Bot) -> None:
         logger.info(f"Webhook set to {app_settings.webhook_url}")
     else:
         polling_task = asyncio.create_task(
-            dp.start_polling(bot, allowed_updates=["message", "chat_member", "my_chat_member", "callback_query"])
+            # The HTTP session is shared by every Bot; close_bot_session() closes it on shutdown
+            dp.start_polling(
+                bot,
+                allowed_updates=["message", "chat_member", "my_chat_member", "callback_query"],
+                close_bot_session=False,
+            )
         )
         app.state.polling_task = polling_task
         logger.info("Bot started in polling mode")
 
 
-async def _stop_bot(app: FastAPI) -> None:
-    """Stop polling / delete webhook and close current bot session."""
-    bot: Bot = app.state.bot
-    if app_settings.bot_mode == "webhook":
-        await bot.delete_webhook()
-        logger.info("Webhook deleted")
-    else:
-        polling_task = getattr(app.state, "polling_task", None)
-        if polling_task and not polling_task.done():
-            dp = app.state.dp
-            await dp.stop_polling()
-            # Give the polling task a moment to finish gracefully
-            try:
-                await asyncio.wait_for(asyncio.shield(polling_task), timeout=5.0)
-            except (asyncio.CancelledError, asyncio.TimeoutError, Exception):
-                polling_task.cancel()
-        app.state.polling_task = None
-    await bot.session.close()
-    logger.info("Bot session closed")
+async def _stop_polling(app: FastAPI) -> None:
+    polling_task = getattr(app.state, "polling_task", None)
+    if polling_task and not polling_task.done():
+        dp = app.state.dp
+        await dp.stop_polling()
+        # Give the polling task a moment to finish gracefully
+        try:
+            await asyncio.wait_for(asyncio.shield(polling_task), timeout=5.0)
+        except (asyncio.CancelledError, asyncio.TimeoutError, Exception):
+            polling_task.cancel()
+    app.state.polling_task = None
 
 
 async def restart_bot(app: FastAPI, new_token: str) -> None:
-    """Stop the current bot and start a new one with new_token."""
-    await _stop_bot(app)
-
-    new_bot = create_bot(new_token)
-    app.state.bot = new_bot
-
-    await _start_bot(app, new_bot)
-    logger.info("Bot restarted with new token")
+    """Replace the current bot with one using new_token; the leader also moves updates over."""
+    async with app.state.bot_lock:
+        old_bot: Bot | None = app.state.bot
+        if old_bot is not None and old_bot.token == new_token:
+            return
+        is_leader = app.state.leader is not None and app.state.leader.is_leader
+
+        if old_bot is not None:
+            if is_leader:
+                if app_settings.bot_mode == "webhook":
+                    await old_bot.delete_webhook()
+                    logger.info("Webhook deleted")
+                else:
+                    await _stop_polling(app)
+            # The session is shared between tokens: keep its connections open
+
+        async with AdminSessionLocal() as session:
+            await get_bot_id(session, new_token)
+        new_bot = create_bot(new_token)
+        app.state.bot = new_bot
+
+        if is_leader:
+            await _start_bot(app, new_bot)
+        logger.info("Bot restarted with new token")
+
+
+async def _on_elected(app: FastAPI) -> None:
+    # Leader-only code: the other workers never import it
+    from bot.tasks.launcher import BroadcastLauncher
+    from bot.tasks.maintenance import UserMaintenance
+
+    if app.state.bot is not None:
+        await _start_bot(app, app.state.bot)
+    launcher = BroadcastLauncher(lambda: app.state.bot)
+    app.state.launcher = launcher
+    app.state.launcher_task = asyncio.create_task(launcher.run())
+    app.state.maintenance_task = asyncio.create_task(UserMaintenance(lambda: app.state.bot).run())
+
+
+async def _on_demoted(app: FastAPI) -> None:
+    tasks = [app.state.launcher_task, app.state.maintenance_task]
+    app.state.launcher = None
+    app.state.launcher_task = None
+    app.state.maintenance_task = None
+    for task in tasks:
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    await _stop_polling(app)
+
+
+async def _sync_bot_token(app: FastAPI) -> None:
+    """Follow bot token changes saved through another worker's settings page."""
+    while True:
+        await asyncio.sleep(BOT_TOKEN_SYNC_INTERVAL)
+        try:
+            async with AdminSessionLocal() as session:
+                token = await get_setting(session, "bot_token")
+            current = app.state.bot.token if app.state.bot else None
+            if token and token != current:
+                await restart_bot(app, token)
+        except Exception as exc:
+            logger.warning(f"Bot token sync failed: {exc}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Seed default settings on startup
-    async with AsyncSessionLocal() as session:
-        await seed_defaults(session)
-        logger.info("Default settings seeded")
+    with startup_timer.step("settings"):
+        async with AdminSessionLocal() as session:
+            await seed_defaults(session)
 
-        # Load bot_token from DB; fall back to .env value
-        db_token = await get_setting(session, "bot_token")
+            # Load bot_token from DB; fall back to .env value
+            db_token = await get_setting(session, "bot_token")
 
-    token = db_token or app_settings.bot_token
+            token = db_token or app_settings.bot_token
+            if token:
+                # Registered up front so read-only pages can resolve its ID on a replica
+                await get_bot_id(session, token)
 
-    if not token:
+    if token:
+        app.state.bot = create_bot(token)
+    else:
         logger.warning("BOT_TOKEN is not set. Configure it via /admin/settings before the bot can run.")
         app.state.bot = None
-        yield
-        return
-
-    bot = create_bot(token)
-    app.state.bot = bot
 
-    await _start_bot(app, bot)
+    # Every worker serves admin HTTP and webhook requests; only the leader
+    # polls for updates, sets the webhook and runs broadcasts. Election runs
+    # in the background and doesn't delay readiness
+    leader = LeaderElector(
+        on_elected=partial(_on_elected, app),
+        on_demoted=partial(_on_demoted, app),
+    )
+    app.state.leader = leader
+    leader.start()
+    token_sync_task = asyncio.create_task(_sync_bot_token(app))
+    # Every worker handles updates (webhook), so every worker flushes its own buffer
+    activity_task = asyncio.create_task(activity_tracker.run())
+    blocked_users_task = asyncio.create_task(blocked_user_writer.run())
+    data_versions_task = asyncio.create_task(data_versions.run())
+
+    # Load every template now rather than on the first request for each page
+    with startup_timer.step("templates"):
+        env = app.state.templates.env
+        for name in env.list_templates():
+            env.get_template(name)
+
+    app.state.ready = True
+    startup_timer.mark("lifespan")
+    startup_timer.report()
 
     yield
 
-    if app.state.bot:
-        await _stop_bot(app)
+    app.state.ready = False
+    # Awaited so nothing still runs on the engines disposed below
+    background = (token_sync_task, data_versions_task, activity_task, blocked_users_task)
+    for task in background:
+        task.cancel()
+    for task in background:
+        with suppress(asyncio.CancelledError):
+            await task
+    await leader.stop()
+    await close_bot_session()
+    await dispose_engines()
+    mark_worker_dead()
 
 
 def create_app() -> FastAPI:
@@ -127,14 +235,40 @@ def create_app() -> FastAPI:
     # Store dp in app state (bot is set in lifespan after DB read)
     app.state.dp = dp
     app.state.bot = None
+    app.state.bot_lock = asyncio.Lock()
     app.state.polling_task = None
-
-    # Templates
-    templates = Jinja2Templates(directory="admin/templates")
+    app.state.leader = None
+    app.state.launcher = None
+    app.state.launcher_task = None
+    app.state.maintenance_task = None
+    app.state.ready = False
+
+    # Templates: compiled bytecode is cached on disk (a temp dir per OS user),
+    # so restarted workers load templates instead of compiling them again.
+    # Outside debug the source files are not stat()ed on every render
+    templates = Jinja2Templates(
+        env=Environment(
+            loader=FileSystemLoader("admin/templates"),
+            autoescape=True,
+            auto_reload=app_settings.debug,
+            bytecode_cache=FileSystemBytecodeCache(),
+        )
+    )
     app.state.templates = templates
 
-    # Static files
-    app.mount("/static", StaticFiles(directory="static"), name="static")
+    # Static files: templates link them through static_url(), whose ?v=<content hash>
+    # URLs are cached by browsers for a year
+    static_files = FingerprintedStaticFiles(directory="static")
+    app.mount("/static", static_files, name="static")
+    templates.env.globals["static_url"] = static_files.url
+
+    # ETag headers of admin pages (see page_etag), then compression of everything
+    app.add_middleware(PageCacheMiddleware)
+    if app_settings.admin_brotli and BrotliMiddleware is not None:
+        # Falls back to gzip for clients that don't accept br
+        app.add_middleware(BrotliMiddleware, minimum_size=COMPRESS_MIN_SIZE)
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_SIZE)
 
     # Webhook handler (only in webhook mode)
     if app_settings.bot_mode == "webhook":
@@ -157,6 +291,13 @@ def create_app() -> FastAPI:
     app.include_router(exports.router, prefix="/admin")
     app.include_router(subscriptions.router, prefix="/admin")
 
+    # Prometheus scrape endpoint (not proxied by nginx, scrape it on the internal network)
+    app.add_api_route("/metrics", _metrics, methods=["GET"], include_in_schema=False)
+
+    # Probes for the orchestrator, internal network only like /metrics
+    app.add_api_route("/healthz", _healthz, methods=["GET"], include_in_schema=False)
+    app.add_api_route("/readyz", _readyz, methods=["GET"], include_in_schema=False)
+
     # Root redirect
     @app.get("/")
     async def root():
@@ -172,4 +313,36 @@ async def _login_page(request: Request) -> HTMLResponse:
     )
 
 
+async def _metrics(request: Request) -> Response:
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
+async def _healthz(request: Request) -> JSONResponse:
+    """Liveness: the process answers HTTP."""
+    return JSONResponse({"status": "ok"})
+
+
+async def _readyz(request: Request) -> JSONResponse:
+    """
+    Readiness: startup finished, so the admin panel and webhook can be served.
+
+    A missing bot token is reported in the body, not as a failure: a fresh
+    deployment gets its token through the admin panel, which must be reachable.
+    """
+    state = request.app.state
+    if not state.ready:
+        return JSONResponse(
+            {"status": "starting"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    return JSONResponse(
+        {
+            "status": "ready",
+            "bot_configured": state.bot is not None,
+            "leader": state.leader is not None and state.leader.is_leader,
+            "startup_seconds": round(startup_timer.total or 0.0, 3),
+        }
+    )
+
+
 app = create_app()
+startup_timer.mark("create_app")
@@ -1,24 +1,55 @@
-import asyncio
+from urllib.parse import urlencode
 
-from aiogram import Bot
 from fastapi import APIRouter, Depends, File, Form, Request, UploadFile, status
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from admin.auth import require_auth
-from bot.tasks.broadcast import run_broadcast
-from core.crud.broadcasts import create_broadcast, get_broadcasts
+from admin.caching import page_etag
+from bot.tasks import supervisor
+from core.crud.bots import get_bot_id
+from core.crud.broadcasts import (
+    CONTROL_TRANSITIONS,
+    create_broadcast,
+    get_broadcasts,
+    request_broadcast_control,
+    request_recall,
+)
 from core.database import get_db
 
 router = APIRouter()
 
+FAILURE_LABELS = {
+    "blocked": "Заблокировали бота",
+    "deactivated": "Аккаунт удалён",
+    "forbidden": "Нет доступа к чату",
+    "chat_not_found": "Чат не найден",
+    "parse_error": "Ошибка HTML-разметки",
+    "bad_request": "Некорректный запрос",
+    "rate_limited": "Лимит Telegram",
+    "network": "Сетевая ошибка",
+    "server": "Ошибка сервера Telegram",
+    "other": "Прочее",
+}
+
 
 @router.get("/broadcast", response_class=HTMLResponse)
 async def broadcast_form(
     request: Request,
+    queued: int | None = None,
+    recall_queued: int | None = None,
+    error: str | None = None,
+    control: str | None = None,
+    _cache: None = Depends(page_etag("broadcasts")),
     session: AsyncSession = Depends(get_db),
     username: str = Depends(require_auth),
 ) -> HTMLResponse:
+    if queued:
+        success = f"Рассылка #{queued} поставлена в очередь"
+    elif recall_queued:
+        success = f"Отзыв рассылки #{recall_queued} поставлен в очередь"
+    else:
+        success = control
     broadcasts = await get_broadcasts(session)
     return request.app.state.templates.TemplateResponse(
         "broadcast.html",
@@ -26,8 +57,27 @@ async def broadcast_form(
             "request": request,
             "username": username,
             "broadcasts": broadcasts,
-            "success": None,
-            "error": None,
+            "failure_labels": FAILURE_LABELS,
+            "success": success,
+            "error": error,
+        },
+    )
+
+
+@router.get("/broadcast/rows", response_class=HTMLResponse)
+async def broadcast_rows(
+    request: Request,
+    _cache: None = Depends(page_etag("broadcasts")),
+    session: AsyncSession = Depends(get_db),
+    _: str = Depends(require_auth),
+) -> HTMLResponse:
+    """History table body alone, polled by broadcast.html while a broadcast is in progress."""
+    return request.app.state.templates.TemplateResponse(
+        "partials/broadcast_rows.html",
+        {
+            "request": request,
+            "broadcasts": await get_broadcasts(session),
+            "failure_labels": FAILURE_LABELS,
         },
     )
 
@@ -39,9 +89,7 @@ async def send_broadcast(
     image: UploadFile = File(default=None),
     session: AsyncSession = Depends(get_db),
     username: str = Depends(require_auth),
-) -> HTMLResponse:
-    bot: Bot = request.app.state.bot
-
+) -> RedirectResponse:
     image_bytes: bytes | None = None
     image_filename: str | None = None
     has_image = False
@@ -60,47 +108,99 @@ async def send_broadcast(
     elif text_clean:
         broadcast_type = "text"
     else:
-        broadcasts = await get_broadcasts(session)
-        return request.app.state.templates.TemplateResponse(
-            "broadcast.html",
-            {
-                "request": request,
-                "username": username,
-                "broadcasts": broadcasts,
-                "success": None,
-                "error": "Необходимо указать текст или изображение",
-            },
+        return RedirectResponse(
+            url="/admin/broadcast?error=Необходимо+указать+текст+или+изображение", status_code=303
         )
 
-    # image_file_id is unknown yet — will be set after first send in run_broadcast
+    # Queue the broadcast; the leader worker's launcher claims and runs it.
+    # image_file_id is unknown yet — it is set after the first send in run_broadcast
     broadcast = await create_broadcast(
         session,
         type=broadcast_type,
         text=text_clean,
         image_file_id=None,
+        image_data=image_bytes,
+        image_filename=image_filename,
+        bot_id=(
+            await get_bot_id(session, request.app.state.bot.token)
+            if request.app.state.bot
+            else None
+        ),
     )
 
-    # Launch background task — image bytes are passed directly
-    asyncio.create_task(
-        run_broadcast(
-            bot=bot,
-            broadcast_id=broadcast.id,
-            text=text_clean,
-            image_file_id=None,
-            image_bytes=image_bytes,
-            image_filename=image_filename,
-            bot_token=bot.token,
+    launcher = request.app.state.launcher
+    if launcher is not None:
+        launcher.wake()
+
+    # Post/Redirect/Get: the page is rendered once, by the GET, and a reload doesn't resend
+    return RedirectResponse(url=f"/admin/broadcast?queued={broadcast.id}", status_code=303)
+
+
+@router.post("/broadcast/{broadcast_id}/recall")
+async def recall_broadcast(
+    request: Request,
+    broadcast_id: int,
+    action: str = Form(...),
+    text: str = Form(default=""),
+    session: AsyncSession = Depends(get_db),
+    _: str = Depends(require_auth),
+) -> RedirectResponse:
+    text_clean = text.strip()
+    if action not in ("delete", "edit"):
+        return RedirectResponse(url="/admin/broadcast?error=Неизвестное+действие", status_code=303)
+    if action == "edit" and not text_clean:
+        return RedirectResponse(
+            url="/admin/broadcast?error=Укажите+новый+текст+сообщения", status_code=303
         )
+
+    queued = await request_recall(
+        session, broadcast_id, action, text_clean if action == "edit" else None
     )
+    if not queued:
+        return RedirectResponse(
+            url="/admin/broadcast?error=Рассылка+ещё+идёт,+уже+отзывается+или+удалена",
+            status_code=303,
+        )
 
-    broadcasts = await get_broadcasts(session)
-    return request.app.state.templates.TemplateResponse(
-        "broadcast.html",
-        {
-            "request": request,
-            "username": username,
-            "broadcasts": broadcasts,
-            "success": f"Рассылка #{broadcast.id} запущена",
-            "error": None,
-        },
+    launcher = request.app.state.launcher
+    if launcher is not None:
+        launcher.wake()
+    return RedirectResponse(url=f"/admin/broadcast?recall_queued={broadcast_id}", status_code=303)
+
+
+_CONTROL_MESSAGES = {
+    "paused": "Рассылка #{} приостановлена",
+    "pending": "Рассылка #{} возобновлена",
+    "cancelled": "Рассылка #{} отменена",
+}
+
+
+@router.post("/broadcast/{broadcast_id}/control")
+async def control_broadcast(
+    request: Request,
+    broadcast_id: int,
+    action: str = Form(...),
+    session: AsyncSession = Depends(get_db),
+    _: str = Depends(require_auth),
+) -> RedirectResponse:
+    if action not in CONTROL_TRANSITIONS:
+        return RedirectResponse(url="/admin/broadcast?error=Неизвестное+действие", status_code=303)
+
+    new_status = await request_broadcast_control(session, broadcast_id, action)
+    if new_status is None:
+        return RedirectResponse(
+            url="/admin/broadcast?error=Действие+недоступно+для+этой+рассылки",
+            status_code=303,
+        )
+
+    if new_status in ("paused", "cancelled"):
+        # Immediate if this worker runs it; otherwise the leader sees the status within seconds
+        supervisor.request_stop(broadcast_id, new_status)
+    else:
+        launcher = request.app.state.launcher
+        if launcher is not None:
+            launcher.wake()
+    message = _CONTROL_MESSAGES[new_status].format(broadcast_id)
+    return RedirectResponse(
+        url=f"/admin/broadcast?{urlencode({'control': message})}", status_code=303
     )
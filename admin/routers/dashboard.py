@@ -3,11 +3,14 @@ from fastapi.responses import HTMLResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from admin.auth import require_auth
+from admin.caching import page_etag
 from core.config import settings as app_settings
+from core.crud.bots import find_bot_id
 from core.crud.channel_events import count_subscribed, count_unsubscribed
 from core.crud.settings import get_setting
+from core.crud.user_archive import count_archived
 from core.crud.users import count_blocked, count_users
-from core.database import get_db
+from core.database import get_read_db
 
 router = APIRouter()
 
@@ -15,15 +18,19 @@ router = APIRouter()
 @router.get("/", response_class=HTMLResponse)
 async def dashboard(
     request: Request,
-    session: AsyncSession = Depends(get_db),
+    _cache: None = Depends(page_etag("users", "users_archive", "settings", "bots")),
+    session: AsyncSession = Depends(get_read_db),
     username: str = Depends(require_auth),
 ) -> HTMLResponse:
     bot_token = await get_setting(session, "bot_token") or app_settings.bot_token or None
+    bot_id = await find_bot_id(session, bot_token)
 
-    total_users = await count_users(session, bot_token=bot_token)
-    subscribed = await count_subscribed(session, bot_token=bot_token)
-    unsubscribed = await count_unsubscribed(session, bot_token=bot_token)
-    blocked = await count_blocked(session, bot_token=bot_token)
+    subscribed = await count_subscribed(session, bot_id=bot_id)
+    unsubscribed = await count_unsubscribed(session, bot_id=bot_id)
+    # Long-blocked users live in users_archive but still count as started/blocked
+    archived = await count_archived(session, bot_id=bot_id)
+    total_users = await count_users(session, bot_id=bot_id) + archived
+    blocked = await count_blocked(session, bot_id=bot_id) + archived
 
     return request.app.state.templates.TemplateResponse(
         "dashboard.html",
@@ -7,9 +7,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from admin.auth import require_auth
 from core.config import settings as app_settings
+from core.crud.bots import find_bot_id, get_bots
 from core.crud.settings import get_setting
 from core.crud.users import get_users_paginated
-from core.database import get_db
+from core.database import get_bulk_read_db
 
 router = APIRouter()
 
@@ -17,15 +18,20 @@ router = APIRouter()
 @router.get("/export/users.csv")
 async def export_users(
     request: Request,
-    session: AsyncSession = Depends(get_db),
+    session: AsyncSession = Depends(get_bulk_read_db),
     username: str = Depends(require_auth),
 ) -> StreamingResponse:
     bot_token = await get_setting(session, "bot_token") or app_settings.bot_token or None
-    users, total = await get_users_paginated(session, offset=0, limit=100_000, bot_token=bot_token)
+    bot_id = await find_bot_id(session, bot_token)
+    users, total = await get_users_paginated(session, offset=0, limit=100_000, bot_id=bot_id)
+    bots = await get_bots(session)
 
     output = io.StringIO()
     writer = csv.writer(output)
-    writer.writerow(["telegram_id", "username", "first_name", "last_name", "joined_at", "is_blocked", "bot_token"])
+    writer.writerow([
+        "telegram_id", "username", "first_name", "last_name", "joined_at",
+        "is_blocked", "telegram_bot_id", "block_reason", "last_seen_at",
+    ])
 
     for user in users:
         writer.writerow([
@@ -35,7 +41,9 @@ async def export_users(
             user.last_name or "",
             user.joined_at.isoformat() if user.joined_at else "",
             user.is_blocked,
-            user.bot_token or "",
+            bots[user.bot_id].telegram_bot_id or "",
+            user.block_reason or "",
+            user.last_seen_at.isoformat() if user.last_seen_at else "",
         ])
 
     output.seek(0)
@@ -1,10 +1,14 @@
-import bcrypt
-
 from fastapi import APIRouter, Depends, Form, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from admin.auth import get_admin_password_hash, require_auth, verify_password
+from admin.auth import (
+    get_admin_password_hash,
+    hash_password,
+    invalidate_password_hash,
+    require_auth,
+    verify_password,
+)
 from core.crud.settings import get_all_settings, get_setting, set_setting
 from core.database import get_db
 
@@ -102,13 +106,14 @@ async def change_password(
             status_code=302,
         )
     current_hash = await get_admin_password_hash(session)
-    if not current_hash or not verify_password(current_password, current_hash):
+    if not current_hash or not await verify_password(current_password, current_hash):
         return RedirectResponse(
             url="/admin/settings?pw_error=Неверный+текущий+пароль",
             status_code=302,
         )
-    new_hash = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt(rounds=12)).decode()
+    new_hash = await hash_password(new_password)
     await set_setting(session, "admin_password_hash", new_hash)
+    invalidate_password_hash()
     return RedirectResponse(
         url="/admin/settings?pw_success=1",
         status_code=302,
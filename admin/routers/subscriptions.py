@@ -3,8 +3,9 @@ from fastapi.responses import HTMLResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from admin.auth import require_auth
+from admin.caching import page_etag
 from core.crud.channel_events import get_events_paginated
-from core.database import get_db
+from core.database import get_read_db
 
 router = APIRouter()
 
@@ -15,7 +16,8 @@ PAGE_SIZE = 50
 async def subscriptions_list(
     request: Request,
     page: int = 1,
-    session: AsyncSession = Depends(get_db),
+    _cache: None = Depends(page_etag("channel_events", "users")),
+    session: AsyncSession = Depends(get_read_db),
     username: str = Depends(require_auth),
 ) -> HTMLResponse:
     offset = (page - 1) * PAGE_SIZE
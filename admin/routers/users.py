@@ -1,19 +1,60 @@
+import csv
+import io
+import re
+
 from aiogram import Bot
 from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
 from aiogram.types import BufferedInputFile
 from fastapi import APIRouter, Depends, File, Form, Request, UploadFile, status
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from admin.auth import require_auth
+from admin.caching import page_etag
+from bot.middlewares.scheduler import Priority, request_priority
 from core.config import settings as app_settings
+from core.crud.bots import find_bot_id, get_bot_id, get_bots
+from core.crud.bulk_jobs import get_bulk_job, get_bulk_job_results
 from core.crud.settings import get_setting
-from core.crud.users import get_user, get_users_paginated, mark_user_blocked, mark_user_unblocked
-from core.database import get_db
+from core.crud.users import (
+    get_user,
+    get_users_paginated,
+    import_users,
+    mark_user_blocked,
+    mark_user_unblocked,
+    search_users,
+    set_users_blocked,
+)
+from core.database import get_db, get_read_db
 
 router = APIRouter()
 
 PAGE_SIZE = 50
+SEARCH_LIMIT = 20
+SEARCH_MAX_LENGTH = 64
+MAX_BULK_IDS = 50_000
+BULK_PAGE_SIZE = 500  # result rows per bulk job page
+BLOCK_REASONS = {
+    "deactivated": "Аккаунт удалён",
+    "forbidden": "Нет доступа к чату",
+    "chat_not_found": "Чат не найден",
+    "admin": "Вручную",
+}
+
+
+# The write paths register the configured bot; without a token they'd register an empty one
+NO_BOT_URL = "/admin/users?error=Сначала+укажите+токен+бота+в+настройках"
+
+
+def _parse_ids(raw: str) -> list[int]:
+    ids = [int(token) for token in re.split(r"[\s,;]+", raw) if token.isdigit()]
+    return list(dict.fromkeys(ids))
+
+
+async def _read_upload(upload: UploadFile | None) -> str:
+    if upload is None or not upload.filename:
+        return ""
+    return (await upload.read()).decode("utf-8-sig", errors="ignore")
 
 
 @router.get("/users", response_class=HTMLResponse)
@@ -21,15 +62,19 @@ async def users_list(
     request: Request,
     page: int = 1,
     status: str | None = None,
-    session: AsyncSession = Depends(get_db),
+    imported: int | None = None,
+    error: str | None = None,
+    _cache: None = Depends(page_etag("users", "settings", "bots")),
+    session: AsyncSession = Depends(get_read_db),
     username: str = Depends(require_auth),
 ) -> HTMLResponse:
     if status not in ("active", "blocked"):
         status = None
     offset = (page - 1) * PAGE_SIZE
     bot_token = await get_setting(session, "bot_token") or app_settings.bot_token or None
+    bot_id = await find_bot_id(session, bot_token)
     users, total = await get_users_paginated(
-        session, offset=offset, limit=PAGE_SIZE, bot_token=bot_token, status=status
+        session, offset=offset, limit=PAGE_SIZE, bot_id=bot_id, status=status
     )
     total_pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
 
@@ -43,40 +88,76 @@ async def users_list(
             "total_pages": total_pages,
             "total": total,
             "status_filter": status,
+            "imported": imported,
+            "error": error,
+            "block_reasons": BLOCK_REASONS,
+            "bots": await get_bots(session),
         },
     )
 
 
+@router.get("/users/search")
+async def users_search(
+    q: str = "",
+    session: AsyncSession = Depends(get_read_db),
+    username: str = Depends(require_auth),
+) -> JSONResponse:
+    bot_token = await get_setting(session, "bot_token") or app_settings.bot_token or None
+    bot_id = await find_bot_id(session, bot_token)
+    users = await search_users(session, q[:SEARCH_MAX_LENGTH], bot_id=bot_id, limit=SEARCH_LIMIT)
+    return JSONResponse({
+        "limit": SEARCH_LIMIT,
+        "results": [
+            {
+                "telegram_id": user.telegram_id,
+                "bot_id": user.bot_id,
+                "username": user.username,
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+                "joined_at": user.joined_at.strftime("%d.%m.%Y %H:%M") if user.joined_at else None,
+                "last_seen_at": (
+                    user.last_seen_at.strftime("%d.%m.%Y %H:%M") if user.last_seen_at else None
+                ),
+                "is_blocked": user.is_blocked,
+            }
+            for user in users
+        ],
+    })
+
+
 @router.post("/users/{user_id}/toggle-block")
 async def toggle_user_block(
     request: Request,
     user_id: int,
-    bot_token: str,
+    bot_id: int,
     page: int = 1,
     status_filter: str | None = None,
     session: AsyncSession = Depends(get_db),
     username: str = Depends(require_auth),
 ) -> RedirectResponse:
-    user = await get_user(session, user_id, bot_token)
+    user = await get_user(session, user_id, bot_id)
     if user is not None:
         bot: Bot = request.app.state.bot
         channel_id_str = await get_setting(session, "channel_id")
         channel_id = int(channel_id_str) if channel_id_str else None
 
-        if user.is_blocked:
-            await mark_user_unblocked(session, user_id, bot_token)
-            if channel_id:
-                try:
-                    await bot.unban_chat_member(chat_id=channel_id, user_id=user_id, only_if_banned=True)
-                except Exception:
-                    pass
-        else:
-            await mark_user_blocked(session, user_id, bot_token)
-            if channel_id:
-                try:
-                    await bot.ban_chat_member(chat_id=channel_id, user_id=user_id)
-                except Exception:
-                    pass
+        with request_priority(Priority.ADMIN):
+            if user.is_blocked:
+                await mark_user_unblocked(session, user_id, bot_id)
+                if channel_id:
+                    try:
+                        await bot.unban_chat_member(
+                            chat_id=channel_id, user_id=user_id, only_if_banned=True
+                        )
+                    except Exception:
+                        pass
+            else:
+                await mark_user_blocked(session, user_id, bot_id, reason="admin")
+                if channel_id:
+                    try:
+                        await bot.ban_chat_member(chat_id=channel_id, user_id=user_id)
+                    except Exception:
+                        pass
 
     redirect_url = f"/admin/users?page={page}"
     if status_filter:
@@ -84,15 +165,159 @@ async def toggle_user_block(
     return RedirectResponse(url=redirect_url, status_code=303)
 
 
+@router.post("/users/bulk-block")
+async def bulk_block_users(
+    request: Request,
+    action: str = Form(...),
+    ids: str = Form(default=""),
+    file: UploadFile = File(default=None),
+    session: AsyncSession = Depends(get_db),
+    username: str = Depends(require_auth),
+) -> RedirectResponse:
+    if action not in ("block", "unblock"):
+        return RedirectResponse(url="/admin/users", status_code=303)
+
+    # IDs from the textarea plus the first column of an optional CSV
+    raw = ids + "\n" + "\n".join(
+        row[0] for row in csv.reader(io.StringIO(await _read_upload(file))) if row
+    )
+    telegram_ids = _parse_ids(raw)[:MAX_BULK_IDS]
+    if not telegram_ids:
+        return RedirectResponse(url="/admin/users", status_code=303)
+
+    bot_token = await get_setting(session, "bot_token") or app_settings.bot_token
+    if not bot_token:
+        return RedirectResponse(url=NO_BOT_URL, status_code=303)
+    bot_id = await get_bot_id(session, bot_token)
+    changed = await set_users_blocked(
+        session, telegram_ids, bot_id, blocked=action == "block", reason="admin"
+    )
+
+    channel_id_str = await get_setting(session, "channel_id")
+    channel_id = int(channel_id_str) if channel_id_str else None
+    # Bulk jobs are rare: their executor is imported on first use, not at startup
+    from bot.tasks.bulk_users import start_bulk_job
+
+    job_id = await start_bulk_job(request.app.state.bot, channel_id, action, telegram_ids, changed)
+    return RedirectResponse(url=f"/admin/users/bulk/{job_id}", status_code=303)
+
+
+@router.get("/users/bulk/{job_id}")
+async def bulk_job_status(
+    request: Request,
+    job_id: str,
+    page: int = 1,
+    format: str | None = None,
+    session: AsyncSession = Depends(get_db),
+    username: str = Depends(require_auth),
+) -> Response:
+    job = await get_bulk_job(session, job_id)
+    if job is None:
+        return HTMLResponse("Задача не найдена", status_code=404)
+
+    if format == "json":
+        from bot.tasks.bulk_users import db_result
+
+        changed = set(job.changed_ids)
+        # IDs still waiting for their channel action show the DB result only
+        results = {
+            telegram_id: db_result(telegram_id, changed) for telegram_id in job.telegram_ids
+        }
+        results.update(await get_bulk_job_results(session, job_id))
+        return JSONResponse({
+            "id": job.id,
+            "action": job.action,
+            "total": job.total,
+            "done": job.done,
+            "failed": job.failed,
+            "finished": job.finished,
+            "results": {str(telegram_id): result for telegram_id, result in results.items()},
+        })
+
+    # Finished IDs in completion order, a page at a time; the page polls for the rest
+    total_pages = max((job.total + BULK_PAGE_SIZE - 1) // BULK_PAGE_SIZE, 1)
+    page = min(max(page, 1), total_pages)
+    start = (page - 1) * BULK_PAGE_SIZE
+    rows = await get_bulk_job_results(session, job_id, start, BULK_PAGE_SIZE)
+    return request.app.state.templates.TemplateResponse(
+        "bulk_job.html",
+        {
+            "request": request,
+            "username": username,
+            "job": job,
+            "rows": rows,
+            "offset": start + len(rows),
+            "page_end": start + BULK_PAGE_SIZE,
+            "page": page,
+            "total_pages": total_pages,
+        },
+    )
+
+
+@router.get("/users/bulk/{job_id}/progress", response_class=HTMLResponse)
+async def bulk_job_progress(
+    request: Request,
+    job_id: str,
+    offset: int = 0,
+    limit: int = BULK_PAGE_SIZE,
+    session: AsyncSession = Depends(get_db),
+    _: str = Depends(require_auth),
+) -> HTMLResponse:
+    """Stats and up to ``limit`` rows finished since ``offset``, polled by bulk_job.html."""
+    job = await get_bulk_job(session, job_id)
+    if job is None:
+        return HTMLResponse("Задача не найдена", status_code=404)
+    offset = max(offset, 0)
+    limit = min(max(limit, 0), BULK_PAGE_SIZE)
+    changed = await get_bulk_job_results(session, job_id, offset, limit) if limit else []
+    return request.app.state.templates.TemplateResponse(
+        "partials/bulk_job_progress.html",
+        {
+            "request": request,
+            "job": job,
+            "changed": changed,
+            "next_offset": offset + len(changed),
+        },
+    )
+
+
+@router.post("/users/import")
+async def import_users_csv(
+    request: Request,
+    file: UploadFile = File(...),
+    session: AsyncSession = Depends(get_db),
+    username: str = Depends(require_auth),
+) -> RedirectResponse:
+    # Same columns as /admin/export/users.csv; extra columns are ignored
+    rows: dict[int, dict] = {}
+    for row in csv.DictReader(io.StringIO(await _read_upload(file))):
+        raw_id = (row.get("telegram_id") or "").strip()
+        if not raw_id.isdigit():
+            continue
+        rows[int(raw_id)] = {
+            "telegram_id": int(raw_id),
+            "username": (row.get("username") or "").strip()[:64] or None,
+            "first_name": (row.get("first_name") or "").strip()[:128] or None,
+            "last_name": (row.get("last_name") or "").strip()[:128] or None,
+        }
+
+    bot_token = await get_setting(session, "bot_token") or app_settings.bot_token
+    if not bot_token:
+        return RedirectResponse(url=NO_BOT_URL, status_code=303)
+    bot_id = await get_bot_id(session, bot_token)
+    imported = await import_users(session, list(rows.values()), bot_id)
+    return RedirectResponse(url=f"/admin/users?imported={imported}", status_code=303)
+
+
 @router.get("/users/{user_id}/message", response_class=HTMLResponse)
 async def user_message_form(
     request: Request,
     user_id: int,
-    bot_token: str,
+    bot_id: int,
     session: AsyncSession = Depends(get_db),
     username: str = Depends(require_auth),
 ) -> HTMLResponse:
-    user = await get_user(session, user_id, bot_token)
+    user = await get_user(session, user_id, bot_id)
     if user is None:
         return HTMLResponse("Пользователь не найден", status_code=404)
 
@@ -112,13 +337,13 @@ async def user_message_form(
 async def send_user_message(
     request: Request,
     user_id: int,
-    bot_token: str,
+    bot_id: int,
     text: str = Form(default=""),
     image: UploadFile = File(default=None),
     session: AsyncSession = Depends(get_db),
     username: str = Depends(require_auth),
 ) -> HTMLResponse:
-    user = await get_user(session, user_id, bot_token)
+    user = await get_user(session, user_id, bot_id)
     if user is None:
         return HTMLResponse("Пользователь не найден", status_code=404)
 
@@ -149,15 +374,18 @@ async def send_user_message(
 
     if not error:
         try:
-            if input_file and text_clean:
-                await bot.send_photo(chat_id=user_id, photo=input_file, caption=text_clean, parse_mode="HTML")
-            elif input_file:
-                await bot.send_photo(chat_id=user_id, photo=input_file)
-            else:
-                await bot.send_message(chat_id=user_id, text=text_clean, parse_mode="HTML")
+            with request_priority(Priority.ADMIN):
+                if input_file and text_clean:
+                    await bot.send_photo(
+                        chat_id=user_id, photo=input_file, caption=text_clean, parse_mode="HTML"
+                    )
+                elif input_file:
+                    await bot.send_photo(chat_id=user_id, photo=input_file)
+                else:
+                    await bot.send_message(chat_id=user_id, text=text_clean, parse_mode="HTML")
             success = "Сообщение успешно отправлено"
         except TelegramForbiddenError:
-            await mark_user_blocked(session, user_id, bot_token)
+            await mark_user_blocked(session, user_id, bot_id)
             error = "Пользователь заблокировал бота"
         except TelegramBadRequest as exc:
             error = f"Ошибка Telegram: {exc.message}"
@@ -9,10 +9,11 @@ from aiogram.types import ChatMemberUpdated
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.crud.bots import get_bot_id
 from core.crud.channel_events import create_event
 from core.crud.users import mark_user_blocked, mark_user_unblocked, set_user_subscribed, upsert_user
 
-router = Router()
+router = Router(name="channel_events")
 
 
 @router.chat_member(ChatMemberUpdatedFilter(IS_NOT_MEMBER >> IS_MEMBER))
@@ -21,30 +22,42 @@ async def on_user_subscribed(event: ChatMemberUpdated, session: AsyncSession) ->
     logger.info(f"User {user.id} subscribed to channel")
 
     # Ensure user exists in DB (they might not have started the bot yet)
+    bot_id = await get_bot_id(session, event.bot.token)
     await upsert_user(
         session,
         telegram_id=user.id,
         username=user.username,
         first_name=user.first_name,
         last_name=user.last_name,
-        bot_token=event.bot.token,
+        bot_id=bot_id,
     )
-    await set_user_subscribed(session, user.id, bot_token=event.bot.token, subscribed=True)
-    await create_event(session, user_id=user.id, event_type="subscribed")
+    await set_user_subscribed(session, user.id, bot_id=bot_id, subscribed=True)
+    await create_event(session, user_id=user.id, event_type="subscribed", bot_id=bot_id)
 
 
 @router.my_chat_member(ChatMemberUpdatedFilter(IS_MEMBER >> KICKED))
 async def on_user_blocked_bot(event: ChatMemberUpdated, session: AsyncSession) -> None:
     user = event.from_user
     logger.info(f"User {user.id} blocked the bot")
-    await mark_user_blocked(session, user.id, bot_token=event.bot.token)
+    await mark_user_blocked(session, user.id, bot_id=await get_bot_id(session, event.bot.token))
 
 
 @router.my_chat_member(ChatMemberUpdatedFilter(KICKED >> IS_MEMBER))
 async def on_user_unblocked_bot(event: ChatMemberUpdated, session: AsyncSession) -> None:
     user = event.from_user
     logger.info(f"User {user.id} unblocked the bot")
-    await mark_user_unblocked(session, user.id, bot_token=event.bot.token)
+
+    # Moves the user back if the maintenance job archived them
+    bot_id = await get_bot_id(session, event.bot.token)
+    await upsert_user(
+        session,
+        telegram_id=user.id,
+        username=user.username,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        bot_id=bot_id,
+    )
+    await mark_user_unblocked(session, user.id, bot_id=bot_id)
 
 
 @router.chat_member(ChatMemberUpdatedFilter(IS_MEMBER >> IS_NOT_MEMBER))
@@ -52,13 +65,14 @@ async def on_user_unsubscribed(event: ChatMemberUpdated, session: AsyncSession)
     user = event.new_chat_member.user
     logger.info(f"User {user.id} unsubscribed from channel")
 
+    bot_id = await get_bot_id(session, event.bot.token)
     await upsert_user(
         session,
         telegram_id=user.id,
         username=user.username,
         first_name=user.first_name,
         last_name=user.last_name,
-        bot_token=event.bot.token,
+        bot_id=bot_id,
     )
-    await set_user_subscribed(session, user.id, bot_token=event.bot.token, subscribed=False)
-    await create_event(session, user_id=user.id, event_type="unsubscribed")
+    await set_user_subscribed(session, user.id, bot_id=bot_id, subscribed=False)
+    await create_event(session, user_id=user.id, event_type="unsubscribed", bot_id=bot_id)
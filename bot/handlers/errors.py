@@ -1,42 +1,96 @@
-from aiogram import Router
-from aiogram.exceptions import TelegramForbiddenError
-from aiogram.types import ErrorEvent
+import time
+from collections import OrderedDict
+
+from aiogram import Bot, Router
+from aiogram.types import ErrorEvent, User
 from loguru import logger
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from core.crud.users import mark_user_blocked
-
-router = Router()
-
-
-@router.errors()
-async def global_error_handler(event: ErrorEvent, session: AsyncSession) -> None:
-    if isinstance(event.exception, TelegramForbiddenError):
-        # Try to extract telegram_id and bot_token from the update
-        update = event.update
-        telegram_id: int | None = None
-        bot_token: str | None = None
-
-        for attr in ("message", "callback_query", "inline_query", "my_chat_member"):
-            obj = getattr(update, attr, None)
-            if obj is None:
-                continue
-            from_user = getattr(obj, "from_user", None)
-            if from_user:
-                telegram_id = from_user.id
-            bot = getattr(obj, "bot", None)
-            if bot:
-                bot_token = bot.token
-            if telegram_id and bot_token:
-                break
-
-        if telegram_id and bot_token:
-            await mark_user_blocked(session, telegram_id, bot_token)
-            logger.info(f"User {telegram_id} blocked the bot — marked as blocked")
-        else:
-            logger.warning(f"TelegramForbiddenError but could not identify user: {event.exception}")
-    else:
-        logger.error(
-            f"Unhandled error: {event.exception}",
-            exc_info=event.exception,
-        )
+
+from bot.tasks.blocked_users import blocked_user_writer
+from bot.tasks.failures import PERMANENT_FAILURES, classify_failure
+from core.metrics import UPDATE_ERRORS
+
+router = Router(name="errors")
+
+ERROR_LOG_WINDOW = 60.0  # seconds; an identical error is logged once per window
+MAX_TRACKED_ERRORS = 500
+
+
+def _error_key(exc: BaseException) -> tuple[str, str, int]:
+    """Errors are identical when they have the same type and raising line."""
+    tb = exc.__traceback__
+    while tb is not None and tb.tb_next is not None:
+        tb = tb.tb_next
+    if tb is None:
+        return type(exc).__qualname__, "", 0
+    return type(exc).__qualname__, tb.tb_frame.f_code.co_filename, tb.tb_lineno
+
+
+class ErrorLog:
+    """
+    Logs each distinct error with its traceback at most once per window.
+
+    Repeats inside the window are only counted; the count goes into the log
+    line of the next occurrence after the window. Keeps at most
+    MAX_TRACKED_ERRORS distinct errors, dropping the least recent.
+    """
+
+    def __init__(self, window: float = ERROR_LOG_WINDOW) -> None:
+        self.window = window
+        # key -> [monotonic time of the last logged occurrence, repeats since]
+        self._seen: OrderedDict[tuple[str, str, int], list] = OrderedDict()
+
+    def record(self, exc: BaseException, message: str) -> None:
+        key = _error_key(exc)
+        now = time.monotonic()
+        entry = self._seen.get(key)
+        if entry is not None and now - entry[0] < self.window:
+            entry[1] += 1
+            return
+        repeats = entry[1] if entry is not None else 0
+        self._seen[key] = [now, 0]
+        self._seen.move_to_end(key)
+        while len(self._seen) > MAX_TRACKED_ERRORS:
+            self._seen.popitem(last=False)
+        if repeats:
+            message += f" (and {repeats} more like it in the previous {self.window:.0f}s)"
+        logger.opt(exception=exc).error(message)
+
+
+error_log = ErrorLog()
+
+
+def _affected_user(event: ErrorEvent, user: User | None) -> int | None:
+    """
+    User whose chat failed, resolved from data already in memory.
+
+    A failed Bot API call names its target: a positive ``chat_id`` is a private
+    chat, i.e. the user; a group or channel means no user is at fault. Errors
+    without a target fall back to the update's user: the member for
+    ``chat_member`` updates, where ``from_user`` may be an admin, and aiogram's
+    ``event_from_user`` for every other update type.
+    """
+    method = getattr(event.exception, "method", None)
+    chat_id = getattr(method, "chat_id", None)
+    if chat_id is not None:
+        return chat_id if isinstance(chat_id, int) and chat_id > 0 else None
+    if event.update.chat_member is not None:
+        return event.update.chat_member.new_chat_member.user.id
+    return user.id if user is not None else None
+
+
+@router.errors(flags={"db": False})
+async def global_error_handler(
+    event: ErrorEvent, bot: Bot, event_from_user: User | None = None
+) -> None:
+    exc = event.exception
+    kind = classify_failure(exc)
+    UPDATE_ERRORS.labels(kind=kind).inc()
+
+    if kind in PERMANENT_FAILURES:
+        telegram_id = _affected_user(event, event_from_user)
+        if telegram_id is not None:
+            # Written in batches by the per-process writer, not here
+            blocked_user_writer.add(bot.token, telegram_id, kind)
+            return
+
+    error_log.record(exc, f"Unhandled error ({kind}) in update {event.update.update_id}: {exc}")
@@ -6,10 +6,11 @@ from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.keyboards.inline import channel_join_keyboard
+from core.crud.bots import get_bot_id
 from core.crud.settings import get_setting
 from core.crud.users import mark_user_unblocked, set_user_subscribed, upsert_user
 
-router = Router()
+router = Router(name="start")
 
 TRACKER_WEBHOOK_URL = "https://thedinator.com/tracker/bot/webhook/oOZ66Ig5/"
 
@@ -40,17 +41,18 @@ async def cmd_start(message: Message, session: AsyncSession) -> None:
     if subscriber_id:
         await _send_tracker_postback(user.id, subscriber_id)
 
+    bot_id = await get_bot_id(session, message.bot.token)
     await upsert_user(
         session,
         telegram_id=user.id,
         username=user.username,
         first_name=user.first_name,
         last_name=user.last_name,
-        bot_token=message.bot.token,
+        bot_id=bot_id,
     )
 
     # If user had blocked the bot before and now writes again — unblock them
-    await mark_user_unblocked(session, user.id, bot_token=message.bot.token)
+    await mark_user_unblocked(session, user.id, bot_id=bot_id)
 
     welcome_text = await get_setting(session, "welcome_message")
     if not welcome_text:
@@ -66,7 +68,7 @@ async def cmd_start(message: Message, session: AsyncSession) -> None:
         try:
             member = await message.bot.get_chat_member(chat_id=channel_id, user_id=user.id)
             is_subscribed = member.status in ("member", "administrator", "creator")
-            await set_user_subscribed(session, user.id, bot_token=message.bot.token, subscribed=is_subscribed)
+            await set_user_subscribed(session, user.id, bot_id=bot_id, subscribed=is_subscribed)
         except Exception as exc:
             logger.warning(f"Could not check membership for user {user.id} in channel {channel_id}: {exc}")
 
@@ -3,12 +3,17 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
 from bot.handlers import channel_events, errors, start
+from bot.middlewares.activity import ActivityMiddleware
 from bot.middlewares.db import DbSessionMiddleware
+from bot.middlewares.metrics import HandlerMetricsMiddleware
+from bot.session import get_bot_session
 
 
 def create_bot(token: str) -> Bot:
+    # All bots of the process share one connection pool (see bot/session.py)
     return Bot(
         token=token,
+        session=get_bot_session(),
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
 
@@ -16,8 +21,18 @@ def create_bot(token: str) -> Bot:
 def create_dispatcher() -> Dispatcher:
     dp = Dispatcher()
 
-    # Register middleware on all update types
-    dp.update.middleware(DbSessionMiddleware())
+    # Outer: sees every update, matched by a handler or not
+    dp.update.outer_middleware(ActivityMiddleware())
+
+    # Inner middlewares run only for a matched handler; registering them on every
+    # dispatcher observer makes all included routers (including errors) inherit them
+    handler_metrics = HandlerMetricsMiddleware()
+    db_session = DbSessionMiddleware()
+    for name, observer in dp.observers.items():
+        if name == "update":
+            continue
+        observer.middleware(handler_metrics)
+        observer.middleware(db_session)
 
     # Register routers
     dp.include_router(start.router)
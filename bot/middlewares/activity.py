@@ -0,0 +1,87 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from typing import Any
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.types import TelegramObject, User
+from loguru import logger
+
+from core.config import settings
+from core.crud.bots import get_bot_id
+from core.crud.users import touch_users
+from core.database import BulkSessionLocal
+
+
+class ActivityTracker:
+    """
+    Last-seen times of users, buffered in memory and written in bulk.
+
+    ``seen()`` only updates a dict keyed by (bot token, telegram_id), so an
+    update costs no query; ``flush()`` writes everything collected since the
+    previous flush with one UPDATE per 10k users. A failed flush keeps its
+    times for the next one; a crash loses at most one flush interval.
+    """
+
+    def __init__(self) -> None:
+        self._dirty: dict[tuple[str, int], datetime] = {}
+
+    def seen(self, token: str, telegram_id: int) -> None:
+        self._dirty[(token, telegram_id)] = datetime.now(timezone.utc)
+
+    async def flush(self) -> int:
+        if not self._dirty:
+            return 0
+        dirty, self._dirty = self._dirty, {}
+        try:
+            async with BulkSessionLocal() as session:
+                bot_ids = {token: await get_bot_id(session, token) for token, _ in dirty}
+                return await touch_users(
+                    session,
+                    [
+                        (telegram_id, bot_ids[token], seen_at)
+                        for (token, telegram_id), seen_at in dirty.items()
+                    ],
+                )
+        except BaseException:
+            # Kept for the next flush; a time recorded meanwhile is newer
+            for key, seen_at in dirty.items():
+                self._dirty.setdefault(key, seen_at)
+            raise
+
+    async def run(self, interval: float = settings.activity_flush_interval) -> None:
+        """Flush every ``interval`` seconds until cancelled, then flush once more."""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.flush()
+                except Exception as exc:
+                    logger.warning(f"Last-seen flush failed: {exc}")
+        finally:
+            try:
+                await self.flush()
+            except Exception as exc:
+                logger.warning(f"Final last-seen flush failed: {exc}")
+
+
+activity_tracker = ActivityTracker()
+
+
+class ActivityMiddleware(BaseMiddleware):
+    """Outer update middleware: marks the sender of every update as seen."""
+
+    def __init__(self, tracker: ActivityTracker = activity_tracker) -> None:
+        self.tracker = tracker
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user: User | None = data.get("event_from_user")
+        bot: Bot | None = data.get("bot")
+        if user is not None and bot is not None and not user.is_bot:
+            self.tracker.seen(bot.token, user.id)
+        return await handler(event, data)
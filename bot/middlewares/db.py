@@ -3,18 +3,56 @@ from collections.abc import Awaitable, Callable
 from typing import Any
 
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
 from aiogram.types import TelegramObject
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from core.database import AsyncSessionLocal
 
 
+class LazySession:
+    """Stands in for an AsyncSession and creates the real one on first use."""
+
+    __slots__ = ("_factory", "_session")
+
+    def __init__(self, factory: async_sessionmaker[AsyncSession]) -> None:
+        self._factory = factory
+        self._session: AsyncSession | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._factory()
+        return getattr(self._session, name)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
 class DbSessionMiddleware(BaseMiddleware):
+    """
+    Inner middleware: runs only after a handler's filters matched.
+
+    Handlers get a lazy ``session`` that checks out a connection on the first
+    query. A handler registered with ``flags={"db": False}`` gets no session.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal):
+        self.session_factory = session_factory
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
         event: TelegramObject,
         data: dict[str, Any],
     ) -> Any:
-        async with AsyncSessionLocal() as session:
-            data["session"] = session
+        if not get_flag(data, "db", default=True):
+            return await handler(event, data)
+
+        session = LazySession(self.session_factory)
+        data["session"] = session
+        try:
             return await handler(event, data)
+        finally:
+            await session.close()
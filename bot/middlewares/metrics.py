@@ -0,0 +1,78 @@
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramConflictError,
+    TelegramEntityTooLarge,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramNotFound,
+    TelegramRetryAfter,
+    TelegramServerError,
+    TelegramUnauthorizedError,
+)
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject
+
+from core.metrics import BOT_API_DURATION, BOT_API_ERRORS, HANDLER_DURATION, HANDLER_ERRORS
+
+_ERROR_CODES: dict[type[Exception], str] = {
+    TelegramBadRequest: "400",
+    TelegramUnauthorizedError: "401",
+    TelegramForbiddenError: "403",
+    TelegramNotFound: "404",
+    TelegramConflictError: "409",
+    TelegramEntityTooLarge: "413",
+    TelegramRetryAfter: "429",
+    TelegramServerError: "5xx",
+    TelegramNetworkError: "network",
+}
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner middleware: measures matched handlers only, labelled by router name."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        router = data.get("event_router")
+        labels = (router.name if router else "unknown", type(event).__name__)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.labels(*labels).inc()
+            raise
+        finally:
+            HANDLER_DURATION.labels(*labels).observe(time.perf_counter() - started)
+
+
+class BotApiMetricsMiddleware(BaseRequestMiddleware):
+    """Session middleware: latency and error codes of every Bot API call."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        name = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as exc:
+            BOT_API_ERRORS.labels(name, _ERROR_CODES.get(type(exc), "other")).inc()
+            raise
+        finally:
+            BOT_API_DURATION.labels(name).observe(time.perf_counter() - started)
@@ -0,0 +1,142 @@
+import asyncio
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from core.config import settings
+from core.metrics import BOT_API_SCHEDULER_WAIT
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # replies to users (handlers)
+    ADMIN = 1  # single messages sent from the admin panel
+    BULK = 2  # broadcasts, recalls, bulk moderation
+    BACKGROUND = 3  # maintenance probes: only what nothing else wants
+
+
+_priority: ContextVar[Priority] = ContextVar("bot_api_priority", default=Priority.INTERACTIVE)
+
+# Not messages: don't count against the send budget. getUpdates is a long poll
+# and must never wait behind a broadcast.
+_UNSCHEDULED_METHODS = {
+    "getUpdates",
+    "getMe",
+    "setWebhook",
+    "deleteWebhook",
+    "getWebhookInfo",
+    "close",
+    "logOut",
+}
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """Run Bot API calls made inside the block (and tasks started from it) at ``priority``."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class OutboundScheduler:
+    """
+    Token bucket shared by all Bot API sends of this process.
+
+    The bucket holds up to one second of tokens. Bulk calls may only use tokens
+    above ``reserve`` of the capacity, so interactive replies always find tokens
+    even while a broadcast runs at full speed. Waiting callers are served in
+    priority order. A 429 pauses admin and bulk traffic for ``retry_after``.
+    """
+
+    def __init__(self, rate: float, reserve: float) -> None:
+        self.configure(rate, reserve)
+        self._paused_until = 0.0
+        self._waiting = {priority: 0 for priority in Priority}
+
+    def configure(self, rate: float, reserve: float) -> None:
+        self.rate = rate
+        self.capacity = rate
+        self._floors = {
+            Priority.INTERACTIVE: 0.0,
+            Priority.ADMIN: 0.0,
+            Priority.BULK: rate * reserve,
+            Priority.BACKGROUND: rate * reserve,
+        }
+        self._tokens = rate
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _higher_waiting(self, priority: Priority) -> bool:
+        return any(self._waiting[p] for p in Priority if p < priority)
+
+    async def acquire(self, priority: Priority) -> None:
+        started = time.monotonic()
+        queued = False
+        try:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                floor = self._floors[priority]
+                paused = priority != Priority.INTERACTIVE and now < self._paused_until
+                if not paused and not self._higher_waiting(priority) and self._tokens - 1 >= floor:
+                    self._tokens -= 1
+                    return
+                if not queued:
+                    self._waiting[priority] += 1
+                    queued = True
+                if paused:
+                    delay = self._paused_until - now
+                else:
+                    delay = max((floor + 1 - self._tokens) / self.rate, 1 / self.rate)
+                await asyncio.sleep(delay)
+        finally:
+            if queued:
+                self._waiting[priority] -= 1
+            BOT_API_SCHEDULER_WAIT.labels(priority.name.lower()).observe(
+                time.monotonic() - started
+            )
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+outbound_scheduler = OutboundScheduler(
+    rate=settings.bot_api_rate, reserve=settings.bot_api_interactive_reserve
+)
+
+
+class OutboundSchedulerMiddleware(BaseRequestMiddleware):
+    """Session middleware: every send waits for a token of its priority class."""
+
+    def __init__(self, scheduler: OutboundScheduler = outbound_scheduler) -> None:
+        self.scheduler = scheduler
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if method.__api_method__ in _UNSCHEDULED_METHODS:
+            return await make_request(bot, method)
+        await self.scheduler.acquire(_priority.get())
+        try:
+            return await make_request(bot, method)
+        except TelegramRetryAfter as exc:
+            self.scheduler.pause(exc.retry_after)
+            raise
@@ -0,0 +1,70 @@
+from typing import Any
+
+import orjson
+from aiogram.client.session.aiohttp import AiohttpSession
+
+from bot.middlewares.metrics import BotApiMetricsMiddleware
+from bot.middlewares.scheduler import OutboundSchedulerMiddleware
+from core.config import settings
+
+
+class PooledAiohttpSession(AiohttpSession):
+    """AiohttpSession with a tunable connection pool and keep-alive."""
+
+    def __init__(
+        self,
+        limit: int,
+        keepalive_timeout: float,
+        ttl_dns_cache: int,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(limit=limit, **kwargs)
+        self._connector_init.update(
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=ttl_dns_cache,
+        )
+
+
+def _orjson_dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
+def create_bot_session() -> PooledAiohttpSession:
+    """Build a Bot API session from settings (without middlewares)."""
+    kwargs: dict[str, Any] = {}
+    if settings.bot_api_fast_json:
+        kwargs.update(json_loads=orjson.loads, json_dumps=_orjson_dumps)
+    return PooledAiohttpSession(
+        limit=settings.bot_api_pool_size,
+        keepalive_timeout=settings.bot_api_keepalive,
+        ttl_dns_cache=settings.bot_api_dns_ttl,
+        timeout=settings.bot_api_timeout,
+        **kwargs,
+    )
+
+
+_shared_session: PooledAiohttpSession | None = None
+
+
+def get_bot_session() -> PooledAiohttpSession:
+    """
+    Process-wide Bot API session shared by every Bot instance.
+
+    Connections and the DNS cache don't depend on the token, so a token change
+    reuses the pool instead of reconnecting. Request middlewares live on the
+    session and are registered once here.
+    """
+    global _shared_session
+    if _shared_session is None:
+        _shared_session = create_bot_session()
+        # Outermost first: scheduler wait is not counted as Bot API latency
+        _shared_session.middleware(OutboundSchedulerMiddleware())
+        _shared_session.middleware(BotApiMetricsMiddleware())
+    return _shared_session
+
+
+async def close_bot_session() -> None:
+    global _shared_session
+    if _shared_session is not None:
+        await _shared_session.close()
+        _shared_session = None
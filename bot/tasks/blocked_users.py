@@ -0,0 +1,66 @@
+import asyncio
+from collections import defaultdict
+
+from loguru import logger
+
+from core.crud.bots import get_bot_id
+from core.crud.users import set_users_blocked
+from core.database import BulkSessionLocal
+
+FLUSH_INTERVAL = 2.0  # seconds; how long a user found unreachable may still look active
+
+
+class BlockedUserWriter:
+    """
+    Users found unreachable while handling updates, marked blocked in batches.
+
+    ``add()`` only records the user in memory, so an error storm costs no
+    queries per update; ``flush()`` issues one ``set_users_blocked`` per bot and
+    reason for everything collected since the previous flush. A failed flush
+    keeps its users for the next one.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[tuple[str, str], set[int]] = defaultdict(set)
+
+    def add(self, token: str, telegram_id: int, reason: str) -> None:
+        self._pending[(token, reason)].add(telegram_id)
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, defaultdict(set)
+        changed = 0
+        try:
+            async with BulkSessionLocal() as session:
+                for (token, reason), telegram_ids in pending.items():
+                    bot_id = await get_bot_id(session, token)
+                    changed += len(
+                        await set_users_blocked(session, sorted(telegram_ids), bot_id, True, reason)
+                    )
+        except BaseException:
+            # Retried on the next flush; batches already written are skipped as unchanged
+            for key, telegram_ids in pending.items():
+                self._pending[key] |= telegram_ids
+            raise
+        if changed:
+            logger.info(f"Marked {changed} users blocked after update errors")
+        return changed
+
+    async def run(self, interval: float = FLUSH_INTERVAL) -> None:
+        """Flush every ``interval`` seconds until cancelled, then flush once more."""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.flush()
+                except Exception as exc:
+                    logger.warning(f"Blocked users flush failed: {exc}")
+        finally:
+            try:
+                await self.flush()
+            except Exception as exc:
+                logger.warning(f"Final blocked users flush failed: {exc}")
+
+
+blocked_user_writer = BlockedUserWriter()
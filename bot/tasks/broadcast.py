@@ -1,16 +1,25 @@
-import asyncio
+import time
 
 from aiogram import Bot
-from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
-from aiogram.types import BufferedInputFile
+from aiogram.types import BufferedInputFile, Message
 from loguru import logger
 
-from core.crud.broadcasts import update_broadcast_image_file_id, update_broadcast_stats
-from core.crud.users import get_all_active_users, mark_user_blocked
-from core.database import AsyncSessionLocal
+from bot.middlewares.scheduler import Priority, request_priority
+from bot.tasks.deliveries import DeliveryLog
+from bot.tasks.executor import send_executor
+from bot.tasks.failures import PERMANENT_FAILURES, FailureStats
+from bot.tasks.supervisor import BroadcastJob, BroadcastStopped, finish_job, start_job
+from core.crud.bots import get_bot_id
+from core.crud.broadcasts import (
+    get_broadcast_failures,
+    update_broadcast_image_file_id,
+    update_broadcast_stats,
+)
+from core.crud.users import get_active_user_ids
+from core.database import BulkSessionLocal
+from core.metrics import BROADCAST_MESSAGES, BROADCASTS_RUNNING
 
-BATCH_SIZE = 25
-BATCH_DELAY = 1.0  # seconds between batches
+FAILURES_SAVE_INTERVAL = 2.0  # seconds between writes of blocked chats and the breakdown
 
 
 async def _send_to_user(
@@ -19,24 +28,12 @@ async def _send_to_user(
     text: str | None,
     image_file_id: str | None,
     image_input: BufferedInputFile | None,
-) -> str | None:
-    """Send message to a single user. Returns file_id if photo was sent via BufferedInputFile."""
-    returned_file_id: str | None = None
-
+) -> Message:
+    """Send message to a single user."""
     photo = image_file_id or image_input
-
-    if photo and text:
-        sent = await bot.send_photo(chat_id=chat_id, photo=photo, caption=text)
-        if image_input and sent.photo:
-            returned_file_id = sent.photo[-1].file_id
-    elif photo:
-        sent = await bot.send_photo(chat_id=chat_id, photo=photo)
-        if image_input and sent.photo:
-            returned_file_id = sent.photo[-1].file_id
-    elif text:
-        await bot.send_message(chat_id=chat_id, text=text)
-
-    return returned_file_id
+    if photo:
+        return await bot.send_photo(chat_id=chat_id, photo=photo, caption=text)
+    return await bot.send_message(chat_id=chat_id, text=text)
 
 
 async def run_broadcast(
@@ -46,77 +43,124 @@ async def run_broadcast(
     image_file_id: str | None,
     image_bytes: bytes | None = None,
     image_filename: str | None = None,
-    bot_token: str | None = None,
+    bot_id: int | None = None,
 ) -> None:
     logger.info(f"Starting broadcast {broadcast_id}")
-    total_sent = 0
-    failed = 0
+    BROADCASTS_RUNNING.inc()
+    job = start_job(broadcast_id)
+    try:
+        with request_priority(Priority.BULK):
+            await _run_broadcast(
+                bot, job, text, image_file_id, image_bytes, image_filename, bot_id
+            )
+    except BroadcastStopped as exc:
+        logger.info(f"Broadcast {broadcast_id} stopped: {exc.status}")
+        raise
+    finally:
+        finish_job(broadcast_id)
+        BROADCASTS_RUNNING.dec()
 
-    async with AsyncSessionLocal() as session:
-        users = await get_all_active_users(session, bot_token=bot_token)
 
-    logger.info(f"Broadcast {broadcast_id}: {len(users)} users to notify")
+async def _run_broadcast(
+    bot: Bot,
+    job: BroadcastJob,
+    text: str | None,
+    image_file_id: str | None,
+    image_bytes: bytes | None,
+    image_filename: str | None,
+    bot_id: int | None,
+) -> None:
+    broadcast_id = job.broadcast_id
+    deliveries = await DeliveryLog.load(broadcast_id)
+    # Resumed run: recipients of the previous attempt count as sent and are skipped
+    sent_counter = BROADCAST_MESSAGES.labels("sent")
+
+    async with BulkSessionLocal() as session:
+        if bot_id is None:
+            bot_id = await get_bot_id(session, bot.token)
+        audience = await get_active_user_ids(session, bot_id)
+        failures = FailureStats.from_dict(await get_broadcast_failures(session, broadcast_id))
+
+    logger.info(
+        f"Broadcast {broadcast_id}: {len(audience)} users, {deliveries.count} already delivered"
+    )
 
     # Prepare BufferedInputFile once if we have raw bytes but no file_id yet
     image_input: BufferedInputFile | None = None
     if image_bytes and not image_file_id:
         image_input = BufferedInputFile(image_bytes, filename=image_filename or "image.jpg")
 
-    for i, user in enumerate(users):
-        # After first successful photo send we get a file_id and reuse it
-        current_input = image_input if not image_file_id else None
-
-        try:
-            new_file_id = await _send_to_user(
-                bot=bot,
-                chat_id=user.telegram_id,
-                text=text,
-                image_file_id=image_file_id,
-                image_input=current_input,
+    pending = (chat_id for chat_id in audience if chat_id not in deliveries)
+    failures_saved_at = time.monotonic()
+
+    async def save_failures() -> None:
+        # The breakdown as it was before the flush, so every permanent failure it
+        # counts is blocked already and a resumed run doesn't retry and count it again
+        failure_stats = failures.as_dict()
+        failed = failures.total
+        await failures.flush()
+        async with BulkSessionLocal() as session:
+            await update_broadcast_stats(
+                session, broadcast_id, deliveries.count, failed, failure_stats
             )
-            if new_file_id and not image_file_id:
-                image_file_id = new_file_id
+
+    async def send(chat_id: int) -> Message:
+        return await _send_to_user(
+            bot=bot,
+            chat_id=chat_id,
+            text=text,
+            image_file_id=image_file_id,
+            image_input=image_input if not image_file_id else None,
+        )
+
+    async def on_result(chat_id: int, outcome: Message | Exception) -> None:
+        nonlocal image_file_id, image_input, failures_saved_at
+        if isinstance(outcome, Exception):
+            kind = failures.record(chat_id, bot_id, outcome)
+            if kind in PERMANENT_FAILURES:
+                logger.info(f"User {chat_id} unreachable ({kind}), marking as blocked")
+            else:
+                logger.error(f"Failed to send to {chat_id} ({kind}): {outcome}")
+            BROADCAST_MESSAGES.labels(kind).inc()
+        else:
+            deliveries.record(chat_id, outcome.message_id)
+            # Stored before this worker sends again: a killed run only repeats sends in flight
+            await deliveries.flush()
+            if image_input is not None and outcome.photo:
+                image_file_id = outcome.photo[-1].file_id
                 image_input = None  # no longer needed
-                async with AsyncSessionLocal() as session:
+                async with BulkSessionLocal() as session:
                     await update_broadcast_image_file_id(session, broadcast_id, image_file_id)
                 logger.info(f"Broadcast {broadcast_id}: got file_id from first send")
-            total_sent += 1
-        except TelegramForbiddenError:
-            logger.info(f"User {user.telegram_id} blocked the bot, marking as blocked")
-            async with AsyncSessionLocal() as session:
-                await mark_user_blocked(session, user.telegram_id, user.bot_token)
-            failed += 1
-        except TelegramRetryAfter as exc:
-            logger.warning(f"Rate limited, sleeping {exc.retry_after}s")
-            await asyncio.sleep(exc.retry_after)
-            # Retry this user
+            sent_counter.inc()
+        now = time.monotonic()
+        if now - failures_saved_at >= FAILURES_SAVE_INTERVAL:
+            failures_saved_at = now
+            await save_failures()
+        # Raises BroadcastStopped on pause/cancel: the executor starts no new sends
+        await job.checkpoint(deliveries.count, failures.total)
+
+    # Same engine as recalls. A 429 pauses every worker and retries the send: the
+    # message was not sent, so that can't duplicate it. Network errors are ambiguous
+    # and are not retried.
+    executor = send_executor()
+    try:
+        # Upload the image with one send at a time until a file_id comes back
+        while image_input is not None and not image_file_id:
+            chat_id = next(pending, None)
+            if chat_id is None:
+                break
             try:
-                new_file_id = await _send_to_user(
-                    bot=bot,
-                    chat_id=user.telegram_id,
-                    text=text,
-                    image_file_id=image_file_id,
-                    image_input=current_input,
-                )
-                if new_file_id and not image_file_id:
-                    image_file_id = new_file_id
-                    image_input = None
-                    async with AsyncSessionLocal() as session:
-                        await update_broadcast_image_file_id(session, broadcast_id, image_file_id)
-                total_sent += 1
-            except Exception as retry_exc:
-                logger.error(f"Retry failed for user {user.telegram_id}: {retry_exc}")
-                failed += 1
-        except Exception as exc:
-            logger.error(f"Failed to send to {user.telegram_id}: {exc}")
-            failed += 1
-
-        # Rate limiting: sleep between batches
-        if (i + 1) % BATCH_SIZE == 0:
-            await asyncio.sleep(BATCH_DELAY)
-
-    # Update broadcast stats
-    async with AsyncSessionLocal() as session:
-        await update_broadcast_stats(session, broadcast_id, total_sent, failed)
-
-    logger.info(f"Broadcast {broadcast_id} complete: sent={total_sent}, failed={failed}")
+                outcome: Message | Exception = await executor.call(send, chat_id)
+            except Exception as exc:
+                outcome = exc
+            await on_result(chat_id, outcome)
+        await executor.run(pending, send, on_result)
+    finally:
+        # Also on pause/cancel/shutdown, so a resumed run skips everyone reached so far
+        await deliveries.flush()
+        await save_failures()
+
+    logger.info(
+        f"Broadcast {broadcast_id} complete: sent={deliveries.count}, failed={failures.total}"
+    )
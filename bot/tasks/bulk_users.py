@@ -0,0 +1,125 @@
+import asyncio
+import time
+import uuid
+
+from aiogram import Bot
+from loguru import logger
+
+from bot.middlewares.scheduler import Priority, request_priority
+from bot.tasks.executor import RateLimitedExecutor
+from core.crud.bulk_jobs import add_bulk_job_results, create_bulk_job
+from core.database import BulkSessionLocal
+
+CHANNEL_RATE = 20.0  # ban/unban calls per second
+CHANNEL_CONCURRENCY = 10
+MAX_KEPT_JOBS = 50
+FLUSH_INTERVAL = 1.0  # seconds; how stale the job page may be
+
+# Running jobs, referenced so their tasks are not garbage collected
+_tasks: set[asyncio.Task] = set()
+
+
+def db_result(telegram_id: int, changed: set[int]) -> str:
+    return "db: updated" if telegram_id in changed else "db: unchanged"
+
+
+class BulkUserJob:
+    """
+    Progress of a job running in this process.
+
+    Finished IDs are buffered and written as one bulk_job_results row per
+    ``flush()``, at most every FLUSH_INTERVAL, together with the counters.
+    """
+
+    def __init__(self, job_id: str, action: str, total: int, changed: set[int]) -> None:
+        self.id = job_id
+        self.action = action
+        self.total = total
+        self.changed = changed
+        self.done = 0
+        self.failed = 0
+        self._telegram_ids: list[int] = []
+        self._results: list[str] = []
+        self._position = 0
+        self._flushed_at = time.monotonic()
+        # Batches must land in completion order: a poll reads them by position
+        self._lock = asyncio.Lock()
+
+    def record(self, telegram_id: int, channel_result: str, ok: bool) -> None:
+        self.done += 1
+        if not ok:
+            self.failed += 1
+        self._telegram_ids.append(telegram_id)
+        self._results.append(f"{db_result(telegram_id, self.changed)}, channel: {channel_result}")
+
+    async def flush(self, finished: bool = False) -> None:
+        async with self._lock:
+            telegram_ids, self._telegram_ids = self._telegram_ids, []
+            results, self._results = self._results, []
+            position = self._position
+            self._position += len(telegram_ids)
+            self._flushed_at = time.monotonic()
+            async with BulkSessionLocal() as session:
+                await add_bulk_job_results(
+                    session, self.id, position, telegram_ids, results,
+                    self.done, self.failed, finished,
+                )
+
+    async def maybe_flush(self) -> None:
+        if time.monotonic() - self._flushed_at >= FLUSH_INTERVAL:
+            await self.flush()
+
+
+async def _apply_channel_action(
+    job: BulkUserJob, bot: Bot | None, channel_id: int | None, telegram_ids: list[int]
+) -> None:
+    try:
+        if bot is None or not channel_id:
+            for telegram_id in telegram_ids:
+                job.record(telegram_id, "skipped", ok=True)
+            return
+
+        async def call(telegram_id: int) -> bool:
+            if job.action == "block":
+                return await bot.ban_chat_member(chat_id=channel_id, user_id=telegram_id)
+            return await bot.unban_chat_member(
+                chat_id=channel_id, user_id=telegram_id, only_if_banned=True
+            )
+
+        async def on_result(telegram_id: int, outcome: bool | Exception) -> None:
+            if isinstance(outcome, Exception):
+                job.record(telegram_id, str(outcome), ok=False)
+            else:
+                job.record(telegram_id, "ok", ok=True)
+            await job.maybe_flush()
+
+        executor = RateLimitedExecutor(rate=CHANNEL_RATE, concurrency=CHANNEL_CONCURRENCY)
+        with request_priority(Priority.BULK):
+            await executor.run(telegram_ids, call, on_result)
+    finally:
+        await job.flush(finished=True)
+    logger.info(
+        f"Bulk {job.action} job {job.id}: {job.done}/{job.total} processed, "
+        f"{job.failed} channel errors"
+    )
+
+
+async def start_bulk_job(
+    bot: Bot | None,
+    channel_id: int | None,
+    action: str,
+    telegram_ids: list[int],
+    changed_ids: list[int],
+) -> str:
+    """
+    Store the job with its DB results and apply channel ban/unban for every ID
+    in the background. Returns the job ID.
+    """
+    job_id = uuid.uuid4().hex[:12]
+    async with BulkSessionLocal() as session:
+        await create_bulk_job(session, job_id, action, telegram_ids, changed_ids, MAX_KEPT_JOBS)
+    job = BulkUserJob(job_id, action, len(telegram_ids), set(changed_ids))
+    task = asyncio.create_task(_apply_channel_action(job, bot, channel_id, telegram_ids))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job_id
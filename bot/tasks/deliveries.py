@@ -0,0 +1,56 @@
+import asyncio
+from array import array
+from bisect import bisect_left
+
+from core.crud.broadcast_deliveries import add_deliveries, get_delivered_chat_ids
+from core.database import BulkSessionLocal
+
+
+class DeliveryLog:
+    """
+    Who already received a broadcast.
+
+    Earlier deliveries are loaded once per run into a sorted array('q') (8 bytes per
+    recipient) and checked with a binary search, so skipping them costs no queries.
+    A sender calls ``flush()`` right after ``record()``: everything recorded since
+    the last write goes out as one array row, so concurrent senders share writes
+    and a killed run leaves no delivered message unrecorded except those in flight.
+    """
+
+    def __init__(self, broadcast_id: int, delivered: array) -> None:
+        self.broadcast_id = broadcast_id
+        self._delivered = delivered
+        self._chat_ids: list[int] = []
+        self._message_ids: list[int] = []
+        self._lock = asyncio.Lock()
+        self.count = len(delivered)
+
+    @classmethod
+    async def load(cls, broadcast_id: int) -> "DeliveryLog":
+        async with BulkSessionLocal() as session:
+            delivered = await get_delivered_chat_ids(session, broadcast_id)
+        return cls(broadcast_id, delivered)
+
+    def __contains__(self, chat_id: int) -> bool:
+        index = bisect_left(self._delivered, chat_id)
+        return index < len(self._delivered) and self._delivered[index] == chat_id
+
+    def record(self, chat_id: int, message_id: int) -> None:
+        self._chat_ids.append(chat_id)
+        self._message_ids.append(message_id)
+        self.count += 1
+
+    async def flush(self) -> None:
+        # One write at a time: deliveries recorded meanwhile go out together with the next
+        async with self._lock:
+            if not self._chat_ids:
+                return
+            chat_ids, self._chat_ids = self._chat_ids, []
+            message_ids, self._message_ids = self._message_ids, []
+            try:
+                async with BulkSessionLocal() as session:
+                    await add_deliveries(session, self.broadcast_id, chat_ids, message_ids)
+            except BaseException:
+                self._chat_ids[:0] = chat_ids
+                self._message_ids[:0] = message_ids
+                raise
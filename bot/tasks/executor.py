@@ -0,0 +1,98 @@
+import asyncio
+import math
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any, TypeVar
+
+from aiogram.exceptions import TelegramRetryAfter
+from loguru import logger
+
+from core.config import settings
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class RateLimitedExecutor:
+    """
+    Runs Bot API calls concurrently while keeping the overall rate under ``rate`` per second.
+
+    A TelegramRetryAfter pauses all workers for the requested time and the call is retried.
+    """
+
+    def __init__(self, rate: float = 25.0, concurrency: int = 10, max_retries: int = 3) -> None:
+        self.interval = 1.0 / rate
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _wait_for_slot(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot, self._paused_until)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def call(self, func: Callable[..., Awaitable[R]], *args: Any) -> R:
+        retries = 0
+        while True:
+            await self._wait_for_slot()
+            try:
+                return await func(*args)
+            except TelegramRetryAfter as exc:
+                retries += 1
+                if retries > self.max_retries:
+                    raise
+                logger.warning(f"Rate limited, pausing for {exc.retry_after}s")
+                self._paused_until = max(self._paused_until, time.monotonic() + exc.retry_after)
+
+    async def run(
+        self,
+        items: Iterable[T],
+        func: Callable[[T], Awaitable[R]],
+        on_result: Callable[[T, R | Exception], Awaitable[None] | None] | None = None,
+    ) -> None:
+        """
+        Call ``func`` for every item; ``on_result`` gets the return value or the exception.
+
+        If ``on_result`` raises, no new calls start: the calls in flight finish and
+        are reported, then the first exception is re-raised.
+        """
+        iterator = iter(items)
+        error: Exception | None = None
+
+        async def worker() -> None:
+            nonlocal error
+            for item in iterator:
+                if error is not None:
+                    return
+                try:
+                    outcome: R | Exception = await self.call(func, item)
+                except Exception as exc:
+                    outcome = exc
+                if on_result is not None:
+                    try:
+                        maybe_awaitable = on_result(item, outcome)
+                        if maybe_awaitable is not None:
+                            await maybe_awaitable
+                    except Exception as exc:
+                        if error is None:
+                            error = exc
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        if error is not None:
+            raise error
+
+
+# Broadcasts and recalls: the process's Bot API budget, which the outbound scheduler
+# trims by the interactive reserve, with enough workers for calls of ~300 ms
+SEND_RATE = settings.bot_api_rate
+SEND_CONCURRENCY = max(10, math.ceil(SEND_RATE * 0.3))
+
+
+def send_executor() -> RateLimitedExecutor:
+    """The engine shared by broadcasts and recalls."""
+    return RateLimitedExecutor(rate=SEND_RATE, concurrency=SEND_CONCURRENCY)
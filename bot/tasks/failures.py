@@ -0,0 +1,114 @@
+import asyncio
+import random
+from collections import Counter, defaultdict
+
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+
+from core.crud.users import set_users_blocked
+from core.database import BulkSessionLocal
+
+# Chats that will never accept a message again: marked blocked with this reason
+PERMANENT_FAILURES = {"blocked", "deactivated", "forbidden", "chat_not_found"}
+SAMPLES_PER_KIND = 5
+SAMPLE_ERROR_LENGTH = 200
+
+
+def classify_failure(exc: Exception) -> str:
+    """Map a Bot API exception to a failure kind stored in the broadcast breakdown."""
+    message = str(exc).lower()
+    if isinstance(exc, TelegramForbiddenError):
+        if "blocked" in message:
+            return "blocked"
+        if "deactivated" in message:
+            return "deactivated"
+        return "forbidden"
+    if isinstance(exc, TelegramBadRequest):
+        if any(text in message for text in ("chat not found", "peer_id_invalid", "user not found")):
+            return "chat_not_found"
+        if "can't parse entities" in message:
+            return "parse_error"
+        return "bad_request"
+    if isinstance(exc, TelegramRetryAfter):
+        return "rate_limited"
+    if isinstance(exc, (TelegramNetworkError, asyncio.TimeoutError)):
+        return "network"
+    if isinstance(exc, TelegramServerError):
+        return "server"
+    return "other"
+
+
+class FailureStats:
+    """
+    Failure breakdown of one broadcast run.
+
+    Keeps a counter per kind and up to SAMPLES_PER_KIND examples (reservoir
+    sampled), so the stored JSON stays small for any audience size. Chats that
+    failed permanently are buffered and marked blocked on ``flush()``.
+    """
+
+    def __init__(self) -> None:
+        self.counts: Counter[str] = Counter()
+        self.samples: dict[str, list[dict]] = defaultdict(list)
+        self._dead: dict[tuple[str, int], list[int]] = defaultdict(list)
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "FailureStats":
+        """
+        Continue from a breakdown stored by ``as_dict()``.
+
+        Only permanent failures are carried over: those chats are blocked and
+        left out of the audience now. The others are retried, and counted
+        again only if they fail again.
+        """
+        stats = cls()
+        if data:
+            for kind, count in data.get("counts", {}).items():
+                if kind in PERMANENT_FAILURES:
+                    stats.counts[kind] = count
+                    stats.samples[kind].extend(data.get("samples", {}).get(kind, []))
+        return stats
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def record(self, chat_id: int, bot_id: int, exc: Exception) -> str:
+        kind = classify_failure(exc)
+        self.counts[kind] += 1
+        sample = {"chat_id": chat_id, "error": str(exc)[:SAMPLE_ERROR_LENGTH]}
+        samples = self.samples[kind]
+        if len(samples) < SAMPLES_PER_KIND:
+            samples.append(sample)
+        else:
+            index = random.randrange(self.counts[kind])
+            if index < SAMPLES_PER_KIND:
+                samples[index] = sample
+        if kind in PERMANENT_FAILURES:
+            self._dead[(kind, bot_id)].append(chat_id)
+        return kind
+
+    def as_dict(self) -> dict | None:
+        if not self.counts:
+            return None
+        return {"counts": dict(self.counts), "samples": dict(self.samples)}
+
+    async def flush(self) -> None:
+        if not self._dead:
+            return
+        # Sends keep failing while this writes; their chats go out with the next flush
+        dead, self._dead = self._dead, defaultdict(list)
+        try:
+            async with BulkSessionLocal() as session:
+                for (reason, bot_id), chat_ids in dead.items():
+                    await set_users_blocked(session, chat_ids, bot_id, True, reason=reason)
+        except BaseException:
+            # Kept for the next flush (set_users_blocked is idempotent)
+            for key, chat_ids in dead.items():
+                self._dead[key][:0] = chat_ids
+            raise
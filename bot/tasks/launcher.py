@@ -0,0 +1,119 @@
+import asyncio
+from collections.abc import Callable
+from contextlib import suppress
+
+from aiogram import Bot
+from loguru import logger
+
+from bot.tasks.broadcast import run_broadcast
+from bot.tasks.recall import run_recall
+from bot.tasks.supervisor import BroadcastStopped
+from core.crud.bots import get_bot_id
+from core.crud.broadcasts import (
+    claim_next_broadcast,
+    claim_next_recall,
+    requeue_running_broadcasts,
+    set_broadcast_status,
+    update_recall_progress,
+)
+from core.database import BulkSessionLocal
+from core.models.broadcast import Broadcast
+
+POLL_INTERVAL = 5.0  # seconds; broadcasts queued by other workers are picked up this fast
+
+
+class BroadcastLauncher:
+    """Leader-only loop: claims queued broadcasts and recalls from the DB, one at a time."""
+
+    def __init__(self, get_bot: Callable[[], Bot | None], poll_interval: float = POLL_INTERVAL):
+        self._get_bot = get_bot
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+
+    def wake(self) -> None:
+        """Called when a broadcast is queued by this worker, to skip the poll delay."""
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        async with BulkSessionLocal() as session:
+            requeued = await requeue_running_broadcasts(session)
+        if requeued:
+            logger.warning(f"Resuming {requeued} broadcast(s) left running by the previous leader")
+
+        while True:
+            self._wakeup.clear()
+            bot = self._get_bot()
+            broadcast = recall = None
+            if bot is not None:
+                async with BulkSessionLocal() as session:
+                    bot_id = await get_bot_id(session, bot.token)
+                    broadcast = await claim_next_broadcast(session, bot_id)
+                    if broadcast is None:
+                        recall = await claim_next_recall(session)
+
+            if broadcast is not None:
+                await self._execute(bot, bot_id, broadcast)
+            elif recall is not None:
+                await self._execute_recall(bot, bot_id, recall)
+            else:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+
+    async def _execute(self, bot: Bot, bot_id: int, broadcast: Broadcast) -> None:
+        if broadcast.bot_id != bot_id:
+            # Queued (or started) for another bot; its audience is not this bot's users.
+            # A rotated token keeps the bot's ID, so its broadcasts still resume.
+            logger.warning(f"Broadcast {broadcast.id} belongs to another bot, not resuming")
+            async with BulkSessionLocal() as session:
+                await set_broadcast_status(session, broadcast.id, "interrupted")
+            return
+
+        status = "done"
+        try:
+            await run_broadcast(
+                bot=bot,
+                broadcast_id=broadcast.id,
+                text=broadcast.text,
+                image_file_id=broadcast.image_file_id,
+                image_bytes=broadcast.image_data,
+                image_filename=broadcast.image_filename,
+                bot_id=broadcast.bot_id,
+            )
+        except asyncio.CancelledError:
+            # Leadership lost or shutdown: left "running", the next leader resumes it
+            raise
+        except BroadcastStopped:
+            # Paused or cancelled from the admin panel; the status is already stored
+            return
+        except Exception as exc:
+            logger.opt(exception=exc).error(f"Broadcast {broadcast.id} failed: {exc}")
+            status = "failed"
+
+        async with BulkSessionLocal() as session:
+            # Don't overwrite a pause/cancel that arrived after the last checkpoint
+            await set_broadcast_status(session, broadcast.id, status, expected="running")
+
+    async def _execute_recall(self, bot: Bot, bot_id: int, broadcast: Broadcast) -> None:
+        if broadcast.bot_id != bot_id:
+            # Only the bot that sent a message can delete or edit it
+            logger.warning(f"Broadcast {broadcast.id} was sent by another bot, cannot recall")
+            async with BulkSessionLocal() as session:
+                await update_recall_progress(
+                    session, broadcast.id, 0, broadcast.total_sent, finished=True
+                )
+            return
+
+        try:
+            await run_recall(bot, broadcast)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.opt(exception=exc).error(f"Recall of broadcast {broadcast.id} failed: {exc}")
+            async with BulkSessionLocal() as session:
+                await update_recall_progress(
+                    session,
+                    broadcast.id,
+                    broadcast.recalled,
+                    broadcast.recall_failed,
+                    finished=True,
+                )
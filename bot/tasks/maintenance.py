@@ -0,0 +1,112 @@
+import asyncio
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+
+from aiogram import Bot
+from aiogram.enums import ChatAction
+from loguru import logger
+
+from bot.middlewares.scheduler import Priority, request_priority
+from bot.tasks.executor import RateLimitedExecutor
+from bot.tasks.failures import PERMANENT_FAILURES, classify_failure
+from core.config import settings
+from core.crud.bots import get_bot_id
+from core.crud.user_archive import (
+    archive_blocked_users,
+    get_probe_candidates,
+    mark_archived_probed,
+    restore_archived_users,
+)
+from core.database import BulkSessionLocal
+
+ARCHIVE_BATCH = 5000  # users moved per statement
+PROBE_RATE = 5.0  # chat actions per second
+PROBE_CONCURRENCY = 5
+
+
+async def archive_stale_users(older_than: timedelta) -> int:
+    """Move users blocked for longer than ``older_than`` to users_archive, batch by batch."""
+    blocked_before = datetime.now(timezone.utc) - older_than
+    total = 0
+    while True:
+        async with BulkSessionLocal() as session:
+            moved = await archive_blocked_users(session, blocked_before, ARCHIVE_BATCH)
+        total += moved
+        if moved < ARCHIVE_BATCH:
+            return total
+
+
+async def probe_archived_users(bot: Bot, limit: int, reprobe_after: timedelta) -> int:
+    """
+    Send a "typing" chat action to archived users and restore the ones it reaches.
+
+    A chat action is the cheapest call that fails for a blocked or deleted chat
+    and leaves nothing in the user's chat. Returns the number of users restored.
+    """
+    async with BulkSessionLocal() as session:
+        bot_id = await get_bot_id(session, bot.token)
+        candidates = await get_probe_candidates(
+            session, bot_id, datetime.now(timezone.utc) - reprobe_after, limit
+        )
+    if not candidates:
+        return 0
+
+    reachable: list[int] = []
+    unreachable: list[int] = []
+
+    async def probe(chat_id: int) -> bool:
+        return await bot.send_chat_action(chat_id=chat_id, action=ChatAction.TYPING)
+
+    def on_result(chat_id: int, outcome: bool | Exception) -> None:
+        if not isinstance(outcome, Exception):
+            reachable.append(chat_id)
+        elif classify_failure(outcome) in PERMANENT_FAILURES:
+            unreachable.append(chat_id)
+        # Anything else (network, 5xx) says nothing: the user is probed again next run
+
+    executor = RateLimitedExecutor(rate=PROBE_RATE, concurrency=PROBE_CONCURRENCY)
+    with request_priority(Priority.BACKGROUND):
+        await executor.run(candidates, probe, on_result)
+
+    async with BulkSessionLocal() as session:
+        restored = await restore_archived_users(session, reachable, bot_id)
+        await mark_archived_probed(session, unreachable, bot_id)
+    logger.info(
+        f"Probed {len(candidates)} archived users: {restored} restored, "
+        f"{len(unreachable)} still unreachable"
+    )
+    return restored
+
+
+class UserMaintenance:
+    """Leader-only loop: archives long-blocked users and probes archived ones."""
+
+    def __init__(
+        self,
+        get_bot: Callable[[], Bot | None],
+        interval: float = settings.user_maintenance_interval,
+    ) -> None:
+        self._get_bot = get_bot
+        self.interval = interval
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.opt(exception=exc).error(f"User maintenance failed: {exc}")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> None:
+        archived = await archive_stale_users(timedelta(days=settings.user_archive_after_days))
+        if archived:
+            logger.info(f"Archived {archived} long-blocked users")
+        bot = self._get_bot()
+        if bot is not None and settings.user_probe_batch > 0:
+            await probe_archived_users(
+                bot,
+                limit=settings.user_probe_batch,
+                reprobe_after=timedelta(days=settings.user_probe_interval_days),
+            )
@@ -0,0 +1,77 @@
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from loguru import logger
+
+from bot.middlewares.scheduler import Priority, request_priority
+from bot.tasks.executor import send_executor
+from core.crud.broadcast_deliveries import get_deliveries
+from core.crud.broadcasts import update_recall_progress
+from core.database import BulkSessionLocal
+from core.models.broadcast import Broadcast
+
+PROGRESS_EVERY = 1000  # write counters to the DB every N processed messages
+# Bot API answers meaning an earlier attempt already did the job
+ALREADY_DONE = ("message to delete not found", "message is not modified")
+
+
+async def run_recall(bot: Bot, broadcast: Broadcast) -> None:
+    """
+    Delete or edit every delivered message of a broadcast.
+
+    Stored progress always covers a contiguous prefix of the deliveries:
+    ``recalled + recall_failed`` is the number of messages fully processed, in
+    delivery order, so a recall resumed after a leader change starts there.
+    """
+    async with BulkSessionLocal() as session:
+        chat_ids, message_ids = await get_deliveries(session, broadcast.id)
+    recalled = broadcast.recalled
+    failed = broadcast.recall_failed
+    start = recalled + failed
+    logger.info(
+        f"Broadcast {broadcast.id}: {broadcast.recall_action} of {len(chat_ids)} messages "
+        f"started at {start}"
+    )
+
+    action = broadcast.recall_action
+    text = broadcast.recall_text
+    has_photo = broadcast.type != "text"
+
+    async def call(index: int) -> bool:
+        chat_id, message_id = chat_ids[index], message_ids[index]
+        try:
+            if action == "delete":
+                await bot.delete_message(chat_id=chat_id, message_id=message_id)
+            elif has_photo:
+                await bot.edit_message_caption(chat_id=chat_id, message_id=message_id, caption=text)
+            else:
+                await bot.edit_message_text(text=text, chat_id=chat_id, message_id=message_id)
+        except TelegramBadRequest as exc:
+            # Messages past the stored prefix may have been handled before a resume
+            if not any(message in exc.message for message in ALREADY_DONE):
+                raise
+        return True
+
+    # Outcomes past the first unfinished index, folded into the counters in order
+    finished: dict[int, bool] = {}
+    next_index = start
+
+    async def on_result(index: int, outcome: bool | Exception) -> None:
+        nonlocal recalled, failed, next_index
+        finished[index] = not isinstance(outcome, Exception)
+        before = next_index
+        while next_index in finished:
+            if finished.pop(next_index):
+                recalled += 1
+            else:
+                failed += 1
+            next_index += 1
+        if before // PROGRESS_EVERY != next_index // PROGRESS_EVERY:
+            async with BulkSessionLocal() as session:
+                await update_recall_progress(session, broadcast.id, recalled, failed)
+
+    with request_priority(Priority.BULK):
+        await send_executor().run(range(start, len(chat_ids)), call, on_result)
+
+    async with BulkSessionLocal() as session:
+        await update_recall_progress(session, broadcast.id, recalled, failed, finished=True)
+    logger.info(f"Broadcast {broadcast.id}: {action} done, ok={recalled}, failed={failed}")
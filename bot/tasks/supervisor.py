@@ -0,0 +1,67 @@
+import time
+
+from core.crud.broadcasts import sync_broadcast_progress
+from core.database import BulkSessionLocal
+
+SYNC_INTERVAL = 2.0  # seconds between progress writes / control checks of a running broadcast
+
+
+class BroadcastStopped(Exception):
+    """Raised at a checkpoint when the broadcast was paused or cancelled."""
+
+    def __init__(self, status: str) -> None:
+        super().__init__(status)
+        self.status = status
+
+
+class BroadcastJob:
+    """
+    Handle of a broadcast running in this process.
+
+    ``checkpoint()`` is called before every send. A stop requested through the
+    registry takes effect immediately; one requested on another worker is seen
+    through the DB status, which is read while storing progress every SYNC_INTERVAL.
+    """
+
+    def __init__(self, broadcast_id: int) -> None:
+        self.broadcast_id = broadcast_id
+        self.requested: str | None = None
+        self._last_sync = time.monotonic()
+
+    def request(self, status: str) -> None:
+        self.requested = status
+
+    async def checkpoint(self, total_sent: int, failed: int) -> None:
+        now = time.monotonic()
+        if self.requested is None and now - self._last_sync >= SYNC_INTERVAL:
+            self._last_sync = now
+            async with BulkSessionLocal() as session:
+                status = await sync_broadcast_progress(
+                    session, self.broadcast_id, total_sent, failed
+                )
+            if status in ("paused", "cancelled"):
+                self.requested = status
+        if self.requested is not None:
+            raise BroadcastStopped(self.requested)
+
+
+_jobs: dict[int, BroadcastJob] = {}
+
+
+def start_job(broadcast_id: int) -> BroadcastJob:
+    job = BroadcastJob(broadcast_id)
+    _jobs[broadcast_id] = job
+    return job
+
+
+def finish_job(broadcast_id: int) -> None:
+    _jobs.pop(broadcast_id, None)
+
+
+def request_stop(broadcast_id: int, status: str) -> bool:
+    """Stop a broadcast running in this process at its next checkpoint."""
+    job = _jobs.get(broadcast_id)
+    if job is None:
+        return False
+    job.request(status)
+    return True
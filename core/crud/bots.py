@@ -0,0 +1,74 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import track_db_operation
+from core.models.telegram_bot import TelegramBot
+
+# token -> bots.id; a bot's ID never changes, so entries never go stale
+_bot_ids: dict[str, int] = {}
+
+
+def telegram_bot_id(token: str) -> int | None:
+    """Numeric bot ID from the token prefix ("123456:ABC..." -> 123456)."""
+    prefix, sep, _ = token.partition(":")
+    return int(prefix) if sep and prefix.isdigit() else None
+
+
+@track_db_operation
+async def upsert_bot(session: AsyncSession, token: str) -> int:
+    """
+    Register ``token`` and return its bots.id.
+
+    A new token of an already known bot (rotation) only replaces ``token`` in
+    that bot's row: users, events and broadcasts keep pointing at the same ID.
+    """
+    bot_number = telegram_bot_id(token)
+    if bot_number is None:
+        existing = await session.execute(select(TelegramBot.id).where(TelegramBot.token == token))
+        bot_id = existing.scalar_one_or_none()
+        if bot_id is not None:
+            return bot_id
+        stmt = insert(TelegramBot).values(token=token)
+    else:
+        stmt = insert(TelegramBot).values(telegram_bot_id=bot_number, token=token)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TelegramBot.telegram_bot_id], set_={"token": stmt.excluded.token}
+        )
+    result = await session.execute(stmt.returning(TelegramBot.id))
+    bot_id = result.scalar_one()
+    await session.commit()
+    return bot_id
+
+
+async def get_bot_id(session: AsyncSession, token: str) -> int:
+    """bots.id of ``token``, registering the bot on first use. Cached per process."""
+    bot_id = _bot_ids.get(token)
+    if bot_id is None:
+        bot_id = _bot_ids[token] = await upsert_bot(session, token)
+    return bot_id
+
+
+@track_db_operation
+async def find_bot_id(session: AsyncSession, token: str | None) -> int | None:
+    """Read-only lookup for replica sessions; None if the token is empty or unknown."""
+    if not token:
+        return None
+    bot_id = _bot_ids.get(token)
+    if bot_id is not None:
+        return bot_id
+    bot_number = telegram_bot_id(token)
+    if bot_number is None:
+        q = select(TelegramBot.id).where(TelegramBot.token == token)
+    else:
+        q = select(TelegramBot.id).where(TelegramBot.telegram_bot_id == bot_number)
+    bot_id = (await session.execute(q)).scalar_one_or_none()
+    if bot_id is not None:
+        _bot_ids[token] = bot_id
+    return bot_id
+
+
+@track_db_operation
+async def get_bots(session: AsyncSession) -> dict[int, TelegramBot]:
+    result = await session.execute(select(TelegramBot))
+    return {bot.id: bot for bot in result.scalars().all()}
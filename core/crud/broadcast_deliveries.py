@@ -0,0 +1,50 @@
+from array import array
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import track_db_operation
+from core.models.broadcast_delivery import BroadcastDelivery
+
+
+@track_db_operation
+async def add_deliveries(
+    session: AsyncSession, broadcast_id: int, chat_ids: list[int], message_ids: list[int]
+) -> None:
+    """Record one batch of successful sends as a single row."""
+    if not chat_ids:
+        return
+    await session.execute(
+        insert(BroadcastDelivery).values(
+            broadcast_id=broadcast_id, chat_ids=chat_ids, message_ids=message_ids
+        )
+    )
+    await session.commit()
+
+
+@track_db_operation
+async def get_deliveries(session: AsyncSession, broadcast_id: int) -> tuple[array, array]:
+    """All delivered (chat_ids, message_ids) of a broadcast as two parallel arrays."""
+    result = await session.execute(
+        select(BroadcastDelivery.chat_ids, BroadcastDelivery.message_ids)
+        .where(BroadcastDelivery.broadcast_id == broadcast_id)
+        .order_by(BroadcastDelivery.id)
+    )
+    chat_ids = array("q")
+    message_ids = array("q")
+    for row_chat_ids, row_message_ids in result:
+        chat_ids.extend(row_chat_ids)
+        message_ids.extend(row_message_ids)
+    return chat_ids, message_ids
+
+
+@track_db_operation
+async def get_delivered_chat_ids(session: AsyncSession, broadcast_id: int) -> array:
+    """Chat IDs that already received the broadcast, as a sorted array('q')."""
+    result = await session.execute(
+        select(BroadcastDelivery.chat_ids).where(BroadcastDelivery.broadcast_id == broadcast_id)
+    )
+    delivered = array("q")
+    for chat_ids in result.scalars():
+        delivered.extend(chat_ids)
+    return array("q", sorted(delivered))
@@ -1,35 +1,61 @@
-from sqlalchemy import select
+from sqlalchemy import Row, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
 
+from core.metrics import track_db_operation
 from core.models.broadcast import Broadcast
 
 
+@track_db_operation
 async def create_broadcast(
     session: AsyncSession,
     type: str,
     text: str | None = None,
     image_file_id: str | None = None,
+    image_data: bytes | None = None,
+    image_filename: str | None = None,
+    bot_id: int | None = None,
 ) -> Broadcast:
-    broadcast = Broadcast(type=type, text=text, image_file_id=image_file_id)
+    broadcast = Broadcast(
+        type=type,
+        text=text,
+        image_file_id=image_file_id,
+        image_data=image_data,
+        image_filename=image_filename,
+        bot_id=bot_id,
+    )
     session.add(broadcast)
     await session.commit()
     await session.refresh(broadcast)
     return broadcast
 
 
+@track_db_operation
 async def update_broadcast_stats(
     session: AsyncSession,
     broadcast_id: int,
     total_sent: int,
     failed: int,
+    failure_stats: dict | None = None,
 ) -> None:
     broadcast = await session.get(Broadcast, broadcast_id)
     if broadcast:
         broadcast.total_sent = total_sent
         broadcast.failed = failed
+        broadcast.failure_stats = failure_stats
         await session.commit()
 
 
+@track_db_operation
+async def get_broadcast_failures(session: AsyncSession, broadcast_id: int) -> dict | None:
+    """Stored failure breakdown, to continue from when a broadcast resumes."""
+    result = await session.execute(
+        select(Broadcast.failure_stats).where(Broadcast.id == broadcast_id)
+    )
+    return result.scalar_one_or_none()
+
+
+@track_db_operation
 async def update_broadcast_image_file_id(
     session: AsyncSession,
     broadcast_id: int,
@@ -38,11 +64,192 @@ async def update_broadcast_image_file_id(
     broadcast = await session.get(Broadcast, broadcast_id)
     if broadcast:
         broadcast.image_file_id = image_file_id
+        broadcast.image_data = None  # file_id is enough from now on
         await session.commit()
 
 
-async def get_broadcasts(session: AsyncSession, limit: int = 20) -> list[Broadcast]:
+# Columns of the history table in /admin/broadcast
+LIST_COLUMNS = (
+    Broadcast.id,
+    Broadcast.type,
+    Broadcast.text,
+    Broadcast.sent_at,
+    Broadcast.status,
+    Broadcast.total_sent,
+    Broadcast.failed,
+    Broadcast.failure_stats,
+    Broadcast.recall_status,
+    Broadcast.recall_action,
+    Broadcast.recall_text,
+    Broadcast.recalled,
+    Broadcast.recall_failed,
+)
+
+
+@track_db_operation
+async def get_broadcasts(session: AsyncSession, limit: int = 20) -> list[Row]:
+    result = await session.execute(
+        select(*LIST_COLUMNS).order_by(Broadcast.sent_at.desc()).limit(limit)
+    )
+    return list(result.all())
+
+
+@track_db_operation
+async def claim_next_broadcast(session: AsyncSession, bot_id: int) -> Broadcast | None:
+    """
+    Atomically move the oldest pending broadcast to "running" and return it.
+
+    A broadcast queued before any bot was configured gets ``bot_id`` as its audience.
+    """
+    next_id = (
+        select(Broadcast.id)
+        .where(Broadcast.status == "pending")
+        .order_by(Broadcast.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await session.execute(
+        update(Broadcast)
+        .where(Broadcast.id == next_id)
+        .values(status="running", bot_id=func.coalesce(Broadcast.bot_id, bot_id))
+        .returning(Broadcast.id)
+    )
+    broadcast_id = result.scalar_one_or_none()
+    await session.commit()
+    if broadcast_id is None:
+        return None
+    return await session.get(Broadcast, broadcast_id, options=[undefer(Broadcast.image_data)])
+
+
+@track_db_operation
+async def set_broadcast_status(
+    session: AsyncSession, broadcast_id: int, status: str, expected: str | None = None
+) -> None:
+    """Set status; with ``expected``, only if the current status still equals it."""
+    q = update(Broadcast).where(Broadcast.id == broadcast_id)
+    if expected is not None:
+        q = q.where(Broadcast.status == expected)
+    await session.execute(q.values(status=status))
+    await session.commit()
+
+
+# action -> (statuses it applies to, resulting status)
+CONTROL_TRANSITIONS = {
+    "pause": (("pending", "running"), "paused"),
+    "resume": (("paused",), "pending"),
+    "cancel": (("pending", "running", "paused"), "cancelled"),
+}
+
+
+@track_db_operation
+async def request_broadcast_control(
+    session: AsyncSession, broadcast_id: int, action: str
+) -> str | None:
+    """Apply pause/resume/cancel to a broadcast. Returns the new status or None if not allowed."""
+    allowed, new_status = CONTROL_TRANSITIONS[action]
+    result = await session.execute(
+        update(Broadcast)
+        .where(Broadcast.id == broadcast_id, Broadcast.status.in_(allowed))
+        .values(status=new_status)
+        .returning(Broadcast.status)
+    )
+    status = result.scalar_one_or_none()
+    await session.commit()
+    return status
+
+
+@track_db_operation
+async def sync_broadcast_progress(
+    session: AsyncSession, broadcast_id: int, total_sent: int, failed: int
+) -> str | None:
+    """Store running counters and return the current status, to pick up pause/cancel."""
+    result = await session.execute(
+        update(Broadcast)
+        .where(Broadcast.id == broadcast_id)
+        .values(total_sent=total_sent, failed=failed)
+        .returning(Broadcast.status)
+    )
+    status = result.scalar_one_or_none()
+    await session.commit()
+    return status
+
+
+@track_db_operation
+async def requeue_running_broadcasts(session: AsyncSession) -> int:
+    """Broadcasts and recalls left "running" by a previous leader go back to the queue."""
+    result = await session.execute(
+        update(Broadcast).where(Broadcast.status == "running").values(status="pending")
+    )
+    recalls = await session.execute(
+        update(Broadcast)
+        .where(Broadcast.recall_status == "running")
+        .values(recall_status="pending")
+    )
+    await session.commit()
+    return result.rowcount + recalls.rowcount
+
+
+@track_db_operation
+async def request_recall(
+    session: AsyncSession, broadcast_id: int, action: str, text: str | None = None
+) -> bool:
+    """
+    Queue deletion or editing of a finished broadcast's messages.
+
+    Returns False if the broadcast is still sending, a recall is already queued or
+    running, or its messages were already deleted.
+    """
     result = await session.execute(
-        select(Broadcast).order_by(Broadcast.sent_at.desc()).limit(limit)
+        update(Broadcast)
+        .where(
+            Broadcast.id == broadcast_id,
+            Broadcast.status.in_(("done", "interrupted", "failed", "cancelled")),
+            or_(Broadcast.recall_status.is_(None), Broadcast.recall_status == "done"),
+            or_(Broadcast.recall_action.is_(None), Broadcast.recall_action != "delete"),
+        )
+        .values(
+            recall_status="pending",
+            recall_action=action,
+            recall_text=text,
+            recalled=0,
+            recall_failed=0,
+        )
     )
-    return list(result.scalars().all())
+    await session.commit()
+    return result.rowcount > 0
+
+
+@track_db_operation
+async def claim_next_recall(session: AsyncSession) -> Broadcast | None:
+    """Atomically move the oldest pending recall to "running" and return its broadcast."""
+    next_id = (
+        select(Broadcast.id)
+        .where(Broadcast.recall_status == "pending")
+        .order_by(Broadcast.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await session.execute(
+        update(Broadcast)
+        .where(Broadcast.id == next_id)
+        .values(recall_status="running")
+        .returning(Broadcast.id)
+    )
+    broadcast_id = result.scalar_one_or_none()
+    await session.commit()
+    if broadcast_id is None:
+        return None
+    return await session.get(Broadcast, broadcast_id)
+
+
+@track_db_operation
+async def update_recall_progress(
+    session: AsyncSession, broadcast_id: int, recalled: int, failed: int, finished: bool = False
+) -> None:
+    values = {"recalled": recalled, "recall_failed": failed}
+    if finished:
+        values["recall_status"] = "done"
+    await session.execute(update(Broadcast).where(Broadcast.id == broadcast_id).values(**values))
+    await session.commit()
@@ -0,0 +1,86 @@
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import track_db_operation
+from core.models.bulk_job import BulkJob, BulkJobResult
+
+
+@track_db_operation
+async def create_bulk_job(
+    session: AsyncSession,
+    job_id: str,
+    action: str,
+    telegram_ids: list[int],
+    changed_ids: list[int],
+    keep: int,
+) -> None:
+    """Store a new job and drop all but the ``keep`` most recent ones."""
+    session.add(
+        BulkJob(
+            id=job_id,
+            action=action,
+            total=len(telegram_ids),
+            telegram_ids=telegram_ids,
+            changed_ids=changed_ids,
+        )
+    )
+    await session.flush()
+    kept = select(BulkJob.id).order_by(BulkJob.created_at.desc()).limit(keep)
+    await session.execute(delete(BulkJob).where(BulkJob.id.not_in(kept)))
+    await session.commit()
+
+
+@track_db_operation
+async def add_bulk_job_results(
+    session: AsyncSession,
+    job_id: str,
+    position: int,
+    telegram_ids: list[int],
+    results: list[str],
+    done: int,
+    failed: int,
+    finished: bool = False,
+) -> None:
+    """Record one batch of finished IDs as a single row and store the job's counters."""
+    if telegram_ids:
+        await session.execute(
+            insert(BulkJobResult).values(
+                job_id=job_id, position=position, telegram_ids=telegram_ids, results=results
+            )
+        )
+    await session.execute(
+        update(BulkJob)
+        .where(BulkJob.id == job_id)
+        .values(done=done, failed=failed, finished=finished)
+    )
+    await session.commit()
+
+
+@track_db_operation
+async def get_bulk_job(session: AsyncSession, job_id: str) -> BulkJob | None:
+    return await session.get(BulkJob, job_id)
+
+
+@track_db_operation
+async def get_bulk_job_results(
+    session: AsyncSession, job_id: str, offset: int = 0, limit: int | None = None
+) -> list[tuple[int, str]]:
+    """
+    (telegram_id, result) of up to ``limit`` IDs that finished after the first
+    ``offset``, in completion order.
+    """
+    q = (
+        select(BulkJobResult.position, BulkJobResult.telegram_ids, BulkJobResult.results)
+        .where(
+            BulkJobResult.job_id == job_id,
+            BulkJobResult.position + func.cardinality(BulkJobResult.telegram_ids) > offset,
+        )
+        .order_by(BulkJobResult.position)
+    )
+    if limit is not None:
+        q = q.where(BulkJobResult.position < offset + limit)
+    finished: list[tuple[int, str]] = []
+    for position, telegram_ids, results in await session.execute(q):
+        skip = max(offset - position, 0)
+        finished.extend(zip(telegram_ids[skip:], results[skip:]))
+    return finished if limit is None else finished[:limit]
@@ -1,51 +1,66 @@
-from sqlalchemy import func, select
+from sqlalchemy import Row, and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
 
+from core.metrics import track_db_operation
 from core.models.channel_event import ChannelEvent
 from core.models.user import User
 
 
+@track_db_operation
 async def create_event(
     session: AsyncSession,
     user_id: int,
     event_type: str,
+    bot_id: int | None = None,
 ) -> ChannelEvent:
-    event = ChannelEvent(user_id=user_id, event_type=event_type)
+    event = ChannelEvent(user_id=user_id, bot_id=bot_id, event_type=event_type)
     session.add(event)
     await session.commit()
     await session.refresh(event)
     return event
 
 
+@track_db_operation
 async def get_events_paginated(
     session: AsyncSession, offset: int = 0, limit: int = 50
-) -> tuple[list[ChannelEvent], int]:
+) -> tuple[list[Row], int]:
     count_result = await session.execute(select(func.count()).select_from(ChannelEvent))
     total = count_result.scalar_one()
 
+    # Only what the list shows: event columns plus the user's username
     result = await session.execute(
-        select(ChannelEvent)
-        .options(joinedload(ChannelEvent.user))
+        select(
+            ChannelEvent.id,
+            ChannelEvent.user_id,
+            ChannelEvent.bot_id,
+            ChannelEvent.event_type,
+            ChannelEvent.occurred_at,
+            User.username,
+        )
+        .outerjoin(
+            User,
+            and_(User.telegram_id == ChannelEvent.user_id, User.bot_id == ChannelEvent.bot_id),
+        )
         .order_by(ChannelEvent.occurred_at.desc())
         .offset(offset)
         .limit(limit)
     )
-    events = list(result.scalars().all())
-    return events, total
+    return list(result.all()), total
 
 
-async def count_subscribed(session: AsyncSession, bot_token: str | None = None) -> int:
+@track_db_operation
+async def count_subscribed(session: AsyncSession, bot_id: int | None = None) -> int:
     q = select(func.count()).select_from(User).where(User.is_subscribed == True)  # noqa: E712
-    if bot_token:
-        q = q.where(User.bot_token == bot_token)
+    if bot_id is not None:
+        q = q.where(User.bot_id == bot_id)
     result = await session.execute(q)
     return result.scalar_one()
 
 
-async def count_unsubscribed(session: AsyncSession, bot_token: str | None = None) -> int:
+@track_db_operation
+async def count_unsubscribed(session: AsyncSession, bot_id: int | None = None) -> int:
     q = select(func.count()).select_from(User).where(User.is_subscribed == False)  # noqa: E712
-    if bot_token:
-        q = q.where(User.bot_token == bot_token)
+    if bot_id is not None:
+        q = q.where(User.bot_id == bot_id)
     result = await session.execute(q)
     return result.scalar_one()
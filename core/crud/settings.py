@@ -1,5 +1,7 @@
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.metrics import track_db_operation
 from core.models.setting import Setting
 
 DEFAULT_SETTINGS = {
@@ -11,11 +13,13 @@ DEFAULT_SETTINGS = {
 }
 
 
+@track_db_operation
 async def get_setting(session: AsyncSession, key: str) -> str | None:
     setting = await session.get(Setting, key)
     return setting.value if setting else None
 
 
+@track_db_operation
 async def set_setting(session: AsyncSession, key: str, value: str) -> Setting:
     setting = await session.get(Setting, key)
     if setting is None:
@@ -28,15 +32,19 @@ async def set_setting(session: AsyncSession, key: str, value: str) -> Setting:
     return setting
 
 
+@track_db_operation
 async def get_all_settings(session: AsyncSession) -> dict[str, str]:
     from sqlalchemy import select
     result = await session.execute(select(Setting))
     return {s.key: s.value for s in result.scalars().all()}
 
 
+@track_db_operation
 async def seed_defaults(session: AsyncSession) -> None:
-    for key, value in DEFAULT_SETTINGS.items():
-        existing = await session.get(Setting, key)
-        if existing is None:
-            session.add(Setting(key=key, value=value))
+    # One statement for all keys; values already stored are left alone
+    await session.execute(
+        insert(Setting)
+        .values([{"key": key, "value": value} for key, value in DEFAULT_SETTINGS.items()])
+        .on_conflict_do_nothing(index_elements=[Setting.key])
+    )
     await session.commit()
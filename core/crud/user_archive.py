@@ -0,0 +1,139 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    any_,
+    bindparam,
+    delete,
+    false,
+    func,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import track_db_operation
+from core.models.archived_user import ArchivedUser
+from core.models.user import User
+
+_ARCHIVED_COLUMNS = [
+    "telegram_id", "bot_id", "username", "first_name", "last_name",
+    "joined_at", "is_subscribed", "block_reason", "blocked_at", "last_seen_at",
+]
+
+
+@track_db_operation
+async def archive_blocked_users(session: AsyncSession, blocked_before: datetime, limit: int) -> int:
+    """
+    Move up to ``limit`` users blocked before ``blocked_before`` to users_archive.
+
+    One statement: DELETE ... RETURNING feeds the INSERT. Users blocked from the
+    admin panel stay in ``users``: probing must never lift a manual block.
+    """
+    batch = (
+        select(User.telegram_id, User.bot_id)
+        .where(
+            User.is_blocked == True,  # noqa: E712
+            User.blocked_at < blocked_before,
+            User.block_reason.is_distinct_from("admin"),
+        )
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    moved = (
+        delete(User)
+        .where(tuple_(User.telegram_id, User.bot_id).in_(batch))
+        .returning(*(getattr(User, column) for column in _ARCHIVED_COLUMNS))
+        .cte("moved")
+    )
+    stmt = insert(ArchivedUser).from_select(
+        _ARCHIVED_COLUMNS, select(*(moved.c[column] for column in _ARCHIVED_COLUMNS))
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ArchivedUser.telegram_id, ArchivedUser.bot_id],
+        set_={
+            **{column: stmt.excluded[column] for column in _ARCHIVED_COLUMNS[2:]},
+            "archived_at": func.now(),
+            "probed_at": None,
+        },
+    ).add_cte(moved)
+    result = await session.execute(stmt)
+    await session.commit()
+    return result.rowcount
+
+
+@track_db_operation
+async def get_probe_candidates(
+    session: AsyncSession, bot_id: int, probed_before: datetime, limit: int
+) -> list[int]:
+    """Archived users of ``bot_id`` never probed or last probed before ``probed_before``."""
+    result = await session.execute(
+        select(ArchivedUser.telegram_id)
+        .where(
+            ArchivedUser.bot_id == bot_id,
+            or_(ArchivedUser.probed_at.is_(None), ArchivedUser.probed_at < probed_before),
+        )
+        .order_by(ArchivedUser.probed_at.asc().nulls_first())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+def _ids_param(telegram_ids: list[int]):
+    return any_(bindparam("ids", telegram_ids, type_=ARRAY(BigInteger)))
+
+
+@track_db_operation
+async def mark_archived_probed(
+    session: AsyncSession, telegram_ids: list[int], bot_id: int
+) -> None:
+    if not telegram_ids:
+        return
+    await session.execute(
+        update(ArchivedUser)
+        .where(ArchivedUser.bot_id == bot_id, ArchivedUser.telegram_id == _ids_param(telegram_ids))
+        .values(probed_at=func.now())
+    )
+    await session.commit()
+
+
+@track_db_operation
+async def restore_archived_users(
+    session: AsyncSession, telegram_ids: list[int], bot_id: int
+) -> int:
+    """Move archived users back to ``users`` as active. Returns the number restored."""
+    if not telegram_ids:
+        return 0
+    # Block state is reset: restored users are reachable again
+    restore_columns = [*_ARCHIVED_COLUMNS[:7], "last_seen_at"]
+    moved = (
+        delete(ArchivedUser)
+        .where(ArchivedUser.bot_id == bot_id, ArchivedUser.telegram_id == _ids_param(telegram_ids))
+        .returning(*(getattr(ArchivedUser, column) for column in restore_columns))
+        .cte("moved")
+    )
+    # A user who sent /start since archiving already has a fresh row: keep it
+    stmt = (
+        insert(User)
+        .from_select(
+            [*restore_columns, "is_blocked"],
+            select(*(moved.c[column] for column in restore_columns), false()),
+        )
+        .on_conflict_do_nothing(index_elements=[User.telegram_id, User.bot_id])
+        .add_cte(moved)
+    )
+    result = await session.execute(stmt)
+    await session.commit()
+    return result.rowcount
+
+
+@track_db_operation
+async def count_archived(session: AsyncSession, bot_id: int | None = None) -> int:
+    q = select(func.count()).select_from(ArchivedUser)
+    if bot_id is not None:
+        q = q.where(ArchivedUser.bot_id == bot_id)
+    result = await session.execute(q)
+    return result.scalar_one()
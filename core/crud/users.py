@@ -1,26 +1,80 @@
-from sqlalchemy import func, select
+from array import array
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Integer,
+    Row,
+    any_,
+    bindparam,
+    column,
+    delete,
+    func,
+    or_,
+    select,
+    text,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.metrics import track_db_operation
+from core.models.archived_user import ArchivedUser
 from core.models.user import User
 
+# Columns shown by the admin list, search and export: rows are returned as
+# named tuples instead of ORM entities, so no identity map or change tracking
+LIST_COLUMNS = (
+    User.telegram_id,
+    User.bot_id,
+    User.username,
+    User.first_name,
+    User.last_name,
+    User.joined_at,
+    User.last_seen_at,
+    User.is_blocked,
+    User.block_reason,
+)
+# Kept when an archived user comes back
+RESTORED_COLUMNS = ("joined_at", "is_subscribed", "block_reason", "blocked_at", "last_seen_at")
+
 
+@track_db_operation
 async def upsert_user(
     session: AsyncSession,
     telegram_id: int,
-    bot_token: str,
+    bot_id: int,
     username: str | None = None,
     first_name: str | None = None,
     last_name: str | None = None,
 ) -> User:
-    user = await session.get(User, (telegram_id, bot_token))
+    """
+    Create or update a user. A user the maintenance job archived is moved back
+    from users_archive with their history and block state; callers that know
+    the user is reachable again unblock them afterwards.
+    """
+    user = await session.get(User, (telegram_id, bot_id))
     if user is None:
+        archived = (
+            await session.execute(
+                delete(ArchivedUser)
+                .where(ArchivedUser.telegram_id == telegram_id, ArchivedUser.bot_id == bot_id)
+                .returning(*(getattr(ArchivedUser, column) for column in RESTORED_COLUMNS))
+            )
+        ).one_or_none()
         user = User(
             telegram_id=telegram_id,
-            bot_token=bot_token,
+            bot_id=bot_id,
             username=username,
             first_name=first_name,
             last_name=last_name,
         )
+        if archived is not None:
+            for column, value in zip(RESTORED_COLUMNS, archived):
+                setattr(user, column, value)
+            user.is_blocked = True
         session.add(user)
     else:
         user.username = username
@@ -31,30 +85,50 @@ async def upsert_user(
     return user
 
 
-async def get_user(session: AsyncSession, telegram_id: int, bot_token: str) -> User | None:
-    return await session.get(User, (telegram_id, bot_token))
+@track_db_operation
+async def get_user(session: AsyncSession, telegram_id: int, bot_id: int) -> User | None:
+    return await session.get(User, (telegram_id, bot_id))
 
 
+@track_db_operation
 async def get_all_active_users(
-    session: AsyncSession, bot_token: str | None = None
+    session: AsyncSession, bot_id: int | None = None
 ) -> list[User]:
     q = select(User).where(User.is_blocked == False)  # noqa: E712
-    if bot_token:
-        q = q.where(User.bot_token == bot_token)
+    if bot_id is not None:
+        q = q.where(User.bot_id == bot_id)
     result = await session.execute(q)
     return list(result.scalars().all())
 
 
+@track_db_operation
+async def get_active_user_ids(session: AsyncSession, bot_id: int) -> array:
+    """
+    Telegram IDs of a bot's active users, as an array('q') in ID order.
+
+    Selects only indexed columns so Postgres answers from ix_users_active_audience
+    with an index-only scan. The IDs come back as one array value, which asyncpg
+    decodes in C instead of building a result row per user.
+    """
+    result = await session.execute(
+        select(func.array_agg(aggregate_order_by(User.telegram_id, User.telegram_id))).where(
+            User.bot_id == bot_id, User.is_blocked == False  # noqa: E712
+        )
+    )
+    return array("q", result.scalar_one() or ())
+
+
+@track_db_operation
 async def get_users_paginated(
     session: AsyncSession,
     offset: int = 0,
     limit: int = 50,
-    bot_token: str | None = None,
+    bot_id: int | None = None,
     status: str | None = None,
-) -> tuple[list[User], int]:
+) -> tuple[list[Row], int]:
     count_q = select(func.count()).select_from(User)
-    if bot_token:
-        count_q = count_q.where(User.bot_token == bot_token)
+    if bot_id is not None:
+        count_q = count_q.where(User.bot_id == bot_id)
     if status == "active":
         count_q = count_q.where(User.is_blocked == False)  # noqa: E712
     elif status == "blocked":
@@ -62,52 +136,227 @@ async def get_users_paginated(
     count_result = await session.execute(count_q)
     total = count_result.scalar_one()
 
-    q = select(User).order_by(User.joined_at.desc()).offset(offset).limit(limit)
-    if bot_token:
-        q = q.where(User.bot_token == bot_token)
+    q = select(*LIST_COLUMNS).order_by(User.joined_at.desc()).offset(offset).limit(limit)
+    if bot_id is not None:
+        q = q.where(User.bot_id == bot_id)
     if status == "active":
         q = q.where(User.is_blocked == False)  # noqa: E712
     elif status == "blocked":
         q = q.where(User.is_blocked == True)  # noqa: E712
     result = await session.execute(q)
-    users = list(result.scalars().all())
-    return users, total
+    return list(result.all()), total
 
 
-async def count_users(session: AsyncSession, bot_token: str | None = None) -> int:
+@track_db_operation
+async def count_users(session: AsyncSession, bot_id: int | None = None) -> int:
     q = select(func.count()).select_from(User)
-    if bot_token:
-        q = q.where(User.bot_token == bot_token)
+    if bot_id is not None:
+        q = q.where(User.bot_id == bot_id)
     result = await session.execute(q)
     return result.scalar_one()
 
 
-async def count_blocked(session: AsyncSession, bot_token: str | None = None) -> int:
+@track_db_operation
+async def count_blocked(session: AsyncSession, bot_id: int | None = None) -> int:
     q = select(func.count()).select_from(User).where(User.is_blocked == True)  # noqa: E712
-    if bot_token:
-        q = q.where(User.bot_token == bot_token)
+    if bot_id is not None:
+        q = q.where(User.bot_id == bot_id)
     result = await session.execute(q)
     return result.scalar_one()
 
 
-async def mark_user_blocked(session: AsyncSession, telegram_id: int, bot_token: str) -> None:
-    user = await session.get(User, (telegram_id, bot_token))
+@track_db_operation
+async def mark_user_blocked(
+    session: AsyncSession, telegram_id: int, bot_id: int, reason: str = "blocked"
+) -> None:
+    user = await session.get(User, (telegram_id, bot_id))
     if user:
+        if not user.is_blocked:
+            user.blocked_at = datetime.now(timezone.utc)
         user.is_blocked = True
+        user.block_reason = reason
         await session.commit()
 
 
-async def mark_user_unblocked(session: AsyncSession, telegram_id: int, bot_token: str) -> None:
-    user = await session.get(User, (telegram_id, bot_token))
+@track_db_operation
+async def mark_user_unblocked(session: AsyncSession, telegram_id: int, bot_id: int) -> None:
+    user = await session.get(User, (telegram_id, bot_id))
     if user and user.is_blocked:
         user.is_blocked = False
+        user.block_reason = None
+        user.blocked_at = None
         await session.commit()
 
 
+@track_db_operation
+async def set_users_blocked(
+    session: AsyncSession,
+    telegram_ids: list[int],
+    bot_id: int,
+    blocked: bool,
+    reason: str | None = None,
+) -> list[int]:
+    """Block/unblock many users in one statement. Returns IDs whose state changed."""
+    if not telegram_ids:
+        return []
+    result = await session.execute(
+        update(User)
+        .where(
+            User.bot_id == bot_id,
+            User.telegram_id == any_(bindparam("ids", telegram_ids, type_=ARRAY(BigInteger))),
+            User.is_blocked != blocked,
+        )
+        .values(
+            is_blocked=blocked,
+            block_reason=reason if blocked else None,
+            blocked_at=func.now() if blocked else None,
+        )
+        .returning(User.telegram_id)
+    )
+    changed = list(result.scalars().all())
+    await session.commit()
+    return changed
+
+
+TOUCH_CHUNK_SIZE = 10_000  # 3 params per row; asyncpg allows 32767
+
+
+@track_db_operation
+async def touch_users(session: AsyncSession, seen: list[tuple[int, int, datetime]]) -> int:
+    """
+    Set last_seen_at from (telegram_id, bot_id, seen_at) rows, one UPDATE ... FROM (VALUES ...)
+    per chunk. A value older than the stored one is ignored. Returns rows updated.
+    """
+    updated = 0
+    for start in range(0, len(seen), TOUCH_CHUNK_SIZE):
+        batch = (
+            values(
+                column("telegram_id", BigInteger),
+                column("bot_id", Integer),
+                column("seen_at", DateTime(timezone=True)),
+                name="seen",
+            )
+            .data(seen[start:start + TOUCH_CHUNK_SIZE])
+        )
+        result = await session.execute(
+            update(User)
+            .where(
+                User.telegram_id == batch.c.telegram_id,
+                User.bot_id == batch.c.bot_id,
+                or_(User.last_seen_at.is_(None), User.last_seen_at < batch.c.seen_at),
+            )
+            .values(last_seen_at=batch.c.seen_at)
+        )
+        updated += result.rowcount
+    await session.commit()
+    return updated
+
+
+IMPORT_CHUNK_SIZE = 4000  # 7 params per row incl. defaults; asyncpg allows 32767
+
+
+@track_db_operation
+async def import_users(session: AsyncSession, rows: list[dict], bot_id: int) -> int:
+    """Insert or update users from dicts with telegram_id/username/first_name/last_name."""
+    for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+        chunk = rows[start:start + IMPORT_CHUNK_SIZE]
+        stmt = insert(User).values([
+            {
+                "telegram_id": row["telegram_id"],
+                "bot_id": bot_id,
+                "username": row.get("username"),
+                "first_name": row.get("first_name"),
+                "last_name": row.get("last_name"),
+            }
+            for row in chunk
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.telegram_id, User.bot_id],
+            set_={
+                "username": func.coalesce(stmt.excluded.username, User.username),
+                "first_name": func.coalesce(stmt.excluded.first_name, User.first_name),
+                "last_name": func.coalesce(stmt.excluded.last_name, User.last_name),
+            },
+        )
+        await session.execute(stmt)
+    await session.commit()
+    return len(rows)
+
+
+@track_db_operation
 async def set_user_subscribed(
-    session: AsyncSession, telegram_id: int, bot_token: str, subscribed: bool
+    session: AsyncSession, telegram_id: int, bot_id: int, subscribed: bool
 ) -> None:
-    user = await session.get(User, (telegram_id, bot_token))
+    user = await session.get(User, (telegram_id, bot_id))
     if user:
         user.is_subscribed = subscribed
         await session.commit()
+
+
+SEARCH_COLUMNS = ("username", "first_name", "last_name")
+SEARCH_MIN_LENGTH = 3  # shorter text matches too many rows to be useful
+MAX_TELEGRAM_ID_DIGITS = 16  # Telegram user IDs fit in 52 bits
+
+# None until checked: whether migration 0012 could build the pg_trgm index
+_trigram_search: bool | None = None
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _id_prefix_ranges(digits: str) -> list[tuple[int, int]]:
+    """ID ranges whose decimal form starts with ``digits``: 12 -> [12, 12], [120, 129], ..."""
+    value = int(digits)
+    return [
+        (value * 10**extra, (value + 1) * 10**extra - 1)
+        for extra in range(MAX_TELEGRAM_ID_DIGITS - len(digits) + 1)
+    ]
+
+
+async def _has_trigram_index(session: AsyncSession) -> bool:
+    global _trigram_search
+    if _trigram_search is None:
+        result = await session.execute(
+            text("SELECT to_regclass('ix_users_search_trgm') IS NOT NULL")
+        )
+        _trigram_search = result.scalar_one()
+    return _trigram_search
+
+
+@track_db_operation
+async def search_users(
+    session: AsyncSession, query: str, bot_id: int | None = None, limit: int = 20
+) -> list[Row]:
+    """
+    Users whose telegram_id starts with ``query`` or whose username/first/last
+    name contains it (pg_trgm) or, without pg_trgm, starts with it.
+
+    Every condition is answered from an index (users_pkey ranges, the trigram
+    GIN index or the lower(...) prefix indexes of migration 0012), so the cost
+    depends on the number of matches, not on the table size.
+    """
+    query = query.strip().lstrip("@")
+    conditions = []
+    if query.isdigit() and not query.startswith("0"):
+        conditions.extend(
+            User.telegram_id.between(low, high) for low, high in _id_prefix_ranges(query)
+        )
+    if len(query) >= SEARCH_MIN_LENGTH:
+        pattern = _escape_like(query.lower())
+        if await _has_trigram_index(session):
+            pattern = f"%{pattern}%"
+        else:
+            pattern = f"{pattern}%"
+        conditions.extend(
+            func.lower(getattr(User, column)).like(pattern, escape="\\")
+            for column in SEARCH_COLUMNS
+        )
+    if not conditions:
+        return []
+
+    q = select(*LIST_COLUMNS).where(or_(*conditions)).limit(limit)
+    if bot_id is not None:
+        q = q.where(User.bot_id == bot_id)
+    result = await session.execute(q)
+    return list(result.all())
@@ -1,23 +1,155 @@
+import asyncio
+import time
 from collections.abc import AsyncGenerator
+from typing import Any
+from uuid import uuid4
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
 
 from core.config import settings
+from core.metrics import DB_REPLICA_LAG, InstrumentedQueuePool, instrument_engine
+
+
+def _connect_args() -> dict[str, Any]:
+    if not settings.db_pgbouncer:
+        return {}
+    # Transaction pooling hands each transaction to an arbitrary server connection,
+    # so named prepared statements must be neither cached nor reused
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+
+
+def _create_engine(
+    name: str, pool_size: int, max_overflow: int, url: str = settings.database_url
+) -> AsyncEngine:
+    new_engine = create_async_engine(
+        url,
+        echo=settings.debug,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=_connect_args(),
+    )
+    instrument_engine(name, new_engine)
+    return new_engine
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+
+# Interactive bot handlers
+engine = _create_engine("interactive", settings.db_pool_size, settings.db_max_overflow)
+# Admin panel requests
+admin_engine = _create_engine(
+    "admin", settings.db_admin_pool_size, settings.db_admin_max_overflow
 )
+# Broadcasts, exports and other long-running bulk work
+bulk_engine = _create_engine("bulk", settings.db_bulk_pool_size, settings.db_bulk_max_overflow)
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False,
 )
+AdminSessionLocal = async_sessionmaker(
+    admin_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+BulkSessionLocal = async_sessionmaker(
+    bulk_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
+# Read-only admin queries, when a replica is configured
+replica_engine: AsyncEngine | None = None
+ReplicaSessionLocal: async_sessionmaker[AsyncSession] | None = None
+if settings.database_replica_url:
+    replica_engine = _create_engine(
+        "replica",
+        settings.db_admin_pool_size,
+        settings.db_admin_max_overflow,
+        url=settings.database_replica_url,
+    )
+    ReplicaSessionLocal = async_sessionmaker(
+        replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+
+_REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+class ReadRouter:
+    """Sends read-only work to the replica while it is reachable and fresh enough."""
+
+    def __init__(
+        self,
+        replica: async_sessionmaker[AsyncSession] | None,
+        max_lag: float,
+        check_interval: float,
+    ) -> None:
+        self.replica = replica
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._usable = False
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def _replica_usable(self) -> bool:
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return self._usable
+        async with self._lock:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return self._usable
+            try:
+                async with self.replica() as session:
+                    lag = (await session.execute(_REPLICA_LAG_SQL)).scalar()
+                lag = float(lag) if lag is not None else float("inf")
+                DB_REPLICA_LAG.set(lag)
+                self._usable = lag <= self.max_lag
+                if not self._usable:
+                    logger.warning(f"Replica lag {lag:.1f}s exceeds bound, reading from primary")
+            except Exception as exc:
+                logger.warning(f"Replica unavailable, reading from primary: {exc}")
+                self._usable = False
+            self._checked_at = time.monotonic()
+        return self._usable
+
+    async def pick(
+        self, primary: async_sessionmaker[AsyncSession]
+    ) -> async_sessionmaker[AsyncSession]:
+        if self.replica is not None and await self._replica_usable():
+            return self.replica
+        return primary
+
+
+read_router = ReadRouter(
+    ReplicaSessionLocal,
+    max_lag=settings.db_replica_max_lag,
+    check_interval=settings.db_replica_check_interval,
+)
 
 
 class Base(DeclarativeBase):
@@ -25,5 +157,30 @@ class Base(DeclarativeBase):
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with AsyncSessionLocal() as session:
+    async with AdminSessionLocal() as session:
+        yield session
+
+
+async def get_bulk_db() -> AsyncGenerator[AsyncSession, None]:
+    async with BulkSessionLocal() as session:
         yield session
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Admin read-only pages: replica when fresh, otherwise the admin pool."""
+    session_factory = await read_router.pick(AdminSessionLocal)
+    async with session_factory() as session:
+        yield session
+
+
+async def get_bulk_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Large read-only scans (exports): replica when fresh, otherwise the bulk pool."""
+    session_factory = await read_router.pick(BulkSessionLocal)
+    async with session_factory() as session:
+        yield session
+
+
+async def dispose_engines() -> None:
+    for pooled_engine in (engine, admin_engine, bulk_engine, replica_engine):
+        if pooled_engine is not None:
+            await pooled_engine.dispose()
@@ -0,0 +1,98 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from core.config import settings
+
+# Arbitrary advisory lock id shared by every worker of this app
+LEADER_LOCK_ID = 7_346_209_113
+
+
+class LeaderElector:
+    """
+    Elects exactly one leader among app workers with a Postgres advisory lock.
+
+    The lock is a session-level lock held on a dedicated connection outside the
+    regular pools. If that connection dies, Postgres releases the lock and another
+    worker takes over on its next check. Session locks don't survive PgBouncer
+    transaction pooling, so LEADER_DATABASE_URL should point at Postgres directly.
+    """
+
+    def __init__(
+        self,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+        interval: float = settings.leader_check_interval,
+    ) -> None:
+        self._engine = create_async_engine(
+            settings.leader_database_url or settings.database_url,
+            poolclass=NullPool,
+        )
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        self.interval = interval
+        self.is_leader = False
+        self._conn: AsyncConnection | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+        if self.is_leader:
+            await self._demote()
+        await self._close_connection()  # releases the lock
+        await self._engine.dispose()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._check()
+            except Exception as exc:
+                logger.warning(f"Leader election check failed: {exc}")
+                await self._close_connection()
+                if self.is_leader:
+                    await self._demote()
+            await asyncio.sleep(self.interval)
+
+    async def _check(self) -> None:
+        if self._conn is None:
+            conn = await self._engine.connect()
+            self._conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+
+        if self.is_leader:
+            # Heartbeat: a broken connection means the lock is (or soon will be) gone
+            await self._conn.execute(text("SELECT 1"))
+            return
+
+        result = await self._conn.execute(
+            text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": LEADER_LOCK_ID}
+        )
+        if result.scalar():
+            self.is_leader = True
+            logger.info("This worker is now the leader")
+            await self._on_elected()
+
+    async def _demote(self) -> None:
+        self.is_leader = False
+        logger.warning("This worker is no longer the leader")
+        try:
+            await self._on_demoted()
+        except Exception as exc:
+            logger.error(f"Leader demotion handler failed: {exc}")
+
+    async def _close_connection(self) -> None:
+        if self._conn is None:
+            return
+        with suppress(Exception):
+            await self._conn.close()
+        self._conn = None
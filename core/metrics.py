@@ -0,0 +1,213 @@
+import os
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, ParamSpec, TypeVar
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# --- Bot handlers ---------------------------------------------------------
+
+HANDLER_DURATION = Histogram(
+    "bot_handler_duration_seconds",
+    "Time spent in aiogram handlers",
+    ["router", "event"],
+)
+HANDLER_ERRORS = Counter(
+    "bot_handler_errors_total",
+    "Exceptions raised by aiogram handlers",
+    ["router", "event"],
+)
+UPDATE_ERRORS = Counter(
+    "bot_update_errors_total",
+    "Exceptions that reached the global error handler, by failure kind",
+    ["kind"],
+)
+
+# --- Bot API --------------------------------------------------------------
+
+BOT_API_DURATION = Histogram(
+    "bot_api_request_duration_seconds",
+    "Latency of outgoing Telegram Bot API requests",
+    ["method"],
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+BOT_API_ERRORS = Counter(
+    "bot_api_errors_total",
+    "Failed Telegram Bot API requests by error code",
+    ["method", "code"],
+)
+BOT_API_SCHEDULER_WAIT = Histogram(
+    "bot_api_scheduler_wait_seconds",
+    "Time Bot API sends waited for a rate-limit token, by priority class",
+    ["priority"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+# --- Database -------------------------------------------------------------
+
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Latency of SQL statements grouped by the CRUD function that issued them",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["engine"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "Configured pool size", ["engine"], multiprocess_mode="livesum"
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections opened above pool_size",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_REPLICA_LAG = Gauge(
+    "db_replica_lag_seconds", "Last measured replica replay lag", multiprocess_mode="livemax"
+)
+
+# --- Broadcasts -----------------------------------------------------------
+
+# No broadcast_id label: a series per broadcast would grow without bound.
+# Per-broadcast counts are stored on the broadcast row
+BROADCAST_MESSAGES = Counter(
+    "broadcast_messages_total",
+    "Broadcast deliveries by result: sent or a failure kind from bot/tasks/failures.py",
+    ["result"],
+)
+BROADCASTS_RUNNING = Gauge(
+    "broadcasts_running", "Broadcast tasks currently running", multiprocess_mode="livesum"
+)
+
+# --- Startup --------------------------------------------------------------
+
+APP_STARTUP = Gauge(
+    "app_startup_seconds",
+    "Worker startup duration by step (imports, create_app, lifespan steps) and total",
+    ["step"],
+    multiprocess_mode="liveall",
+)
+
+
+_db_operation: ContextVar[str] = ContextVar("db_operation", default="other")
+
+
+def track_db_operation(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+    """Label every SQL statement executed inside ``func`` with its name."""
+    name = func.__name__
+
+    @wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        token = _db_operation.set(name)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _db_operation.reset(token)
+
+    return wrapper
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info["query_start"].pop()
+    DB_QUERY_DURATION.labels(_db_operation.get()).observe(time.perf_counter() - started)
+
+
+def _handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records checkout wait time under its ``pool_logging_name``."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self.logging_name or "default").observe(
+                time.perf_counter() - started
+            )
+
+
+def _track_pool(name: str, engine: AsyncEngine) -> None:
+    """
+    Keep the pool gauges current from checkout/checkin events. Set per process,
+    so in multiprocess mode they add up over the live workers.
+    """
+    sync_engine = engine.sync_engine
+    size = DB_POOL_SIZE.labels(name)
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    overflow = DB_POOL_OVERFLOW.labels(name)
+
+    def update(returning: int) -> None:
+        # The pool is read at call time: dispose() replaces it
+        pool: Any = sync_engine.pool
+        if not hasattr(pool, "checkedout"):
+            return
+        size.set(pool.size())
+        checked_out.set(pool.checkedout() - returning)
+        overflow.set(max(pool.overflow(), 0))
+
+    update(0)
+    # A connection being checked in is still counted by the pool
+    event.listen(sync_engine, "checkout", lambda *args: update(0))
+    event.listen(sync_engine, "checkin", lambda *args: update(1))
+
+
+def instrument_engine(name: str, engine: AsyncEngine) -> None:
+    """Attach query timing hooks and pool gauges to ``engine``."""
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+    _track_pool(name, engine)
+
+
+def render_metrics() -> bytes:
+    """
+    Metrics in the text format. With PROMETHEUS_MULTIPROC_DIR set (several
+    uvicorn workers) they are merged from every worker's files, so any worker
+    can answer the scrape; otherwise this process's registry is used.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def mark_worker_dead() -> None:
+    """Drop this worker's live gauges from the shared files when it exits."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
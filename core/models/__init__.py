@@ -1,6 +1,20 @@
+from core.models.archived_user import ArchivedUser
 from core.models.broadcast import Broadcast
+from core.models.broadcast_delivery import BroadcastDelivery
+from core.models.bulk_job import BulkJob, BulkJobResult
 from core.models.channel_event import ChannelEvent
 from core.models.setting import Setting
+from core.models.telegram_bot import TelegramBot
 from core.models.user import User
 
-__all__ = ["User", "ChannelEvent", "Setting", "Broadcast"]
+__all__ = [
+    "User",
+    "ChannelEvent",
+    "Setting",
+    "Broadcast",
+    "BroadcastDelivery",
+    "ArchivedUser",
+    "TelegramBot",
+    "BulkJob",
+    "BulkJobResult",
+]
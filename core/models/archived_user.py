@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+    func,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.database import Base
+
+
+class ArchivedUser(Base):
+    """Users blocked for a long time, moved out of ``users`` by the maintenance job."""
+
+    __tablename__ = "users_archive"
+    __table_args__ = (PrimaryKeyConstraint("telegram_id", "bot_id"),)
+
+    telegram_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    bot_id: Mapped[int] = mapped_column(Integer, ForeignKey("bots.id"), nullable=False)
+    username: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    first_name: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    last_name: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    joined_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    is_subscribed: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
+    block_reason: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    blocked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_seen_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    # Last reactivation probe; NULL = never probed
+    probed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<ArchivedUser telegram_id={self.telegram_id} reason={self.block_reason}>"
@@ -1,6 +1,7 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, Integer, String, Text, func
+from sqlalchemy import DateTime, ForeignKey, Integer, LargeBinary, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
 from core.database import Base
@@ -18,6 +19,25 @@ class Broadcast(Base):
     )
     total_sent: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     failed: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # {"counts": {kind: n}, "samples": {kind: [{"chat_id", "error"}]}}, see bot/tasks/failures.py
+    failure_stats: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    # "pending" | "running" | "paused" | "cancelled" | "done" | "interrupted" | "failed"
+    status: Mapped[str] = mapped_column(String(16), default="pending", server_default="pending")
+    # Uploaded image kept until the first send yields a reusable file_id
+    image_data: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    image_filename: Mapped[str | None] = mapped_column(String(256), nullable=True)
+    # Audience bot, fixed when the broadcast first starts so a resume reaches the same users
+    bot_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("bots.id"), nullable=True)
+    # Correction of delivered messages: "pending" | "running" | "done"
+    recall_status: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    # "delete" | "edit"
+    recall_action: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    recall_text: Mapped[str | None] = mapped_column(Text, nullable=True)
+    recalled: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    recall_failed: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
     def __repr__(self) -> str:
-        return f"<Broadcast id={self.id} type={self.type} sent={self.total_sent}>"
+        return (
+            f"<Broadcast id={self.id} type={self.type} status={self.status} "
+            f"sent={self.total_sent}>"
+        )
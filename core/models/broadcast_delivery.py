@@ -0,0 +1,26 @@
+from sqlalchemy import BigInteger, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.database import Base
+
+
+class BroadcastDelivery(Base):
+    """
+    One row per flushed batch of successful sends of a broadcast.
+
+    chat_ids[i] received message message_ids[i]. The recipient's bot is the
+    broadcast's, so (broadcast_id, chat_id) identifies a delivery.
+    """
+
+    __tablename__ = "broadcast_deliveries"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    broadcast_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("broadcasts.id", ondelete="CASCADE"), index=True
+    )
+    chat_ids: Mapped[list[int]] = mapped_column(ARRAY(BigInteger))
+    message_ids: Mapped[list[int]] = mapped_column(ARRAY(BigInteger))
+
+    def __repr__(self) -> str:
+        return f"<BroadcastDelivery broadcast_id={self.broadcast_id} count={len(self.chat_ids)}>"
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.database import Base
+
+
+class BulkJob(Base):
+    """
+    Bulk block/unblock started from the admin panel.
+
+    The worker that received the form runs the channel actions; progress is
+    stored here so every worker can serve the job page.
+    """
+
+    __tablename__ = "bulk_jobs"
+
+    id: Mapped[str] = mapped_column(String(12), primary_key=True)
+    action: Mapped[str] = mapped_column(String(16))  # "block" | "unblock"
+    total: Mapped[int] = mapped_column(Integer)
+    done: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    failed: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    finished: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
+    # Submitted IDs in order, and those whose DB state the job changed
+    telegram_ids: Mapped[list[int]] = mapped_column(ARRAY(BigInteger))
+    changed_ids: Mapped[list[int]] = mapped_column(ARRAY(BigInteger))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"<BulkJob id={self.id} action={self.action} done={self.done}/{self.total}>"
+
+
+class BulkJobResult(Base):
+    """
+    One row per flushed batch of finished IDs of a bulk job, in completion order.
+
+    telegram_ids[i] got results[i]; ``position`` is the number of IDs that
+    finished before the batch, so a poll can ask for everything after an offset.
+    """
+
+    __tablename__ = "bulk_job_results"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    job_id: Mapped[str] = mapped_column(
+        String(12), ForeignKey("bulk_jobs.id", ondelete="CASCADE"), index=True
+    )
+    position: Mapped[int] = mapped_column(Integer)
+    telegram_ids: Mapped[list[int]] = mapped_column(ARRAY(BigInteger))
+    results: Mapped[list[str]] = mapped_column(ARRAY(Text))
+
+    def __repr__(self) -> str:
+        return f"<BulkJobResult job_id={self.job_id} position={self.position}>"
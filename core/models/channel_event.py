@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import BigInteger, DateTime, Integer, String, func
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from core.database import Base
@@ -8,9 +8,12 @@ from core.database import Base
 
 class ChannelEvent(Base):
     __tablename__ = "channel_events"
+    __table_args__ = (Index("ix_channel_events_occurred_at", text("occurred_at DESC")),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(BigInteger)
+    # NULL for events recorded before bots were tracked and not attributable to one bot
+    bot_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("bots.id"), nullable=True)
     event_type: Mapped[str] = mapped_column(String(32))  # "subscribed" | "unsubscribed"
     occurred_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
@@ -18,8 +21,10 @@ class ChannelEvent(Base):
 
     user: Mapped["User"] = relationship(  # noqa: F821
         "User",
-        primaryjoin="ChannelEvent.user_id == User.telegram_id",
-        foreign_keys="[ChannelEvent.user_id]",
+        primaryjoin=(
+            "and_(ChannelEvent.user_id == User.telegram_id, ChannelEvent.bot_id == User.bot_id)"
+        ),
+        foreign_keys="[ChannelEvent.user_id, ChannelEvent.bot_id]",
         viewonly=True,
     )
 
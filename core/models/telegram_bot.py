@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.database import Base
+
+
+class TelegramBot(Base):
+    """
+    One row per Telegram bot; users, archived users, events and broadcasts refer to it by ``id``.
+
+    The bot is identified by the numeric prefix of its token, so a rotated token
+    updates ``token`` in place and keeps the audience.
+    """
+
+    __tablename__ = "bots"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # NULL only for legacy rows whose token has no numeric prefix
+    telegram_bot_id: Mapped[int | None] = mapped_column(BigInteger, unique=True, nullable=True)
+    token: Mapped[str] = mapped_column(String(128), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"<TelegramBot id={self.id} telegram_bot_id={self.telegram_bot_id}>"
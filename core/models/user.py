@@ -1,6 +1,17 @@
 from datetime import datetime
 
-from sqlalchemy import BigInteger, Boolean, DateTime, PrimaryKeyConstraint, String, func
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+    func,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from core.database import Base
@@ -8,10 +19,24 @@ from core.database import Base
 
 class User(Base):
     __tablename__ = "users"
-    __table_args__ = (PrimaryKeyConstraint("telegram_id", "bot_token"),)
+    __table_args__ = (
+        PrimaryKeyConstraint("telegram_id", "bot_id"),
+        # Migrations 0010/0011; see the comments there
+        Index(
+            "ix_users_active_audience",
+            "bot_id",
+            "telegram_id",
+            postgresql_where=text("NOT is_blocked"),
+        ),
+        Index("ix_users_blocked", "bot_id", "blocked_at", postgresql_where=text("is_blocked")),
+        Index("ix_users_subscription", "bot_id", "is_subscribed"),
+        Index("ix_users_bot_id_joined_at", "bot_id", text("joined_at DESC")),
+        # Search indexes of migration 0012 depend on pg_trgm being available
+        # and are not declared here
+    )
 
     telegram_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
-    bot_token: Mapped[str] = mapped_column(String(128), nullable=False)
+    bot_id: Mapped[int] = mapped_column(Integer, ForeignKey("bots.id"), nullable=False)
     username: Mapped[str | None] = mapped_column(String(64), nullable=True)
     first_name: Mapped[str | None] = mapped_column(String(128), nullable=True)
     last_name: Mapped[str | None] = mapped_column(String(128), nullable=True)
@@ -19,7 +44,13 @@ class User(Base):
         DateTime(timezone=True), server_default=func.now()
     )
     is_blocked: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
+    # Why is_blocked was set: "blocked" | "deactivated" | "forbidden" | "chat_not_found" | "admin"
+    block_reason: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    # Long-blocked users are moved to users_archive (bot/tasks/maintenance.py)
+    blocked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     is_subscribed: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
+    # Last update from the user; written in batches by bot/middlewares/activity.py
+    last_seen_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     def __repr__(self) -> str:
         return f"<User telegram_id={self.telegram_id} username={self.username}>"
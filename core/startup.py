@@ -0,0 +1,63 @@
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from loguru import logger
+
+
+def _process_age() -> float | None:
+    """Seconds since this process started (Linux), None where /proc is unavailable."""
+    try:
+        with open("/proc/self/stat") as stat:
+            # Fields after the command name; starttime is field 22 of the whole line
+            fields = stat.read().rsplit(")", 1)[1].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - started
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupTimer:
+    """
+    Durations of the startup steps of a worker, from process start to ready.
+
+    The clock starts when the process started (or, without /proc, when this
+    module was imported), so the first ``mark()`` covers the interpreter, uvicorn
+    and every module imported before it. Each later ``mark()`` covers the time
+    since the previous one; ``step()`` times a block.
+    """
+
+    def __init__(self) -> None:
+        self._started = time.perf_counter() - (_process_age() or 0.0)
+        self._last = self._started
+        self.steps: dict[str, float] = {}
+        self.total: float | None = None
+
+    def mark(self, name: str) -> None:
+        now = time.perf_counter()
+        self.steps[name] = now - self._last
+        self._last = now
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._last = time.perf_counter()
+            self.steps[name] = self._last - started
+
+    def report(self) -> None:
+        """Log the steps and export them as ``app_startup_seconds{step}``."""
+        from core.metrics import APP_STARTUP
+
+        self.total = time.perf_counter() - self._started
+        for name, seconds in self.steps.items():
+            APP_STARTUP.labels(step=name).set(seconds)
+        APP_STARTUP.labels(step="total").set(self.total)
+        steps = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.steps.items())
+        logger.info(f"Worker ready in {self.total:.2f}s: {steps}")
+
+
+startup_timer = StartupTimer()
@@ -0,0 +1,40 @@
+"""Broadcast queue: status and pending image upload
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows were sent by the old in-process task — mark them done
+    op.add_column(
+        "broadcasts",
+        sa.Column("status", sa.String(length=16), server_default="done", nullable=False),
+    )
+    op.alter_column("broadcasts", "status", server_default="pending")
+    op.add_column("broadcasts", sa.Column("image_data", sa.LargeBinary(), nullable=True))
+    op.add_column("broadcasts", sa.Column("image_filename", sa.String(length=256), nullable=True))
+    op.create_index(
+        "ix_broadcasts_status_queued",
+        "broadcasts",
+        ["id"],
+        postgresql_where=sa.text("status IN ('pending', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_broadcasts_status_queued", table_name="broadcasts")
+    op.drop_column("broadcasts", "image_filename")
+    op.drop_column("broadcasts", "image_data")
+    op.drop_column("broadcasts", "status")
@@ -0,0 +1,39 @@
+"""Broadcast deliveries: delivered chat/message ids per broadcast
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("broadcasts", sa.Column("bot_token", sa.String(length=128), nullable=True))
+    op.create_table(
+        "broadcast_deliveries",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("broadcast_id", sa.Integer(), nullable=False),
+        sa.Column("chat_ids", postgresql.ARRAY(sa.BigInteger()), nullable=False),
+        sa.Column("message_ids", postgresql.ARRAY(sa.BigInteger()), nullable=False),
+        sa.ForeignKeyConstraint(["broadcast_id"], ["broadcasts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_broadcast_deliveries_broadcast_id", "broadcast_deliveries", ["broadcast_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_broadcast_deliveries_broadcast_id", table_name="broadcast_deliveries")
+    op.drop_table("broadcast_deliveries")
+    op.drop_column("broadcasts", "bot_token")
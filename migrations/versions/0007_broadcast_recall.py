@@ -0,0 +1,45 @@
+"""Broadcast recall: delete or edit delivered messages
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("broadcasts", sa.Column("recall_status", sa.String(length=16), nullable=True))
+    op.add_column("broadcasts", sa.Column("recall_action", sa.String(length=16), nullable=True))
+    op.add_column("broadcasts", sa.Column("recall_text", sa.Text(), nullable=True))
+    op.add_column(
+        "broadcasts",
+        sa.Column("recalled", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "broadcasts",
+        sa.Column("recall_failed", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.create_index(
+        "ix_broadcasts_recall_queued",
+        "broadcasts",
+        ["id"],
+        postgresql_where=sa.text("recall_status IN ('pending', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_broadcasts_recall_queued", table_name="broadcasts")
+    op.drop_column("broadcasts", "recall_failed")
+    op.drop_column("broadcasts", "recalled")
+    op.drop_column("broadcasts", "recall_text")
+    op.drop_column("broadcasts", "recall_action")
+    op.drop_column("broadcasts", "recall_status")
@@ -0,0 +1,30 @@
+"""Broadcast failure breakdown and user block reason
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "broadcasts",
+        sa.Column("failure_stats", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+    op.add_column("users", sa.Column("block_reason", sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("users", "block_reason")
+    op.drop_column("broadcasts", "failure_stats")
@@ -0,0 +1,63 @@
+"""Users archive: blocked_at and a cold table for long-blocked users
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("blocked_at", sa.DateTime(timezone=True), nullable=True))
+    # Block time of existing rows is unknown: start their archive countdown now
+    op.execute("UPDATE users SET blocked_at = now() WHERE is_blocked")
+
+    op.create_table(
+        "users_archive",
+        sa.Column("telegram_id", sa.BigInteger(), nullable=False),
+        sa.Column("bot_token", sa.String(length=128), nullable=False),
+        sa.Column("username", sa.String(length=64), nullable=True),
+        sa.Column("first_name", sa.String(length=128), nullable=True),
+        sa.Column("last_name", sa.String(length=128), nullable=True),
+        sa.Column("joined_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("is_subscribed", sa.Boolean(), server_default="false", nullable=False),
+        sa.Column("block_reason", sa.String(length=32), nullable=True),
+        sa.Column("blocked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "archived_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.Column("probed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("telegram_id", "bot_token"),
+    )
+    # Probe queue: never-probed users first, then the longest-unprobed
+    op.create_index(
+        "ix_users_archive_probe",
+        "users_archive",
+        ["bot_token", sa.text("probed_at NULLS FIRST")],
+    )
+
+
+def downgrade() -> None:
+    # Archived users go back to the hot table as blocked
+    op.execute(
+        """
+        INSERT INTO users (telegram_id, bot_token, username, first_name, last_name,
+                           joined_at, is_blocked, is_subscribed, block_reason)
+        SELECT telegram_id, bot_token, username, first_name, last_name,
+               joined_at, true, is_subscribed, block_reason
+        FROM users_archive
+        ON CONFLICT DO NOTHING
+        """
+    )
+    op.drop_index("ix_users_archive_probe", table_name="users_archive")
+    op.drop_table("users_archive")
+    op.drop_column("users", "blocked_at")
@@ -0,0 +1,53 @@
+"""Partial and covering indexes for audience, count and list queries
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 00:00:00.000000
+
+Built CONCURRENTLY so a deploy doesn't lock users against writes; each index
+runs outside the migration transaction.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name, table, columns, partial predicate
+INDEXES = [
+    # Broadcast audience and "active" counts: index-only scan on (bot_token, telegram_id)
+    ("ix_users_active_audience", "users", ["bot_token", "telegram_id"], "NOT is_blocked"),
+    # Blocked counts and the archive job (blocked_at cutoff)
+    ("ix_users_blocked", "users", ["bot_token", "blocked_at"], "is_blocked"),
+    # Subscribed/unsubscribed counts
+    ("ix_users_subscription", "users", ["bot_token", "is_subscribed"], None),
+    # User list: newest first per bot, and count_users
+    ("ix_users_bot_token_joined_at", "users", ["bot_token", sa.text("joined_at DESC")], None),
+    # Subscriptions page: newest events first
+    ("ix_channel_events_occurred_at", "channel_events", [sa.text("occurred_at DESC")], None),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+    op.execute("ANALYZE users")
+    op.execute("ANALYZE channel_events")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
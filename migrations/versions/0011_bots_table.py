@@ -0,0 +1,297 @@
+"""Bots dimension table: users, archive, broadcasts and events reference bots.id
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 00:00:00.000000
+
+Every distinct token becomes a row in ``bots``; tokens with the same numeric
+prefix (rotations of one bot) share a row, so users orphaned under an old
+token are merged back into the bot. Big tables are backfilled in keyset
+batches outside the migration transaction, so each batch commits on its own
+and no long lock is held while rows are rewritten.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH = 50_000
+
+# name, columns, partial predicate; the 0010 indexes keyed by bot_id instead of bot_token
+USER_INDEXES = [
+    ("ix_users_active_audience", ["bot_id", "telegram_id"], "NOT is_blocked"),
+    ("ix_users_blocked", ["bot_id", "blocked_at"], "is_blocked"),
+    ("ix_users_subscription", ["bot_id", "is_subscribed"], None),
+    ("ix_users_bot_id_joined_at", ["bot_id", sa.text("joined_at DESC")], None),
+]
+LEGACY_USER_INDEXES = [
+    ("ix_users_active_audience", ["bot_token", "telegram_id"], "NOT is_blocked"),
+    ("ix_users_blocked", ["bot_token", "blocked_at"], "is_blocked"),
+    ("ix_users_subscription", ["bot_token", "is_subscribed"], None),
+    ("ix_users_bot_token_joined_at", ["bot_token", sa.text("joined_at DESC")], None),
+]
+
+
+def _update_in_batches(table: str, key: str, statement: str) -> None:
+    """
+    Run ``statement`` over ``table`` in slices of about BATCH rows ordered by ``key``.
+
+    ``statement`` filters on ``:after < key <= :upto``. Each slice commits on its
+    own (call inside an autocommit block).
+    """
+    conn = op.get_bind()
+    next_bound = sa.text(
+        f"SELECT {key} FROM {table} WHERE {key} > :after ORDER BY {key} OFFSET :batch LIMIT 1"
+    )
+    after = conn.execute(sa.text(f"SELECT min({key}) - 1 FROM {table}")).scalar()
+    if after is None:
+        return
+    while True:
+        upto = conn.execute(next_bound, {"after": after, "batch": BATCH}).scalar()
+        last = upto is None
+        if last:
+            upto = conn.execute(sa.text(f"SELECT max({key}) FROM {table}")).scalar()
+        conn.execute(sa.text(statement), {"after": after, "upto": upto})
+        if last:
+            return
+        after = upto
+
+
+def _create_user_indexes(indexes: list) -> None:
+    for name, columns, where in indexes:
+        op.create_index(
+            name,
+            "users",
+            columns,
+            postgresql_where=sa.text(where) if where else None,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def _drop_user_indexes(indexes: list) -> None:
+    for name, _, _ in indexes:
+        op.drop_index(name, table_name="users", postgresql_concurrently=True, if_exists=True)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "bots",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("telegram_bot_id", sa.BigInteger(), nullable=True),
+        sa.Column("token", sa.String(length=128), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("telegram_bot_id"),
+    )
+
+    # Every token in use; the one in settings wins when a bot has several
+    op.execute(
+        """
+        CREATE TABLE _bot_tokens AS
+        SELECT token,
+               CASE WHEN token ~ '^[0-9]+:' THEN split_part(token, ':', 1)::bigint END
+                   AS telegram_bot_id,
+               min(rank) AS rank
+        FROM (
+            SELECT value AS token, 0 AS rank FROM settings WHERE key = 'bot_token' AND value <> ''
+            UNION ALL SELECT DISTINCT bot_token, 1 FROM users
+            UNION ALL SELECT DISTINCT bot_token, 1 FROM users_archive
+            UNION ALL SELECT DISTINCT bot_token, 1 FROM broadcasts WHERE bot_token IS NOT NULL
+        ) AS tokens
+        GROUP BY token
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO bots (telegram_bot_id, token)
+        SELECT DISTINCT ON (telegram_bot_id) telegram_bot_id, token
+        FROM _bot_tokens
+        WHERE telegram_bot_id IS NOT NULL
+        ORDER BY telegram_bot_id, rank, token DESC
+        """
+    )
+    # Legacy tokens without a numeric prefix (e.g. '' from 0004) keep a row each
+    op.execute(
+        "INSERT INTO bots (token) SELECT token FROM _bot_tokens WHERE telegram_bot_id IS NULL"
+    )
+    op.execute(
+        """
+        CREATE TABLE _bot_token_map AS
+        SELECT t.token, b.id AS bot_id
+        FROM _bot_tokens t
+        JOIN bots b ON b.telegram_bot_id = t.telegram_bot_id
+                    OR (t.telegram_bot_id IS NULL AND b.telegram_bot_id IS NULL
+                        AND b.token = t.token)
+        """
+    )
+    op.execute("ALTER TABLE _bot_token_map ADD PRIMARY KEY (token)")
+
+    for table in ("users", "users_archive", "broadcasts", "channel_events"):
+        op.add_column(table, sa.Column("bot_id", sa.Integer(), nullable=True))
+
+    op.execute(
+        """
+        UPDATE broadcasts b SET bot_id = m.bot_id
+        FROM _bot_token_map m WHERE m.token = b.bot_token
+        """
+    )
+    # Events only knew the user: attribute them where the user belongs to exactly one bot
+    op.execute(
+        """
+        CREATE TABLE _event_owners AS
+        SELECT telegram_id, min(bot_id) AS bot_id FROM (
+            SELECT telegram_id, m.bot_id FROM users u JOIN _bot_token_map m ON m.token = u.bot_token
+        ) AS owners
+        GROUP BY telegram_id
+        HAVING count(DISTINCT bot_id) = 1
+        """
+    )
+    op.execute("ALTER TABLE _event_owners ADD PRIMARY KEY (telegram_id)")
+
+    with op.get_context().autocommit_block():
+        for table in ("users", "users_archive"):
+            _update_in_batches(
+                table,
+                "telegram_id",
+                f"""
+                UPDATE {table} t SET bot_id = m.bot_id
+                FROM _bot_token_map m
+                WHERE m.token = t.bot_token AND t.telegram_id > :after AND t.telegram_id <= :upto
+                """,
+            )
+        _update_in_batches(
+            "channel_events",
+            "id",
+            """
+            UPDATE channel_events e SET bot_id = o.bot_id
+            FROM _event_owners o
+            WHERE o.telegram_id = e.user_id AND e.id > :after AND e.id <= :upto
+            """,
+        )
+
+    # Rotated tokens of one bot: the same user may now appear twice, keep the newest row
+    for table, newest in (("users", "joined_at"), ("users_archive", "archived_at")):
+        op.execute(
+            f"""
+            DELETE FROM {table} t USING {table} d
+            WHERE t.bot_id IN (
+                SELECT bot_id FROM _bot_token_map GROUP BY bot_id HAVING count(*) > 1
+            )
+              AND d.telegram_id = t.telegram_id AND d.bot_id = t.bot_id
+              AND (t.{newest}, t.ctid) < (d.{newest}, d.ctid)
+            """
+        )
+
+    # Build the new keys without blocking writes, then swap them in
+    with op.get_context().autocommit_block():
+        _drop_user_indexes(LEGACY_USER_INDEXES)
+        op.create_index(
+            "users_telegram_id_bot_id_key",
+            "users",
+            ["telegram_id", "bot_id"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        _create_user_indexes(USER_INDEXES)
+
+    # Rows written by the old code while the backfill ran
+    op.execute(
+        """
+        UPDATE users t SET bot_id = m.bot_id
+        FROM _bot_token_map m WHERE t.bot_id IS NULL AND m.token = t.bot_token
+        """
+    )
+    op.alter_column("users", "bot_id", nullable=False)
+    op.execute(
+        """
+        ALTER TABLE users
+            DROP CONSTRAINT users_pkey,
+            ADD CONSTRAINT users_pkey PRIMARY KEY USING INDEX users_telegram_id_bot_id_key
+        """
+    )
+    op.drop_column("users", "bot_token")
+
+    op.drop_index("ix_users_archive_probe", table_name="users_archive")
+    op.alter_column("users_archive", "bot_id", nullable=False)
+    op.drop_constraint("users_archive_pkey", "users_archive", type_="primary")
+    op.create_primary_key("users_archive_pkey", "users_archive", ["telegram_id", "bot_id"])
+    op.drop_column("users_archive", "bot_token")
+    op.create_index(
+        "ix_users_archive_probe",
+        "users_archive",
+        ["bot_id", sa.text("probed_at NULLS FIRST")],
+    )
+
+    op.drop_column("broadcasts", "bot_token")
+
+    for table in ("users", "users_archive", "broadcasts"):
+        op.create_foreign_key(f"{table}_bot_id_fkey", table, "bots", ["bot_id"], ["id"])
+    # channel_events is the biggest table: validate the key without blocking writes
+    op.create_foreign_key(
+        "channel_events_bot_id_fkey",
+        "channel_events",
+        "bots",
+        ["bot_id"],
+        ["id"],
+        postgresql_not_valid=True,
+    )
+    op.execute("ALTER TABLE channel_events VALIDATE CONSTRAINT channel_events_bot_id_fkey")
+
+    op.drop_table("_event_owners")
+    op.drop_table("_bot_token_map")
+    op.drop_table("_bot_tokens")
+    op.execute("ANALYZE bots")
+    op.execute("ANALYZE users")
+    op.execute("ANALYZE users_archive")
+    op.execute("ANALYZE channel_events")
+
+
+def downgrade() -> None:
+    op.drop_constraint("channel_events_bot_id_fkey", "channel_events", type_="foreignkey")
+    op.drop_column("channel_events", "bot_id")
+
+    op.add_column("broadcasts", sa.Column("bot_token", sa.String(length=128), nullable=True))
+    op.execute("UPDATE broadcasts b SET bot_token = bots.token FROM bots WHERE bots.id = b.bot_id")
+    op.drop_constraint("broadcasts_bot_id_fkey", "broadcasts", type_="foreignkey")
+    op.drop_column("broadcasts", "bot_id")
+
+    for table in ("users", "users_archive"):
+        op.add_column(table, sa.Column("bot_token", sa.String(length=128), nullable=True))
+    with op.get_context().autocommit_block():
+        for table in ("users", "users_archive"):
+            _update_in_batches(
+                table,
+                "telegram_id",
+                f"""
+                UPDATE {table} t SET bot_token = bots.token
+                FROM bots
+                WHERE bots.id = t.bot_id AND t.telegram_id > :after AND t.telegram_id <= :upto
+                """,
+            )
+        _drop_user_indexes(USER_INDEXES)
+
+    op.drop_index("ix_users_archive_probe", table_name="users_archive")
+    for table in ("users", "users_archive"):
+        op.alter_column(table, "bot_token", nullable=False)
+        op.drop_constraint(f"{table}_pkey", table, type_="primary")
+        op.create_primary_key(f"{table}_pkey", table, ["telegram_id", "bot_token"])
+        op.drop_constraint(f"{table}_bot_id_fkey", table, type_="foreignkey")
+        op.drop_column(table, "bot_id")
+    op.create_index(
+        "ix_users_archive_probe",
+        "users_archive",
+        ["bot_token", sa.text("probed_at NULLS FIRST")],
+    )
+
+    with op.get_context().autocommit_block():
+        _create_user_indexes(LEGACY_USER_INDEXES)
+
+    op.drop_table("bots")
@@ -0,0 +1,27 @@
+"""User last_seen_at
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 00:00:00.000000
+
+No index: every flush would have to update it for each active user.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0013"
+down_revision: Union[str, None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ("users", "users_archive"):
+        op.add_column(table, sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    for table in ("users", "users_archive"):
+        op.drop_column(table, "last_seen_at")
@@ -0,0 +1,52 @@
+"""Data-version sequences for admin page ETags
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19 00:00:00.000000
+
+A statement-level trigger on each table shown by the admin pages advances
+its own sequence on every write. Workers read the sequences' last_value every
+few seconds (admin/caching.py) and build page ETags from them. nextval() takes
+no row lock and is not rolled back, so concurrent writers never wait on each
+other; a rolled-back write only costs one extra cache miss. One call per
+statement, not per row, keeps bulk updates of users as cheap as before.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0014"
+down_revision: Union[str, None] = "0013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("users", "users_archive", "channel_events", "broadcasts", "settings", "bots")
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE FUNCTION bump_data_version() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM nextval(TG_ARGV[0]);
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    for table in TABLES:
+        op.execute(f"CREATE SEQUENCE {table}_data_version_seq")
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_data_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('{table}_data_version_seq')
+            """
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER {table}_data_version ON {table}")
+        op.execute(f"DROP SEQUENCE {table}_data_version_seq")
+    op.execute("DROP FUNCTION bump_data_version()")
@@ -0,0 +1,54 @@
+"""Bulk user jobs and their results
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-19 00:00:00.000000
+
+Kept in the database instead of the memory of the worker that started the job,
+so the job page and its progress polls work on any worker.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0015"
+down_revision: Union[str, None] = "0014"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "bulk_jobs",
+        sa.Column("id", sa.String(length=12), nullable=False),
+        sa.Column("action", sa.String(length=16), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("done", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("failed", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("finished", sa.Boolean(), server_default="false", nullable=False),
+        sa.Column("telegram_ids", postgresql.ARRAY(sa.BigInteger()), nullable=False),
+        sa.Column("changed_ids", postgresql.ARRAY(sa.BigInteger()), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "bulk_job_results",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("job_id", sa.String(length=12), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("telegram_ids", postgresql.ARRAY(sa.BigInteger()), nullable=False),
+        sa.Column("results", postgresql.ARRAY(sa.Text()), nullable=False),
+        sa.ForeignKeyConstraint(["job_id"], ["bulk_jobs.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_bulk_job_results_job_id", "bulk_job_results", ["job_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bulk_job_results_job_id", table_name="bulk_job_results")
+    op.drop_table("bulk_job_results")
+    op.drop_table("bulk_jobs")
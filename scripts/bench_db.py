@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Benchmark CRUD hot paths and admin endpoints at several data scales.
+
+For every scale the database is re-seeded with scripts/seed_data.py (users
+across 10 bots, 10 events per user), then each CRUD function in
+core/crud/{users,user_archive,channel_events,broadcasts}.py and each admin page is timed
+over several runs. The SQL statements issued by every CRUD benchmark are
+captured and re-run under EXPLAIN (ANALYZE, BUFFERS) inside a rolled-back
+transaction, so plans for writes are safe to collect too.
+
+DO NOT run against production: seeding truncates users and channel_events.
+
+Usage:
+    python scripts/bench_db.py --scales 10000,100000,1000000 --output bench.json
+    python scripts/bench_db.py --no-seed --runs 10      # benchmark the data already loaded
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+from sqlalchemy import delete, event, func, select  # noqa: E402
+
+from admin.auth import COOKIE_NAME, create_session_cookie  # noqa: E402
+from admin.main import app  # noqa: E402
+from core.config import settings  # noqa: E402
+from core.crud import bots, broadcasts, channel_events, user_archive, users  # noqa: E402
+from core.database import AdminSessionLocal, admin_engine, dispose_engines  # noqa: E402
+from core.models.broadcast import Broadcast  # noqa: E402
+from core.models.user import User  # noqa: E402
+from scripts.seed_data import seed, seed_token  # noqa: E402
+
+EVENTS_PER_USER = 10
+BOTS = 10
+ADMIN_PAGES = [
+    "/admin/",
+    "/admin/users",
+    "/admin/users?status=blocked",
+    "/admin/users?page=1000",
+    "/admin/subscriptions",
+    "/admin/subscriptions?page=1000",
+    "/admin/broadcast",
+]
+
+
+class StatementCapture:
+    """Collects (statement, parameters) issued on the admin engine while enabled."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.statements: list[tuple[str, Any]] = []
+        event.listen(admin_engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if self.enabled and not executemany:
+            self.statements.append((statement, parameters))
+
+
+async def _explain(statements: list[tuple[str, Any]]) -> list[str]:
+    plans = []
+    async with admin_engine.connect() as conn:
+        for statement, parameters in statements:
+            verb = statement.lstrip().upper()
+            if not verb.startswith(("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")):
+                continue
+            transaction = await conn.begin()
+            try:
+                result = await conn.exec_driver_sql(
+                    "EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters
+                )
+                plans.append("\n".join(row[0] for row in result))
+            except Exception as exc:
+                plans.append(f"-- EXPLAIN failed: {exc}\n{statement}")
+            finally:
+                await transaction.rollback()
+    return plans
+
+
+def _summary(durations: list[float]) -> dict[str, float]:
+    ordered = sorted(durations)
+    return {
+        "runs": len(ordered),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def _time_crud(
+    name: str,
+    call: Callable[[Any], Awaitable[Any]],
+    runs: int,
+    capture: StatementCapture,
+    explain: bool,
+) -> dict[str, Any]:
+    durations = []
+    for run in range(runs):
+        async with AdminSessionLocal() as session:
+            capture.enabled = run == 0
+            capture.statements.clear()
+            started = time.perf_counter()
+            await call(session)
+            durations.append(time.perf_counter() - started)
+            capture.enabled = False
+            captured = list(capture.statements)
+        if run == 0 and explain:
+            plans = await _explain(captured)
+    result: dict[str, Any] = _summary(durations)
+    if explain:
+        result["plans"] = plans
+    print(f"  {name:<40} median {result['median_ms']:>10.3f} ms", file=sys.stderr)
+    return result
+
+
+async def _bench_crud(runs: int, explain: bool, capture: StatementCapture) -> dict[str, Any]:
+    async with AdminSessionLocal() as session:
+        big_bot = await bots.find_bot_id(session, seed_token(0))
+        small_bot = await bots.find_bot_id(session, seed_token(BOTS - 1))
+        sample_ids = list(
+            (await session.execute(
+                select(User.telegram_id).where(User.bot_id == big_bot).limit(1000)
+            )).scalars()
+        )
+        total_users = (await session.execute(select(func.count()).select_from(User))).scalar_one()
+    if not sample_ids:
+        raise SystemExit("No seeded users found — run without --no-seed first")
+    user_id = sample_ids[0]
+    deep_offset = max(total_users // 2, 0)
+    import_rows = [{"telegram_id": telegram_id} for telegram_id in sample_ids]
+
+    async def blocked_roundtrip(session):
+        await users.mark_user_blocked(session, user_id, big_bot)
+        await users.mark_user_unblocked(session, user_id, big_bot)
+
+    async def bulk_block_roundtrip(session):
+        await users.set_users_blocked(session, sample_ids, big_bot, True)
+        await users.set_users_blocked(session, sample_ids, big_bot, False)
+
+    async def broadcast_queue_roundtrip(session):
+        created = await broadcasts.create_broadcast(
+            session, type="text", text="bench", image_file_id=None
+        )
+        await broadcasts.claim_next_broadcast(session, big_bot)
+        await broadcasts.set_broadcast_status(session, created.id, "done")
+        await session.execute(delete(Broadcast).where(Broadcast.id == created.id))
+        await session.commit()
+
+    cases: dict[str, Callable[[Any], Awaitable[Any]]] = {
+        "users.get_user": lambda s: users.get_user(s, user_id, big_bot),
+        "users.upsert_user": lambda s: (
+            users.upsert_user(s, user_id, big_bot, username=f"user{user_id}")
+        ),
+        "users.get_all_active_users(small bot)": lambda s: users.get_all_active_users(s, small_bot),
+        "users.get_all_active_users(big bot)": lambda s: users.get_all_active_users(s, big_bot),
+        "users.get_active_user_ids(small bot)": lambda s: users.get_active_user_ids(s, small_bot),
+        "users.get_active_user_ids(big bot)": lambda s: users.get_active_user_ids(s, big_bot),
+        "users.get_users_paginated(first)": lambda s: users.get_users_paginated(s, bot_id=big_bot),
+        "users.get_users_paginated(deep)": lambda s: users.get_users_paginated(
+            s, offset=deep_offset, bot_id=big_bot
+        ),
+        "users.get_users_paginated(blocked)": lambda s: users.get_users_paginated(
+            s, bot_id=big_bot, status="blocked"
+        ),
+        "users.search_users(id prefix)": lambda s: users.search_users(
+            s, str(user_id)[:6], bot_id=big_bot
+        ),
+        "users.search_users(name)": lambda s: (
+            users.search_users(s, f"user{user_id}"[:9], bot_id=big_bot)
+        ),
+        "users.count_users": lambda s: users.count_users(s, big_bot),
+        "users.count_blocked": lambda s: users.count_blocked(s, big_bot),
+        "users.mark_user_blocked+unblocked": blocked_roundtrip,
+        "users.set_user_subscribed": lambda s: users.set_user_subscribed(s, user_id, big_bot, True),
+        "users.set_users_blocked(1000 x2)": bulk_block_roundtrip,
+        "users.import_users(1000 existing)": lambda s: users.import_users(s, import_rows, big_bot),
+        "user_archive.count_archived": lambda s: user_archive.count_archived(s, big_bot),
+        "user_archive.archive_blocked_users(none due)": lambda s: (
+            user_archive.archive_blocked_users(s, datetime(2000, 1, 1, tzinfo=timezone.utc), 5000)
+        ),
+        "channel_events.create_event": lambda s: channel_events.create_event(
+            s, user_id, "subscribed", big_bot
+        ),
+        "channel_events.get_events_paginated(first)": lambda s: (
+            channel_events.get_events_paginated(s)
+        ),
+        "channel_events.get_events_paginated(deep)": lambda s: channel_events.get_events_paginated(
+            s, offset=deep_offset
+        ),
+        "channel_events.count_subscribed": lambda s: channel_events.count_subscribed(s, big_bot),
+        "channel_events.count_unsubscribed": lambda s: (
+            channel_events.count_unsubscribed(s, big_bot)
+        ),
+        "broadcasts.get_broadcasts": lambda s: broadcasts.get_broadcasts(s),
+        "broadcasts.create+claim+finish": broadcast_queue_roundtrip,
+    }
+
+    results = {}
+    for name, call in cases.items():
+        results[name] = await _time_crud(name, call, runs, capture, explain)
+    return results
+
+
+async def _bench_admin(runs: int) -> dict[str, Any]:
+    # No lifespan: only templates and the DB are needed, not the bot or leader election
+    transport = httpx.ASGITransport(app=app)
+    cookies = {COOKIE_NAME: create_session_cookie(settings.admin_username)}
+    results = {}
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", cookies=cookies
+    ) as client:
+        for path in ADMIN_PAGES:
+            durations = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                response = await client.get(path)
+                durations.append(time.perf_counter() - started)
+                response.raise_for_status()
+            results[path] = _summary(durations)
+            print(
+                f"  GET {path:<36} median {results[path]['median_ms']:>10.3f} ms", file=sys.stderr
+            )
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="CRUD and admin endpoint benchmark")
+    parser.add_argument(
+        "--scales", default="10000,100000,1000000", help="Comma-separated user counts"
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Runs per benchmark")
+    parser.add_argument("--no-seed", action="store_true", help="Benchmark the data already loaded")
+    parser.add_argument("--no-explain", action="store_true", help="Skip EXPLAIN ANALYZE capture")
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    args = parser.parse_args()
+
+    capture = StatementCapture()
+    scales = [None] if args.no_seed else [int(s) for s in args.scales.split(",")]
+    report: dict[str, Any] = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "runs": args.runs,
+        "scales": {},
+    }
+    try:
+        for scale in scales:
+            label = "current" if scale is None else str(scale)
+            entry: dict[str, Any] = {}
+            if scale is not None:
+                print(f"Seeding {scale} users...", file=sys.stderr)
+                entry["seed"] = await seed(
+                    settings.database_url,
+                    users=scale,
+                    bots=BOTS,
+                    events=scale * EVENTS_PER_USER,
+                    truncate=True,
+                )
+            print(f"Scale {label}: CRUD", file=sys.stderr)
+            entry["crud"] = await _bench_crud(args.runs, not args.no_explain, capture)
+            print(f"Scale {label}: admin endpoints", file=sys.stderr)
+            entry["admin"] = await _bench_admin(args.runs)
+            report["scales"][label] = entry
+    finally:
+        await dispose_engines()
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Measure event-loop lag while admin logins verify bcrypt passwords.
+
+Runs a burst of concurrent password checks twice: inline on the event loop (the
+old behaviour) and through admin.auth.verify_password (thread pool). A ticker
+task sleeps 10 ms in a loop and records how late it wakes up — that lateness is
+what polling, webhooks and broadcasts would see.
+
+Usage:
+    python scripts/bench_login.py
+    python scripts/bench_login.py --logins 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import bcrypt  # noqa: E402
+
+from admin.auth import BCRYPT_ROUNDS, verify_password  # noqa: E402
+
+TICK = 0.01  # seconds
+
+
+async def _inline_verify(plain: str, hashed: str) -> bool:
+    return bcrypt.checkpw(plain.encode(), hashed.encode())
+
+
+async def _measure(verify, logins: int, hashed: str) -> dict[str, float]:
+    lags: list[float] = []
+    stop = asyncio.Event()
+
+    async def ticker() -> None:
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - started - TICK)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK * 5)
+    started = time.perf_counter()
+    await asyncio.gather(*(verify("wrong-password", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker_task
+
+    lags.sort()
+    return {
+        "total_s": elapsed,
+        "lag_p50_ms": statistics.median(lags) * 1000,
+        "lag_p99_ms": lags[int(len(lags) * 0.99) - 1] * 1000 if len(lags) > 1 else lags[0] * 1000,
+        "lag_max_ms": lags[-1] * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Event-loop lag during concurrent logins")
+    parser.add_argument("--logins", type=int, default=10, help="Concurrent login attempts")
+    args = parser.parse_args()
+
+    hashed = bcrypt.hashpw(b"benchmark-password", bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+
+    for name, verify in (("inline", _inline_verify), ("thread pool", verify_password)):
+        result = await _measure(verify, args.logins, hashed)
+        print(
+            f"{name:>12}: {args.logins} logins in {result['total_s']:.2f}s, "
+            f"loop lag p50 {result['lag_p50_ms']:.1f} ms, "
+            f"p99 {result['lag_p99_ms']:.1f} ms, max {result['lag_max_ms']:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Local fake Telegram Bot API server for load tests.
+
+Answers the methods the bot uses (sendMessage, sendPhoto, getChatMember,
+createChatInviteLink, ban/unban, ...) with minimal valid objects. Latency,
+429 "retry after" responses and 403 "bot was blocked" responses are simulated
+at configurable rates, as are 400 "chat not found" responses for deleted chats.
+Blocked and missing users are picked deterministically from the chat_id, so the
+same users fail on every run.
+
+Usage:
+    python scripts/fake_bot_api.py --port 8081 --latency-ms 40 --rate-429 0.001 --rate-403 0.05
+
+Point a bot at it with:
+    bot.session.api = TelegramAPIServer.from_base("http://127.0.0.1:8081")
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from collections import Counter
+
+from aiohttp import web
+
+# Methods whose result is a Message
+_MESSAGE_METHODS = {"sendmessage", "sendphoto", "copymessage", "forwardmessage"}
+# Methods that fail for chats that blocked the bot or no longer exist
+_CHAT_METHODS = _MESSAGE_METHODS | {"sendchataction"}
+_BOT_USER = {"id": 100000, "is_bot": True, "first_name": "LoadTestBot", "username": "loadtest_bot"}
+
+
+class FakeBotApi:
+    def __init__(
+        self,
+        latency_ms: float = 40.0,
+        jitter_ms: float = 10.0,
+        rate_429: float = 0.0,
+        retry_after: int = 1,
+        rate_403: float = 0.0,
+        rate_not_found: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.rate_403 = rate_403
+        self.rate_not_found = rate_not_found
+        self._random = random.Random(seed)
+        self._message_ids = itertools.count(1)
+        self.calls: Counter[str] = Counter()
+        self.responses: Counter[str] = Counter()
+
+        self.app = web.Application()
+        self.app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner: web.AppRunner | None = None
+
+    @staticmethod
+    def _bucket(chat_id: int) -> int:
+        # Knuth multiplicative hash: stable across runs, evenly spread over IDs
+        return (chat_id * 2654435761) % 10_000
+
+    def is_blocked(self, chat_id: int) -> bool:
+        return self._bucket(chat_id) < self.rate_403 * 10_000
+
+    def is_missing(self, chat_id: int) -> bool:
+        # Taken from the top of the hash range so it never overlaps blocked users
+        return self._bucket(chat_id) >= 10_000 - self.rate_not_found * 10_000
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        return f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {"calls": dict(self.calls), "responses": dict(self.responses)}
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        params = await request.post()
+        self.calls[method] += 1
+
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.rate_429 and self._random.random() < self.rate_429:
+            self.responses["429"] += 1
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                },
+                status=429,
+            )
+
+        chat_id = int(params.get("chat_id") or 0)
+        if method in _CHAT_METHODS and self.is_blocked(chat_id):
+            self.responses["403"] += 1
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 403,
+                    "description": "Forbidden: bot was blocked by the user",
+                },
+                status=403,
+            )
+
+        if method in _CHAT_METHODS and self.is_missing(chat_id):
+            self.responses["400"] += 1
+            return web.json_response(
+                {"ok": False, "error_code": 400, "description": "Bad Request: chat not found"},
+                status=400,
+            )
+
+        self.responses["200"] += 1
+        return web.json_response({"ok": True, "result": self._result(method, chat_id, params)})
+
+    def _result(self, method: str, chat_id: int, params) -> object:
+        if method == "getme":
+            return _BOT_USER
+        if method in _MESSAGE_METHODS:
+            message: dict = {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": _BOT_USER,
+            }
+            if method == "sendphoto":
+                message["photo"] = [
+                    {"file_id": "fake-photo", "file_unique_id": "fake", "width": 1, "height": 1}
+                ]
+                if params.get("caption"):
+                    message["caption"] = params["caption"]
+            else:
+                message["text"] = params.get("text", "")
+            return message
+        if method == "getchatmember":
+            user_id = int(params.get("user_id") or 0)
+            return {
+                "status": "member",
+                "user": {"id": user_id, "is_bot": False, "first_name": "User"},
+            }
+        if method == "createchatinvitelink":
+            return {
+                "invite_link": f"https://t.me/+fake{next(self._message_ids)}",
+                "creator": _BOT_USER,
+                "creates_join_request": False,
+                "is_primary": False,
+                "is_revoked": False,
+            }
+        return True
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Telegram Bot API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument(
+        "--rate-429", type=float, default=0.0, help="Share of requests answered with 429"
+    )
+    parser.add_argument(
+        "--retry-after", type=int, default=1, help="retry_after for 429 responses, seconds"
+    )
+    parser.add_argument(
+        "--rate-403", type=float, default=0.0, help="Share of users that blocked the bot"
+    )
+    parser.add_argument(
+        "--rate-not-found",
+        type=float,
+        default=0.0,
+        help="Share of users answered with 'chat not found'",
+    )
+    args = parser.parse_args()
+
+    api = FakeBotApi(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        rate_403=args.rate_403,
+        rate_not_found=args.rate_not_found,
+    )
+    url = await api.start(args.host, args.port)
+    print(f"Fake Bot API listening on {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await api.stop()
+        print(api.stats())
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Load test for broadcasts and incoming updates against a fake Bot API.
+
+Seeds N synthetic users (tagged with a dedicated bot token) into the database
+from DATABASE_URL, then:
+  * runs bot.tasks.broadcast.run_broadcast for all of them;
+  * feeds synthetic /start messages and chat_member updates through
+    bot.main.create_dispatcher.
+Bot API calls go to scripts/fake_bot_api.py (started in-process unless --api-url
+is given). Results are printed as JSON: msgs/s, p50/p99 latency, DB query
+counts and peak RSS per scenario. Synthetic rows are deleted afterwards.
+
+Use a scratch database — the handlers read the real settings table.
+
+Usage:
+    python scripts/loadtest.py --users 2000 --updates 2000 --rate-403 0.05 --rate-429 0.001
+    python scripts/loadtest.py --no-throttle --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aiogram import Bot  # noqa: E402
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware  # noqa: E402
+from aiogram.client.telegram import TelegramAPIServer  # noqa: E402
+from aiogram.types import Update  # noqa: E402
+from sqlalchemy import delete, event  # noqa: E402
+
+from bot.main import create_bot, create_dispatcher  # noqa: E402
+from bot.middlewares.activity import activity_tracker  # noqa: E402
+from bot.middlewares.scheduler import outbound_scheduler  # noqa: E402
+from bot.tasks import broadcast as broadcast_task  # noqa: E402
+from bot.tasks import executor  # noqa: E402
+from core.crud.bots import get_bot_id  # noqa: E402
+from core.crud.broadcasts import create_broadcast, set_broadcast_status  # noqa: E402
+from core.crud.users import import_users  # noqa: E402
+from core.database import AdminSessionLocal, bulk_engine, dispose_engines, engine  # noqa: E402
+from core.models.broadcast import Broadcast  # noqa: E402
+from core.models.channel_event import ChannelEvent  # noqa: E402
+from core.models.user import User  # noqa: E402
+from scripts.fake_bot_api import FakeBotApi  # noqa: E402
+
+LOADTEST_TOKEN = "100000:loadtest-synthetic-token"
+USER_ID_BASE = 9_000_000_000  # far above real Telegram IDs
+CHANNEL_ID = -1009999999999
+
+
+class QueryCounter:
+    """Counts SQL statements executed on the bot and bulk engines."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        for async_engine in (engine, bulk_engine):
+            event.listen(async_engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args: Any) -> None:
+        self.count += 1
+
+
+class ApiLatencyMiddleware(BaseRequestMiddleware):
+    """Records client-side latency of every Bot API request."""
+
+    def __init__(self) -> None:
+        self.durations: list[float] = []
+
+    async def __call__(self, make_request, bot, method):
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            self.durations.append(time.perf_counter() - started)
+
+
+def _percentiles(values: list[float]) -> dict[str, float | None]:
+    if not values:
+        return {"p50_ms": None, "p99_ms": None}
+    ordered = sorted(values)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 2),
+    }
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _user(user_id: int) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": "Load", "username": f"load{user_id}"}
+
+
+def _start_update(update_id: int, user_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": _user(user_id),
+            "text": "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+        },
+    }
+
+
+def _chat_member_update(update_id: int, user_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "chat_member": {
+            "chat": {"id": CHANNEL_ID, "type": "channel", "title": "Load test"},
+            "from": _user(user_id),
+            "date": int(time.time()),
+            "old_chat_member": {"status": "left", "user": _user(user_id)},
+            "new_chat_member": {"status": "member", "user": _user(user_id)},
+        },
+    }
+
+
+async def _seed_users(count: int) -> None:
+    rows = [
+        {
+            "telegram_id": USER_ID_BASE + i,
+            "username": f"load{i}",
+            "first_name": "Load",
+            "last_name": None,
+        }
+        for i in range(count)
+    ]
+    async with AdminSessionLocal() as session:
+        await import_users(session, rows, bot_id=await get_bot_id(session, LOADTEST_TOKEN))
+
+
+async def _cleanup(broadcast_ids: list[int], max_user_id: int) -> None:
+    async with AdminSessionLocal() as session:
+        await session.execute(
+            delete(ChannelEvent).where(ChannelEvent.user_id.between(USER_ID_BASE, max_user_id))
+        )
+        bot_id = await get_bot_id(session, LOADTEST_TOKEN)
+        await session.execute(delete(User).where(User.bot_id == bot_id))
+        if broadcast_ids:
+            await session.execute(delete(Broadcast).where(Broadcast.id.in_(broadcast_ids)))
+        await session.commit()
+
+
+async def _run_broadcast_scenario(
+    bot: Bot, users: int, latency: ApiLatencyMiddleware, queries: QueryCounter
+) -> tuple[dict, int]:
+    async with AdminSessionLocal() as session:
+        broadcast = await create_broadcast(
+            session, type="text", text="Load test", image_file_id=None
+        )
+        # Keep a running leader's launcher from claiming it
+        await set_broadcast_status(session, broadcast.id, "running")
+
+    latency.durations.clear()
+    queries.count = 0
+    started = time.perf_counter()
+    await broadcast_task.run_broadcast(
+        bot=bot,
+        broadcast_id=broadcast.id,
+        text="Load test",
+        image_file_id=None,
+    )
+    elapsed = time.perf_counter() - started
+
+    async with AdminSessionLocal() as session:
+        stored = await session.get(Broadcast, broadcast.id)
+        sent, failed = stored.total_sent, stored.failed
+        failures = (stored.failure_stats or {}).get("counts", {})
+
+    return {
+        "users": users,
+        "sent": sent,
+        "failed": failed,
+        "failures": failures,
+        "seconds": round(elapsed, 3),
+        "msgs_per_s": round(sent / elapsed, 1) if elapsed else None,
+        "api_requests": len(latency.durations),
+        "api_latency": _percentiles(latency.durations),
+        "db_queries": queries.count,
+        "db_queries_per_msg": round(queries.count / max(users, 1), 2),
+        "peak_rss_mb": _peak_rss_mb(),
+    }, broadcast.id
+
+
+async def _run_updates_scenario(
+    bot: Bot, updates: int, concurrency: int, latency: ApiLatencyMiddleware, queries: QueryCounter
+) -> dict:
+    dp = create_dispatcher()
+    payloads = []
+    for i in range(updates):
+        user_id = USER_ID_BASE + i
+        build = _start_update if i % 2 == 0 else _chat_member_update
+        payloads.append(Update.model_validate(build(i + 1, user_id), context={"bot": bot}))
+
+    durations: list[float] = []
+    iterator = iter(payloads)
+
+    async def worker() -> None:
+        for update in iterator:
+            update_started = time.perf_counter()
+            await dp.feed_update(bot, update)
+            durations.append(time.perf_counter() - update_started)
+
+    latency.durations.clear()
+    queries.count = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    update_queries = queries.count
+
+    # What the periodic last-seen flush would write for this run
+    flush_started = time.perf_counter()
+    touched = await activity_tracker.flush()
+    flush_seconds = time.perf_counter() - flush_started
+
+    return {
+        "updates": updates,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "updates_per_s": round(updates / elapsed, 1) if elapsed else None,
+        "update_latency": _percentiles(durations),
+        "api_requests": len(latency.durations),
+        "api_latency": _percentiles(latency.durations),
+        "db_queries": update_queries,
+        "db_queries_per_update": round(update_queries / max(updates, 1), 2),
+        "last_seen_flush": {"users": touched, "ms": round(flush_seconds * 1000, 1)},
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Broadcast and update throughput load test")
+    parser.add_argument("--users", type=int, default=1000, help="Synthetic users for the broadcast")
+    parser.add_argument("--updates", type=int, default=1000, help="Synthetic updates to feed")
+    parser.add_argument("--concurrency", type=int, default=20, help="Updates processed in parallel")
+    parser.add_argument(
+        "--api-url", help="Use an already running fake Bot API instead of starting one"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8081, help="Port of the in-process fake Bot API"
+    )
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-403", type=float, default=0.0)
+    parser.add_argument("--rate-not-found", type=float, default=0.0)
+    parser.add_argument(
+        "--no-throttle",
+        action="store_true",
+        help="Disable the broadcast send rate and outbound budget to measure raw overhead",
+    )
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    args = parser.parse_args()
+
+    if args.no_throttle:
+        executor.SEND_RATE = 1_000_000
+        outbound_scheduler.configure(rate=1_000_000, reserve=0)
+
+    fake_api = None
+    api_url = args.api_url
+    if api_url is None:
+        fake_api = FakeBotApi(
+            latency_ms=args.latency_ms,
+            rate_429=args.rate_429,
+            rate_403=args.rate_403,
+            rate_not_found=args.rate_not_found,
+        )
+        api_url = await fake_api.start(port=args.port)
+
+    bot = create_bot(LOADTEST_TOKEN)
+    bot.session.api = TelegramAPIServer.from_base(api_url)
+    latency = ApiLatencyMiddleware()
+    bot.session.middleware(latency)
+    queries = QueryCounter()
+
+    broadcast_ids: list[int] = []
+    max_user_id = USER_ID_BASE + max(args.users, args.updates)
+    result: dict[str, Any] = {
+        "params": {k: v for k, v in vars(args).items() if k != "output"},
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    try:
+        await _seed_users(args.users)
+        result["broadcast"], broadcast_id = await _run_broadcast_scenario(
+            bot, args.users, latency, queries
+        )
+        broadcast_ids.append(broadcast_id)
+        result["updates"] = await _run_updates_scenario(
+            bot, args.updates, args.concurrency, latency, queries
+        )
+        if fake_api is not None:
+            result["fake_api"] = fake_api.stats()
+    finally:
+        await _cleanup(broadcast_ids, max_user_id)
+        await bot.session.close()
+        if fake_api is not None:
+            await fake_api.stop()
+        await dispose_engines()
+
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
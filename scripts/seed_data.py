@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Fill a local Postgres with synthetic users and channel events.
+
+Rows are streamed with COPY (asyncpg copy_records_to_table), so millions of
+users and tens of millions of events load in minutes. Users are spread over
+several bots (rows in ``bots``) with a skewed distribution (the first bots are the
+biggest), the same Telegram ID can appear under several bots, and join/event
+times cover the last two years. Runs VACUUM ANALYZE afterwards so the planner
+sees realistic statistics and index-only scans work as in a settled database.
+
+DO NOT run against production: --truncate wipes users and channel_events.
+
+Usage:
+    python scripts/seed_data.py --users 2000000 --bots 10 --events 20000000 --truncate
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import asyncpg  # noqa: E402
+
+from core.config import settings  # noqa: E402
+
+COPY_CHUNK = 100_000
+TELEGRAM_ID_BASE = 100_000_000
+HISTORY = timedelta(days=730)
+USER_COLUMNS = [
+    "telegram_id", "bot_id", "username", "first_name", "last_name",
+    "joined_at", "is_blocked", "is_subscribed", "blocked_at",
+]
+EVENT_COLUMNS = ["user_id", "bot_id", "event_type", "occurred_at"]
+FIRST_NAMES = ["Alex", "Maria", "Ivan", "Olga", "Dmitry", "Anna", "Sergey", "Elena", "Max", "Kate"]
+
+
+def asyncpg_dsn(url: str = settings.database_url) -> str:
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def seed_token(index: int) -> str:
+    return f"{7_000_000_000 + index}:SEED-bot-{index:03d}"
+
+
+def _bot_sizes(users: int, bots: int) -> list[int]:
+    # Zipf-like: bot k gets a share proportional to 1 / (k + 1)
+    weights = [1 / (k + 1) for k in range(bots)]
+    total = sum(weights)
+    sizes = [int(users * w / total) for w in weights]
+    sizes[0] += users - sum(sizes)
+    return sizes
+
+
+def _user_records(rng: random.Random, bot_id: int, telegram_ids: list[int], now: datetime,
+                  blocked_rate: float, subscribed_rate: float):
+    for telegram_id in telegram_ids:
+        has_username = rng.random() < 0.7
+        joined_at = now - HISTORY * rng.random()
+        blocked = rng.random() < blocked_rate
+        yield (
+            telegram_id,
+            bot_id,
+            f"user{telegram_id}" if has_username else None,
+            rng.choice(FIRST_NAMES),
+            None if rng.random() < 0.6 else "Loadtest",
+            joined_at,
+            blocked,
+            rng.random() < subscribed_rate,
+            joined_at + (now - joined_at) * rng.random() if blocked else None,
+        )
+
+
+def _event_records(rng: random.Random, bot_ids: list[int], id_pool: int, count: int, now: datetime):
+    for _ in range(count):
+        yield (
+            TELEGRAM_ID_BASE + rng.randrange(id_pool),
+            bot_ids[min(int(rng.paretovariate(1)) - 1, len(bot_ids) - 1)],
+            "subscribed" if rng.random() < 0.7 else "unsubscribed",
+            now - HISTORY * rng.random(),
+        )
+
+
+async def _register_bots(conn: asyncpg.Connection, bots: int) -> list[int]:
+    """bots.id of every seed bot, biggest first."""
+    tokens = [seed_token(index) for index in range(bots)]
+    rows = await conn.fetch(
+        """
+        INSERT INTO bots (telegram_bot_id, token)
+        SELECT split_part(token, ':', 1)::bigint, token FROM unnest($1::text[]) AS token
+        ON CONFLICT (telegram_bot_id) DO UPDATE SET token = excluded.token
+        RETURNING id, token
+        """,
+        tokens,
+    )
+    ids = {row["token"]: row["id"] for row in rows}
+    return [ids[token] for token in tokens]
+
+
+async def _copy(conn: asyncpg.Connection, table: str, columns: list[str], records) -> int:
+    copied = 0
+    chunk: list[tuple] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= COPY_CHUNK:
+            await conn.copy_records_to_table(table, records=chunk, columns=columns)
+            copied += len(chunk)
+            chunk = []
+    if chunk:
+        await conn.copy_records_to_table(table, records=chunk, columns=columns)
+        copied += len(chunk)
+    return copied
+
+
+async def seed(
+    dsn: str,
+    users: int,
+    bots: int,
+    events: int,
+    truncate: bool = False,
+    blocked_rate: float = 0.08,
+    subscribed_rate: float = 0.55,
+    seed_value: int = 42,
+) -> dict[str, float]:
+    """Seed users and channel_events; returns row counts and timings."""
+    rng = random.Random(seed_value)
+    now = datetime.now(timezone.utc)
+    # ~20% more distinct IDs than users per bot so IDs overlap between bots
+    id_pool = max(int(users * 1.2), 1)
+
+    conn = await asyncpg.connect(asyncpg_dsn(dsn))
+    try:
+        if truncate:
+            await conn.execute("TRUNCATE users, channel_events RESTART IDENTITY")
+
+        bot_ids = await _register_bots(conn, bots)
+
+        started = time.perf_counter()
+        user_rows = 0
+        for bot_id, size in zip(bot_ids, _bot_sizes(users, bots)):
+            ids = [TELEGRAM_ID_BASE + i for i in rng.sample(range(id_pool), min(size, id_pool))]
+            records = _user_records(rng, bot_id, ids, now, blocked_rate, subscribed_rate)
+            user_rows += await _copy(conn, "users", USER_COLUMNS, records)
+        users_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        event_records = _event_records(rng, bot_ids, id_pool, events, now)
+        event_rows = await _copy(conn, "channel_events", EVENT_COLUMNS, event_records)
+        events_seconds = time.perf_counter() - started
+
+        # VACUUM sets the visibility map, without it index-only scans still visit the heap
+        await conn.execute("VACUUM ANALYZE users")
+        await conn.execute("VACUUM ANALYZE channel_events")
+    finally:
+        await conn.close()
+
+    return {
+        "users": user_rows,
+        "events": event_rows,
+        "users_seconds": round(users_seconds, 2),
+        "events_seconds": round(events_seconds, 2),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed synthetic users and channel events")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--bots", type=int, default=10, help="Number of bots")
+    parser.add_argument("--events", type=int, default=10_000_000)
+    parser.add_argument("--blocked-rate", type=float, default=0.08)
+    parser.add_argument("--subscribed-rate", type=float, default=0.55)
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible data")
+    parser.add_argument(
+        "--truncate", action="store_true", help="Empty users and channel_events first"
+    )
+    parser.add_argument("--database-url", default=settings.database_url)
+    args = parser.parse_args()
+
+    result = await seed(
+        args.database_url,
+        users=args.users,
+        bots=args.bots,
+        events=args.events,
+        truncate=args.truncate,
+        blocked_rate=args.blocked_rate,
+        subscribed_rate=args.subscribed_rate,
+        seed_value=args.seed,
+    )
+    print(
+        f"Seeded {result['users']} users in {result['users_seconds']}s, "
+        f"{result['events']} events in {result['events_seconds']}s"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
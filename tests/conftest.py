@@ -0,0 +1,19 @@
+import pytest
+
+
+class NullSession:
+    """Stands in for a session factory when the CRUD functions using it are replaced too."""
+
+    def __call__(self) -> "NullSession":
+        return self
+
+    async def __aenter__(self) -> "NullSession":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+
+@pytest.fixture
+def null_session() -> NullSession:
+    return NullSession()
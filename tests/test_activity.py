@@ -0,0 +1,84 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from aiogram.types import User
+
+import bot.middlewares.activity as activity
+from bot.middlewares.activity import ActivityMiddleware, ActivityTracker
+
+BOT_IDS = {"token-a": 1, "token-b": 2}
+
+
+class Touches:
+    """Replaces touch_users: keeps each batch of (telegram_id, bot_id, seen_at), can fail."""
+
+    def __init__(self) -> None:
+        self.batches: list[list[tuple[int, int, datetime]]] = []
+        self.error: Exception | None = None
+
+    async def __call__(self, session, seen) -> int:
+        if self.error is not None:
+            raise self.error
+        self.batches.append(list(seen))
+        return len(seen)
+
+
+@pytest.fixture
+def touches(monkeypatch: pytest.MonkeyPatch, null_session) -> Touches:
+    async def get_bot_id(session, token: str) -> int:
+        return BOT_IDS[token]
+
+    touches = Touches()
+    monkeypatch.setattr(activity, "BulkSessionLocal", null_session)
+    monkeypatch.setattr(activity, "get_bot_id", get_bot_id)
+    monkeypatch.setattr(activity, "touch_users", touches)
+    return touches
+
+
+async def test_flush_writes_the_latest_time_per_user_and_bot(touches: Touches) -> None:
+    tracker = ActivityTracker()
+    tracker.seen("token-a", 10)
+    tracker.seen("token-b", 10)
+    tracker.seen("token-a", 10)
+
+    assert await tracker.flush() == 2
+    assert await tracker.flush() == 0
+    [batch] = touches.batches
+    assert sorted((telegram_id, bot_id) for telegram_id, bot_id, _ in batch) == [(10, 1), (10, 2)]
+
+
+async def test_failed_flush_keeps_times_but_not_over_newer_ones(touches: Touches) -> None:
+    tracker = ActivityTracker()
+    tracker.seen("token-a", 10)
+    tracker.seen("token-a", 20)
+    touches.error = ConnectionError("db down")
+    with pytest.raises(ConnectionError):
+        await tracker.flush()
+    stale = dict(tracker._dirty)
+
+    tracker.seen("token-a", 20)
+    newer = tracker._dirty[("token-a", 20)]
+    touches.error = None
+    assert await tracker.flush() == 2
+
+    seen_at = {telegram_id: value for telegram_id, _, value in touches.batches[0]}
+    assert seen_at == {10: stale[("token-a", 10)], 20: newer}
+    assert newer >= stale[("token-a", 20)]
+
+
+async def test_middleware_tracks_users_but_not_bots() -> None:
+    tracker = ActivityTracker()
+    middleware = ActivityMiddleware(tracker)
+    bot = SimpleNamespace(token="token-a")
+
+    async def handler(event, data) -> str:
+        return "handled"
+
+    person = User(id=10, is_bot=False, first_name="Ann")
+    other_bot = User(id=11, is_bot=True, first_name="Bot")
+    assert await middleware(handler, None, {"event_from_user": person, "bot": bot}) == "handled"
+    await middleware(handler, None, {"event_from_user": other_bot, "bot": bot})
+    await middleware(handler, None, {"bot": bot})
+
+    assert list(tracker._dirty) == [("token-a", 10)]
@@ -0,0 +1,66 @@
+import pytest
+
+import bot.tasks.blocked_users as blocked_users
+from bot.tasks.blocked_users import BlockedUserWriter
+
+BOT_IDS = {"token-a": 1, "token-b": 2}
+
+
+class Blocker:
+    """Replaces set_users_blocked: records each call, can fail after some calls."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[list[int], int, str]] = []
+        self.fail_after: int | None = None
+
+    async def __call__(self, session, telegram_ids, bot_id, blocked, reason=None) -> list[int]:
+        assert blocked
+        if self.fail_after is not None and len(self.calls) >= self.fail_after:
+            raise ConnectionError("db down")
+        self.calls.append((list(telegram_ids), bot_id, reason))
+        return list(telegram_ids)
+
+
+@pytest.fixture
+def blocker(monkeypatch: pytest.MonkeyPatch, null_session) -> Blocker:
+    async def get_bot_id(session, token: str) -> int:
+        return BOT_IDS[token]
+
+    blocker = Blocker()
+    monkeypatch.setattr(blocked_users, "BulkSessionLocal", null_session)
+    monkeypatch.setattr(blocked_users, "get_bot_id", get_bot_id)
+    monkeypatch.setattr(blocked_users, "set_users_blocked", blocker)
+    return blocker
+
+
+async def test_flush_blocks_once_per_bot_and_reason(blocker: Blocker) -> None:
+    writer = BlockedUserWriter()
+    writer.add("token-a", 30, "blocked")
+    writer.add("token-a", 10, "blocked")
+    writer.add("token-a", 10, "blocked")
+    writer.add("token-a", 20, "deactivated")
+    writer.add("token-b", 10, "blocked")
+
+    assert await writer.flush() == 4
+    assert await writer.flush() == 0
+    assert sorted(blocker.calls) == [
+        ([10], 2, "blocked"),
+        ([10, 30], 1, "blocked"),
+        ([20], 1, "deactivated"),
+    ]
+
+
+async def test_failed_flush_is_retried_with_users_added_since(blocker: Blocker) -> None:
+    writer = BlockedUserWriter()
+    writer.add("token-a", 10, "blocked")
+    writer.add("token-b", 20, "blocked")
+    blocker.fail_after = 1
+    with pytest.raises(ConnectionError):
+        await writer.flush()
+
+    writer.add("token-a", 11, "blocked")
+    blocker.fail_after = None
+    blocker.calls.clear()
+    await writer.flush()
+    # The batch written before the failure is sent again; the DB skips it as unchanged
+    assert sorted(blocker.calls) == [([10, 11], 1, "blocked"), ([20], 2, "blocked")]
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import pytest
+
+import admin.caching as caching
+from admin.caching import DATA_TABLES, DataVersions
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class VersionsSession:
+    """Answers the sequence query with the current ``versions``."""
+
+    def __init__(self) -> None:
+        self.versions = dict.fromkeys(DATA_TABLES, 1)
+
+    def __call__(self) -> "VersionsSession":
+        return self
+
+    async def __aenter__(self) -> "VersionsSession":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+    async def execute(self, query) -> SimpleNamespace:
+        rows = list(self.versions.items())
+        return SimpleNamespace(all=lambda: rows)
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(caching, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+@pytest.fixture
+def db(monkeypatch: pytest.MonkeyPatch) -> VersionsSession:
+    session = VersionsSession()
+    monkeypatch.setattr(caching, "AdminSessionLocal", session)
+    return session
+
+
+async def test_without_delay_the_latest_read_is_used(clock: Clock, db: VersionsSession) -> None:
+    versions = DataVersions()
+    assert versions.get(("users",)) is None
+
+    await versions.refresh()
+    db.versions["users"] = 5
+    await versions.refresh()
+    assert versions.get(("users", "bots")) == (5, 1)
+
+
+async def test_nothing_until_a_read_is_old_enough(clock: Clock, db: VersionsSession) -> None:
+    versions = DataVersions(delay=10)
+    await versions.refresh()
+    assert versions.get(("users",)) is None
+
+    clock.now += 10
+    assert versions.get(("users",)) == (1,)
+
+
+async def test_versions_are_served_delay_seconds_late(clock: Clock, db: VersionsSession) -> None:
+    versions = DataVersions(delay=10)
+    for version in range(1, 5):
+        db.versions["users"] = version
+        await versions.refresh()
+        clock.now += 5
+    # Reads at 1000, 1005, 1010, 1015; now 1020: the newest read 10s old is from 1010
+    assert versions.get(("users",)) == (3,)
+    assert len(versions._reads) == 2
+
+    clock.now += 5
+    assert versions.get(("users",)) == (4,)
+    assert len(versions._reads) == 1
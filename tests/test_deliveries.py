@@ -0,0 +1,86 @@
+import asyncio
+from array import array
+
+import pytest
+
+import bot.tasks.deliveries as deliveries
+from bot.tasks.deliveries import DeliveryLog
+
+BROADCAST_ID = 7
+
+
+class Store:
+    """Replaces add_deliveries: keeps the written rows, can fail or stall a write."""
+
+    def __init__(self) -> None:
+        self.rows: list[tuple[list[int], list[int]]] = []
+        self.error: Exception | None = None
+        self.gate: asyncio.Event | None = None
+
+    async def __call__(self, session, broadcast_id, chat_ids, message_ids) -> None:
+        assert broadcast_id == BROADCAST_ID
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        self.rows.append((list(chat_ids), list(message_ids)))
+
+
+@pytest.fixture
+def store(monkeypatch: pytest.MonkeyPatch, null_session) -> Store:
+    store = Store()
+    monkeypatch.setattr(deliveries, "BulkSessionLocal", null_session)
+    monkeypatch.setattr(deliveries, "add_deliveries", store)
+    return store
+
+
+def make_log(*delivered: int) -> DeliveryLog:
+    return DeliveryLog(BROADCAST_ID, array("q", sorted(delivered)))
+
+
+def test_earlier_deliveries_are_found() -> None:
+    log = make_log(5, 10, 15, 2**40)
+    assert all(chat_id in log for chat_id in (5, 10, 15, 2**40))
+    assert not any(chat_id in log for chat_id in (0, 6, 16, 2**41))
+    assert 1 not in make_log()
+    assert log.count == 4
+
+
+async def test_flush_writes_recorded_deliveries_as_one_row(store: Store) -> None:
+    log = make_log(1)
+    log.record(20, 200)
+    log.record(30, 300)
+    assert log.count == 3
+    await log.flush()
+    await log.flush()
+    assert store.rows == [([20, 30], [200, 300])]
+
+
+async def test_deliveries_recorded_during_a_write_go_out_with_the_next(store: Store) -> None:
+    log = make_log()
+    store.gate = asyncio.Event()
+    log.record(1, 101)
+    first = asyncio.create_task(log.flush())
+    await asyncio.sleep(0)
+    log.record(2, 102)
+    second = asyncio.create_task(log.flush())
+    log.record(3, 103)
+    third = asyncio.create_task(log.flush())
+    await asyncio.sleep(0)
+
+    store.gate.set()
+    await asyncio.gather(first, second, third)
+    assert store.rows == [([1], [101]), ([2, 3], [102, 103])]
+
+
+async def test_failed_flush_keeps_its_deliveries(store: Store) -> None:
+    log = make_log()
+    log.record(1, 101)
+    store.error = ConnectionError("db down")
+    with pytest.raises(ConnectionError):
+        await log.flush()
+
+    log.record(2, 102)
+    store.error = None
+    await log.flush()
+    assert store.rows == [([1, 2], [101, 102])]
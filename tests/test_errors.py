@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.methods import GetMe, SendMessage
+from aiogram.types import ChatMemberMember, ChatMemberUpdated, ErrorEvent, Update, User
+from loguru import logger
+
+import bot.handlers.errors as errors
+from bot.handlers.errors import MAX_TRACKED_ERRORS, ErrorLog, _affected_user
+
+SENDER = User(id=10, is_bot=False, first_name="Admin")
+MEMBER = User(id=20, is_bot=False, first_name="Member")
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(errors, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+@pytest.fixture
+def logged() -> list[str]:
+    messages: list[str] = []
+    handler_id = logger.add(lambda message: messages.append(message.record["message"]))
+    yield messages
+    logger.remove(handler_id)
+
+
+def raise_at(line: int) -> Exception:
+    """An exception raised from one of two distinct lines."""
+    try:
+        if line == 1:
+            raise ValueError("first")
+        raise ValueError("second")
+    except ValueError as exc:
+        return exc
+
+
+def test_repeats_are_counted_until_the_window_passes(clock: Clock, logged: list[str]) -> None:
+    log = ErrorLog(window=60)
+    for _ in range(4):
+        log.record(raise_at(1), "boom")
+    log.record(raise_at(2), "other line")
+    assert logged == ["boom", "other line"]
+
+    clock.now += 60
+    log.record(raise_at(1), "boom")
+    log.record(raise_at(1), "boom")
+    assert logged[2:] == ["boom (and 3 more like it in the previous 60s)"]
+
+
+def test_least_recent_errors_are_forgotten(clock: Clock, logged: list[str]) -> None:
+    log = ErrorLog(window=60)
+    first = raise_at(1)
+    log.record(first, "first")
+    for line in range(MAX_TRACKED_ERRORS):
+        log._seen[("Fake", "file.py", line)] = [clock.now, 0]
+    log.record(raise_at(2), "evicts the first")
+
+    assert len(log._seen) == MAX_TRACKED_ERRORS
+    log.record(first, "first again")
+    assert logged == ["first", "evicts the first", "first again"]
+
+
+def message_update() -> Update:
+    return Update.model_validate(
+        {
+            "update_id": 1,
+            "message": {
+                "message_id": 1,
+                "date": 0,
+                "chat": {"id": SENDER.id, "type": "private"},
+                "from": SENDER.model_dump(),
+                "text": "hi",
+            },
+        }
+    )
+
+
+def chat_member_update() -> Update:
+    return Update(
+        update_id=2,
+        chat_member=ChatMemberUpdated(
+            chat={"id": -100, "type": "channel"},
+            from_user=SENDER,
+            date=0,
+            old_chat_member={"status": "left", "user": MEMBER},
+            new_chat_member=ChatMemberMember(user=MEMBER),
+        ),
+    )
+
+
+def failed(method, update: Update) -> ErrorEvent:
+    exc = TelegramForbiddenError(method=method, message="Forbidden: bot was blocked by the user")
+    return ErrorEvent(update=update, exception=exc)
+
+
+def test_failed_private_chat_is_the_affected_user() -> None:
+    event = failed(SendMessage(chat_id=30, text="x"), message_update())
+    assert _affected_user(event, SENDER) == 30
+
+
+@pytest.mark.parametrize("chat_id", [-100, "@news"])
+def test_failed_group_or_channel_has_no_affected_user(chat_id: int | str) -> None:
+    event = failed(SendMessage(chat_id=chat_id, text="x"), message_update())
+    assert _affected_user(event, SENDER) is None
+
+
+def test_error_without_a_chat_falls_back_to_the_update_user() -> None:
+    assert _affected_user(failed(GetMe(), message_update()), SENDER) == SENDER.id
+    assert _affected_user(failed(GetMe(), message_update()), None) is None
+
+
+def test_chat_member_update_blames_the_member_not_the_admin() -> None:
+    assert _affected_user(failed(GetMe(), chat_member_update()), SENDER) == MEMBER.id
@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from bot.tasks.executor import RateLimitedExecutor
+
+
+def retry_after(seconds: int = 0) -> TelegramRetryAfter:
+    return TelegramRetryAfter(
+        method=SendMessage(chat_id=1, text="x"), message="Too Many Requests", retry_after=seconds
+    )
+
+
+async def test_every_item_is_reported_with_its_outcome() -> None:
+    async def call(item: int) -> int:
+        if item % 3 == 0:
+            raise ValueError(item)
+        return item * 10
+
+    outcomes: dict[int, object] = {}
+    await RateLimitedExecutor(rate=1000, concurrency=4).run(
+        range(10), call, lambda item, outcome: outcomes.__setitem__(item, outcome)
+    )
+
+    assert sorted(outcomes) == list(range(10))
+    for item, outcome in outcomes.items():
+        if item % 3 == 0:
+            assert isinstance(outcome, ValueError)
+        else:
+            assert outcome == item * 10
+
+
+async def test_calls_are_spread_at_the_rate() -> None:
+    started: list[float] = []
+
+    async def call(item: int) -> None:
+        started.append(time.monotonic())
+
+    rate = 200.0
+    await RateLimitedExecutor(rate=rate, concurrency=10).run(range(20), call)
+    assert started[-1] - started[0] >= 19 / rate * 0.9
+
+
+async def test_concurrency_is_bounded() -> None:
+    running = 0
+    peak = 0
+
+    async def call(item: int) -> None:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    await RateLimitedExecutor(rate=10_000, concurrency=3).run(range(12), call)
+    assert peak == 3
+
+
+async def test_retry_after_is_retried() -> None:
+    attempts: dict[int, int] = {}
+
+    async def call(item: int) -> str:
+        attempts[item] = attempts.get(item, 0) + 1
+        if item == 2 and attempts[item] == 1:
+            raise retry_after()
+        return "ok"
+
+    outcomes: dict[int, object] = {}
+    await RateLimitedExecutor(rate=1000, concurrency=2).run(
+        range(4), call, lambda item, outcome: outcomes.__setitem__(item, outcome)
+    )
+    assert attempts[2] == 2
+    assert set(outcomes.values()) == {"ok"}
+
+
+async def test_retry_after_pauses_all_workers() -> None:
+    executor = RateLimitedExecutor(rate=1000, concurrency=2)
+
+    async def call() -> None:
+        raise retry_after(30)
+
+    task = asyncio.create_task(executor.call(call))
+    await asyncio.sleep(0.01)
+    assert executor._paused_until >= time.monotonic() + 29
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+async def test_retry_after_gives_up_after_max_retries() -> None:
+    calls = 0
+
+    async def call(item: int) -> None:
+        nonlocal calls
+        calls += 1
+        raise retry_after()
+
+    outcomes: list[object] = []
+    await RateLimitedExecutor(rate=1000, concurrency=1, max_retries=2).run(
+        [1], call, lambda item, outcome: outcomes.append(outcome)
+    )
+    assert calls == 3
+    assert isinstance(outcomes[0], TelegramRetryAfter)
+
+
+async def test_on_result_error_stops_new_calls_and_is_raised() -> None:
+    started: list[int] = []
+    reported: list[int] = []
+
+    async def call(item: int) -> int:
+        started.append(item)
+        await asyncio.sleep(0.01)
+        return item
+
+    async def on_result(item: int, outcome: object) -> None:
+        reported.append(item)
+        if len(reported) == 5:
+            raise RuntimeError("stop")
+
+    with pytest.raises(RuntimeError, match="stop"):
+        await RateLimitedExecutor(rate=10_000, concurrency=4).run(range(100), call, on_result)
+
+    # Calls already in flight finish and are reported; nothing else starts
+    assert len(started) < 10
+    assert sorted(reported) == sorted(started)
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.methods import SendMessage
+
+import bot.tasks.failures as failures
+from bot.tasks.failures import SAMPLES_PER_KIND, FailureStats, classify_failure
+
+METHOD = SendMessage(chat_id=1, text="x")
+BOT_ID = 3
+
+
+def forbidden(message: str) -> TelegramForbiddenError:
+    return TelegramForbiddenError(method=METHOD, message=message)
+
+
+def bad_request(message: str) -> TelegramBadRequest:
+    return TelegramBadRequest(method=METHOD, message=message)
+
+
+@pytest.mark.parametrize(
+    ("exc", "kind"),
+    [
+        (forbidden("Forbidden: bot was blocked by the user"), "blocked"),
+        (forbidden("Forbidden: user is deactivated"), "deactivated"),
+        (forbidden("Forbidden: bot can't initiate conversation with a user"), "forbidden"),
+        (bad_request("Bad Request: chat not found"), "chat_not_found"),
+        (bad_request("Bad Request: PEER_ID_INVALID"), "chat_not_found"),
+        (bad_request("Bad Request: can't parse entities: unclosed tag"), "parse_error"),
+        (bad_request("Bad Request: message text is empty"), "bad_request"),
+        (
+            TelegramRetryAfter(method=METHOD, message="Too Many Requests", retry_after=5),
+            "rate_limited",
+        ),
+        (TelegramNetworkError(method=METHOD, message="connection reset"), "network"),
+        (asyncio.TimeoutError(), "network"),
+        (TelegramServerError(method=METHOD, message="Internal Server Error"), "server"),
+        (ValueError("boom"), "other"),
+    ],
+)
+def test_classify_failure(exc: Exception, kind: str) -> None:
+    assert classify_failure(exc) == kind
+
+
+def test_counts_and_capped_samples() -> None:
+    stats = FailureStats()
+    for chat_id in range(20):
+        stats.record(chat_id, BOT_ID, bad_request("Bad Request: message text is empty"))
+    stats.record(99, BOT_ID, forbidden("Forbidden: bot was blocked by the user"))
+
+    data = stats.as_dict()
+    assert data["counts"] == {"bad_request": 20, "blocked": 1}
+    assert len(data["samples"]["bad_request"]) == SAMPLES_PER_KIND
+    assert all(0 <= sample["chat_id"] < 20 for sample in data["samples"]["bad_request"])
+    assert data["samples"]["blocked"] == [
+        {"chat_id": 99, "error": "Telegram server says - Forbidden: bot was blocked by the user"}
+    ]
+    assert stats.total == 21
+
+
+def test_no_failures_is_stored_as_none() -> None:
+    assert FailureStats().as_dict() is None
+
+
+def test_resume_keeps_only_permanent_failures() -> None:
+    stats = FailureStats()
+    stats.record(1, BOT_ID, forbidden("Forbidden: bot was blocked by the user"))
+    stats.record(2, BOT_ID, TelegramServerError(method=METHOD, message="Bad Gateway"))
+
+    resumed = FailureStats.from_dict(stats.as_dict())
+    assert resumed.counts == {"blocked": 1}
+    assert list(resumed.samples) == ["blocked"]
+    assert FailureStats.from_dict(None).total == 0
+
+
+class Blocker:
+    """Replaces set_users_blocked: records each call, can fail."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[list[int], int, str]] = []
+        self.error: Exception | None = None
+
+    async def __call__(self, session, telegram_ids, bot_id, blocked, reason=None) -> list[int]:
+        assert blocked
+        if self.error is not None:
+            raise self.error
+        self.calls.append((list(telegram_ids), bot_id, reason))
+        return list(telegram_ids)
+
+
+@pytest.fixture
+def blocker(monkeypatch: pytest.MonkeyPatch, null_session) -> Blocker:
+    blocker = Blocker()
+    monkeypatch.setattr(failures, "BulkSessionLocal", null_session)
+    monkeypatch.setattr(failures, "set_users_blocked", blocker)
+    return blocker
+
+
+async def test_flush_blocks_permanent_failures_per_reason_and_bot(blocker: Blocker) -> None:
+    stats = FailureStats()
+    stats.record(1, BOT_ID, forbidden("Forbidden: bot was blocked by the user"))
+    stats.record(2, BOT_ID, forbidden("Forbidden: user is deactivated"))
+    stats.record(3, BOT_ID, forbidden("Forbidden: bot was blocked by the user"))
+    stats.record(4, BOT_ID + 1, forbidden("Forbidden: bot was blocked by the user"))
+    stats.record(5, BOT_ID, TelegramServerError(method=METHOD, message="Bad Gateway"))
+
+    await stats.flush()
+    await stats.flush()
+    assert sorted(blocker.calls) == [
+        ([1, 3], BOT_ID, "blocked"),
+        ([2], BOT_ID, "deactivated"),
+        ([4], BOT_ID + 1, "blocked"),
+    ]
+
+
+async def test_failed_flush_keeps_its_chats(blocker: Blocker) -> None:
+    stats = FailureStats()
+    stats.record(1, BOT_ID, forbidden("Forbidden: bot was blocked by the user"))
+    blocker.error = ConnectionError("db down")
+    with pytest.raises(ConnectionError):
+        await stats.flush()
+
+    stats.record(2, BOT_ID, forbidden("Forbidden: bot was blocked by the user"))
+    blocker.error = None
+    await stats.flush()
+    assert blocker.calls == [([1, 2], BOT_ID, "blocked")]
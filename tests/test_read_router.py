@@ -0,0 +1,137 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import core.database as database
+from core.database import ReadRouter
+from core.metrics import DB_REPLICA_LAG
+
+MAX_LAG = 10.0
+CHECK_INTERVAL = 5.0
+
+PRIMARY = object()
+
+
+class FakeReplica:
+    """Stands in for a replica's session factory: answers the lag query or fails."""
+
+    def __init__(self, lag: float | None = 0.0, error: Exception | None = None) -> None:
+        self.lag = lag
+        self.error = error
+        self.checks = 0
+
+    def __call__(self) -> "FakeReplica":
+        return self
+
+    async def __aenter__(self) -> "FakeReplica":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+    async def execute(self, statement) -> SimpleNamespace:
+        self.checks += 1
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(scalar=lambda: self.lag)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(database.time, "monotonic", clock)
+    return clock
+
+
+def make_router(replica: FakeReplica | None) -> ReadRouter:
+    return ReadRouter(replica, max_lag=MAX_LAG, check_interval=CHECK_INTERVAL)
+
+
+async def test_without_replica_reads_primary() -> None:
+    assert await make_router(None).pick(PRIMARY) is PRIMARY
+
+
+async def test_fresh_replica_is_used(clock: Clock) -> None:
+    replica = FakeReplica(lag=0.0)
+    assert await make_router(replica).pick(PRIMARY) is replica
+
+
+@pytest.mark.parametrize(
+    ("lag", "uses_replica"),
+    [(MAX_LAG - 0.1, True), (MAX_LAG, True), (MAX_LAG + 0.1, False), (None, False)],
+)
+async def test_lag_bound(clock: Clock, lag: float | None, uses_replica: bool) -> None:
+    replica = FakeReplica(lag=lag)
+    picked = await make_router(replica).pick(PRIMARY)
+    assert picked is (replica if uses_replica else PRIMARY)
+
+
+async def test_lag_is_exported(clock: Clock) -> None:
+    await make_router(FakeReplica(lag=3.5)).pick(PRIMARY)
+    assert DB_REPLICA_LAG._value.get() == 3.5
+
+
+async def test_unreachable_replica_falls_back_to_primary(clock: Clock) -> None:
+    replica = FakeReplica(error=ConnectionRefusedError("connection refused"))
+    assert await make_router(replica).pick(PRIMARY) is PRIMARY
+
+
+async def test_check_is_cached_for_the_interval(clock: Clock) -> None:
+    replica = FakeReplica(lag=0.0)
+    router = make_router(replica)
+    assert await router.pick(PRIMARY) is replica
+
+    replica.lag = MAX_LAG * 2
+    clock.now += CHECK_INTERVAL - 0.1
+    assert await router.pick(PRIMARY) is replica
+    assert replica.checks == 1
+
+    clock.now += 0.1
+    assert await router.pick(PRIMARY) is PRIMARY
+    assert replica.checks == 2
+
+
+async def test_replica_is_used_again_after_recovery(clock: Clock) -> None:
+    replica = FakeReplica(error=OSError("unreachable"))
+    router = make_router(replica)
+    assert await router.pick(PRIMARY) is PRIMARY
+
+    replica.error = None
+    clock.now += CHECK_INTERVAL
+    assert await router.pick(PRIMARY) is replica
+
+
+async def test_concurrent_picks_share_one_check(clock: Clock) -> None:
+    replica = FakeReplica(lag=0.0)
+    router = make_router(replica)
+    picked = await asyncio.gather(*(router.pick(PRIMARY) for _ in range(20)))
+    assert all(session_factory is replica for session_factory in picked)
+    assert replica.checks == 1
+
+
+@pytest.mark.skipif(
+    "TEST_DATABASE_URL" not in os.environ,
+    reason="set TEST_DATABASE_URL to a Postgres database to run",
+)
+async def test_lag_query_on_postgres() -> None:
+    """A primary standing in for the replica: not in recovery, so lag is 0."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    engine = create_async_engine(os.environ["TEST_DATABASE_URL"])
+    try:
+        replica = async_sessionmaker(engine)
+        assert await make_router(replica).pick(PRIMARY) is replica
+        assert DB_REPLICA_LAG._value.get() == 0
+    finally:
+        await engine.dispose()
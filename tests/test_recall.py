@@ -0,0 +1,91 @@
+import asyncio
+from array import array
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import DeleteMessage
+
+import bot.tasks.recall as recall
+from bot.tasks.executor import RateLimitedExecutor
+from bot.tasks.recall import run_recall
+
+MESSAGES = 20
+PROGRESS_EVERY = 4
+FAILING = {3, 4, 11}  # chat IDs whose delete fails
+DONE_BEFORE = {7}  # chat IDs whose message an earlier attempt deleted
+
+
+class FakeBot:
+    """Deletes messages out of order: later chats answer sooner."""
+
+    def __init__(self) -> None:
+        self.deleted: list[int] = []
+
+    async def delete_message(self, chat_id: int, message_id: int) -> bool:
+        await asyncio.sleep((MESSAGES - chat_id) * 0.002)
+        method = DeleteMessage(chat_id=chat_id, message_id=message_id)
+        if chat_id in FAILING:
+            raise TelegramBadRequest(method, "Bad Request: message can't be deleted")
+        if chat_id in DONE_BEFORE:
+            raise TelegramBadRequest(method, "Bad Request: message to delete not found")
+        self.deleted.append(chat_id)
+        return True
+
+
+@pytest.fixture
+def progress(monkeypatch: pytest.MonkeyPatch, null_session) -> list[tuple[int, int, bool]]:
+    writes: list[tuple[int, int, bool]] = []
+
+    async def get_deliveries(session, broadcast_id):
+        return array("q", range(MESSAGES)), array("q", range(100, 100 + MESSAGES))
+
+    async def update_recall_progress(session, broadcast_id, recalled, failed, finished=False):
+        writes.append((recalled, failed, finished))
+
+    monkeypatch.setattr(recall, "BulkSessionLocal", null_session)
+    monkeypatch.setattr(recall, "get_deliveries", get_deliveries)
+    monkeypatch.setattr(recall, "update_recall_progress", update_recall_progress)
+    monkeypatch.setattr(recall, "PROGRESS_EVERY", PROGRESS_EVERY)
+    monkeypatch.setattr(
+        recall, "send_executor", lambda: RateLimitedExecutor(rate=10_000, concurrency=8)
+    )
+    return writes
+
+
+def make_broadcast(recalled: int = 0, failed: int = 0) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=1,
+        recalled=recalled,
+        recall_failed=failed,
+        recall_action="delete",
+        recall_text=None,
+        type="text",
+    )
+
+
+def prefix_counts(end: int) -> tuple[int, int]:
+    failed = len(FAILING & set(range(end)))
+    return end - failed, failed
+
+
+async def test_progress_only_covers_a_finished_prefix(progress: list) -> None:
+    bot = FakeBot()
+    await run_recall(bot, make_broadcast())
+
+    assert sorted(bot.deleted) == sorted(set(range(MESSAGES)) - FAILING - DONE_BEFORE)
+    *partial, final = progress
+    assert final == (*prefix_counts(MESSAGES), True)
+    assert partial
+    for recalled, failed, finished in partial:
+        assert not finished
+        assert (recalled, failed) == prefix_counts(recalled + failed)
+
+
+async def test_resume_starts_after_the_stored_prefix(progress: list) -> None:
+    bot = FakeBot()
+    recalled, failed = prefix_counts(12)
+    await run_recall(bot, make_broadcast(recalled, failed))
+
+    assert min(bot.deleted) >= 12
+    assert progress[-1] == (*prefix_counts(MESSAGES), True)
@@ -0,0 +1,115 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import bot.middlewares.scheduler as scheduler
+from bot.middlewares.scheduler import OutboundScheduler, Priority
+
+RATE = 10.0
+RESERVE = 0.2
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    """Frozen time for the scheduler only: tokens refill when the test moves the clock."""
+    clock = Clock()
+    monkeypatch.setattr(scheduler, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+async def take(bucket: OutboundScheduler, priority: Priority, count: int = 1) -> None:
+    for _ in range(count):
+        await asyncio.wait_for(bucket.acquire(priority), timeout=1)
+
+
+async def blocks(bucket: OutboundScheduler, priority: Priority) -> bool:
+    try:
+        await asyncio.wait_for(bucket.acquire(priority), timeout=0.05)
+    except asyncio.TimeoutError:
+        return True
+    return False
+
+
+async def test_bucket_starts_with_one_second_of_tokens(clock: Clock) -> None:
+    bucket = OutboundScheduler(rate=RATE, reserve=0)
+    await take(bucket, Priority.INTERACTIVE, int(RATE))
+    assert await blocks(bucket, Priority.INTERACTIVE)
+
+
+async def test_bulk_leaves_the_reserve_to_interactive(clock: Clock) -> None:
+    bucket = OutboundScheduler(rate=RATE, reserve=RESERVE)
+    bulk_tokens = int(RATE * (1 - RESERVE))
+    await take(bucket, Priority.BULK, bulk_tokens)
+    assert await blocks(bucket, Priority.BULK)
+    assert await blocks(bucket, Priority.BACKGROUND)
+
+    await take(bucket, Priority.INTERACTIVE, int(RATE) - bulk_tokens)
+    assert await blocks(bucket, Priority.INTERACTIVE)
+
+
+async def test_admin_sends_may_use_the_reserve(clock: Clock) -> None:
+    bucket = OutboundScheduler(rate=RATE, reserve=RESERVE)
+    await take(bucket, Priority.ADMIN, int(RATE))
+    assert await blocks(bucket, Priority.ADMIN)
+
+
+async def test_tokens_refill_at_the_rate(clock: Clock) -> None:
+    bucket = OutboundScheduler(rate=RATE, reserve=0)
+    await take(bucket, Priority.BULK, int(RATE))
+    assert await blocks(bucket, Priority.BULK)
+
+    clock.now += 2 / RATE
+    await take(bucket, Priority.BULK, 2)
+    assert await blocks(bucket, Priority.BULK)
+
+
+async def test_refill_is_capped_at_capacity(clock: Clock) -> None:
+    bucket = OutboundScheduler(rate=RATE, reserve=0)
+    clock.now += 60
+    await take(bucket, Priority.INTERACTIVE, int(RATE))
+    assert await blocks(bucket, Priority.INTERACTIVE)
+
+
+async def test_waiting_higher_priority_is_served_first(clock: Clock) -> None:
+    bucket = OutboundScheduler(rate=RATE, reserve=0)
+    await take(bucket, Priority.INTERACTIVE, int(RATE))
+
+    bulk = asyncio.create_task(bucket.acquire(Priority.BULK))
+    await asyncio.sleep(0.01)
+    interactive = asyncio.create_task(bucket.acquire(Priority.INTERACTIVE))
+    await asyncio.sleep(0.01)
+
+    clock.now += 1 / RATE
+    await asyncio.wait_for(interactive, timeout=1)
+    assert not bulk.done()
+
+    clock.now += 1 / RATE
+    await asyncio.wait_for(bulk, timeout=1)
+
+
+async def test_pause_holds_bulk_but_not_interactive(clock: Clock) -> None:
+    bucket = OutboundScheduler(rate=RATE, reserve=0)
+    bucket.pause(5)
+    assert await blocks(bucket, Priority.BULK)
+    assert await blocks(bucket, Priority.ADMIN)
+    await take(bucket, Priority.INTERACTIVE)
+
+    clock.now += 5
+    await take(bucket, Priority.BULK)
+
+
+async def test_configure_resets_the_budget(clock: Clock) -> None:
+    bucket = OutboundScheduler(rate=RATE, reserve=0)
+    await take(bucket, Priority.BULK, int(RATE))
+    bucket.configure(rate=RATE * 2, reserve=0.5)
+    await take(bucket, Priority.BULK, int(RATE))
+    assert await blocks(bucket, Priority.BULK)
@@ -0,0 +1,27 @@
+from core.crud.users import MAX_TELEGRAM_ID_DIGITS, _escape_like, _id_prefix_ranges
+
+
+def test_id_prefix_ranges_cover_every_longer_id() -> None:
+    ranges = _id_prefix_ranges("12")
+    assert ranges[:3] == [(12, 12), (120, 129), (1200, 1299)]
+    assert len(ranges) == MAX_TELEGRAM_ID_DIGITS - 1
+    assert ranges[-1] == (12 * 10**14, 13 * 10**14 - 1)
+
+
+def test_id_prefix_ranges_match_exactly_the_ids_with_the_prefix() -> None:
+    ranges = _id_prefix_ranges("57")
+    for candidate in (5, 57, 570, 579, 580, 5699, 5700, 5799, 5800, 57_123_456):
+        matched = any(low <= candidate <= high for low, high in ranges)
+        assert matched == str(candidate).startswith("57")
+
+
+def test_full_length_id_is_a_single_range() -> None:
+    digits = "1" * MAX_TELEGRAM_ID_DIGITS
+    assert _id_prefix_ranges(digits) == [(int(digits), int(digits))]
+
+
+def test_escape_like() -> None:
+    assert _escape_like("john") == "john"
+    assert _escape_like("50%_off") == "50\\%\\_off"
+    assert _escape_like("a\\b") == "a\\\\b"
+    assert _escape_like("\\%") == "\\\\\\%"